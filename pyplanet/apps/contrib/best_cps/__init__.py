@@ -3,6 +3,7 @@ import asyncio
 from pyplanet.apps.config import AppConfig
 from pyplanet.apps.core.maniaplanet import callbacks as mp_signals
 from pyplanet.apps.core.trackmania import callbacks as tm_signals
+from pyplanet.core.events import Coalesce
 
 from .view import BestCpTimesWidget
 from .view import CpTimesListView
@@ -23,6 +24,7 @@ class BestCpTimes(AppConfig):
 
 	async def on_start(self):
 		self.context.signals.listen(tm_signals.waypoint, self.player_cp)
+		self.context.signals.listen(tm_signals.waypoint, self.player_cps_display, coalesce=Coalesce(.25))
 		self.context.signals.listen(mp_signals.player.player_connect, self.player_connect)
 		self.context.signals.listen(mp_signals.map.map_begin, self.map_begin)
 		self.context.signals.listen(mp_signals.map.map_start__end, self.map_end)
@@ -56,6 +58,9 @@ class BestCpTimes(AppConfig):
 					break
 			if not added:
 				self.best_cp_times.append(pcp)
+
+	# Display the widget once for all the CPs passed in the last moment
+	async def player_cps_display(self, events, *args, **kwargs):
 		await self.widget.display()
 
 	# When the map starts
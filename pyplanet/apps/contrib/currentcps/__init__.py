@@ -3,6 +3,7 @@ import logging
 from pyplanet.apps.config import AppConfig
 from pyplanet.apps.core.trackmania import callbacks as tm_signals
 from pyplanet.apps.core.maniaplanet import callbacks as mp_signals
+from pyplanet.core.events import Coalesce
 
 from .view import CPWidgetView
 
@@ -49,6 +50,7 @@ class CurrentCPs(AppConfig):
 	async def on_start(self):
 		# Listen to some signals
 		self.context.signals.listen(tm_signals.waypoint, self.player_cp)
+		self.context.signals.listen(tm_signals.waypoint, self.player_cps_view, coalesce=Coalesce(.25))
 		self.context.signals.listen(tm_signals.start_line, self.player_start)
 		self.context.signals.listen(tm_signals.finish, self.player_finish)
 		self.context.signals.listen(mp_signals.player.player_connect, self.player_connect)
@@ -75,6 +77,9 @@ class CurrentCPs(AppConfig):
 			self.current_cps[player.login] = PlayerCP(player)
 		self.current_cps[player.login].cp = cp + 1  # +1 because checkpointinrace starts at 0
 		self.current_cps[player.login].time = race_time
+
+	# Update the view once for all the CPs passed in the last moment
+	async def player_cps_view(self, events, *args, **kwargs):
 		await self.update_view()
 
 	# When a player starts the race
@@ -1,5 +1,7 @@
 import asyncio
 
+from peewee import fn
+
 from pyplanet.apps.config import AppConfig
 from pyplanet.apps.contrib.karma.views import KarmaListView
 from pyplanet.contrib.command import Command
@@ -8,6 +10,7 @@ from pyplanet.apps.core.statistics.models import Score
 from pyplanet.apps.core.maniaplanet.models import Player
 
 from pyplanet.apps.core.maniaplanet import callbacks as mp_signals
+from pyplanet.contrib.map.signals import playlist_changed
 from pyplanet.apps.contrib.karma.views import KarmaWidget
 from pyplanet.apps.contrib.karma.mxkarma import MXKarma
 
@@ -53,6 +56,7 @@ class Karma(AppConfig):
 		self.context.signals.listen(mp_signals.map.map_end, self.mx_karma.map_end)
 		self.context.signals.listen(mp_signals.player.player_chat, self.player_chat)
 		self.context.signals.listen(mp_signals.player.player_connect, self.player_connect)
+		self.context.signals.listen(playlist_changed, self.playlist_changed)
 
 		await self.context.setting.register(self.setting_finishes_before_voting, self.setting_expanded_voting)
 
@@ -71,42 +75,53 @@ class Karma(AppConfig):
 	async def on_stop(self):
 		await self.mx_karma.on_stop()
 
-	async def load_map_votes(self, map=None):
+	async def load_map_votes(self, map=None, maps=None):
+		"""
+		Load the karma stats (``map.karma``) of the map, the given maps or all maps of the playlist.
+
+		:param map: Map instance.
+		:param maps: Map instances.
+		"""
 		if map:
-			map.karma = await self.get_map_karma(map)
-		else:
-			maps = {m.id: m for m in self.instance.map_manager.maps}
-			map_karmas = dict()
+			maps = [map]
+		elif maps is None:
+			maps = list(self.instance.map_manager.maps)
+
+		stats = await self.get_map_stats(maps)
+		for map_instance in maps:
+			map_instance.karma = stats[map_instance.get_id()]
 
-			# Fetch all.
+	async def get_map_stats(self, maps, chunk_size=500):
+		"""
+		Get the number of votes and the karma of the maps, aggregated by the database.
+
+		:param maps: Map instances.
+		:param chunk_size: Number of maps per query.
+		:return: Dictionary with the map id as key and a dictionary with the vote_count and map_karma as value.
+		:rtype: dict
+		"""
+		map_ids = [m.get_id() for m in maps]
+		stats = {map_id: dict(vote_count=0, map_karma=0.0) for map_id in map_ids}
+
+		for start in range(0, len(map_ids), chunk_size):
 			rows = await KarmaModel.execute(
-				KarmaModel.select().where(
-					KarmaModel.map_id << list(maps.keys())
+				KarmaModel.select(
+					KarmaModel.map, fn.COUNT(KarmaModel.id),
+					fn.SUM(fn.COALESCE(KarmaModel.expanded_score, KarmaModel.score))
 				)
+					.where(KarmaModel.map << map_ids[start:start + chunk_size])
+					.group_by(KarmaModel.map)
+					.tuples()
 			)
+			for map_id, vote_count, total_score in rows:
+				stats[map_id] = dict(vote_count=vote_count, map_karma=float(total_score or 0))
 
-			# Group by map.
-			for row in rows:
-				if row.map_id not in map_karmas:
-					map_karmas[row.map_id] = list()
-				map_karmas[row.map_id].append(row)
-
-			# Map karma stats.
-			for map_id, karma_list in map_karmas.items():
-				total_score = 0.0
-				for vote in karma_list:
-					if vote.expanded_score is not None:
-						total_score += vote.expanded_score
-					else:
-						total_score += vote.score
+		return stats
 
-				maps[map_id].karma = dict(
-					vote_count=len(karma_list),
-					map_karma=total_score
-				)
-
-			del map_karmas
-			del maps
+	async def playlist_changed(self, added, **kwargs):
+		# Only load the karma stats of the maps that are new to the playlist.
+		if added:
+			await self.load_map_votes(maps=added)
 
 	async def show_map_list(self, player, map=None, **kwargs):
 		"""
@@ -172,14 +187,11 @@ class Karma(AppConfig):
 						player_vote.expanded_score = score
 						await player_vote.save()
 
-						map = next((m for m in self.instance.map_manager.maps if m.uid == self.instance.map_manager.current_map.uid), None)
-						if map is not None:
-							map.karma = await self.get_map_karma(self.instance.map_manager.current_map)
-
 						message = '$ff0Successfully changed your karma vote to $fff{}$ff0{}!'.format(text,
 							(' (same as $fff{}$ff0)'.format(text[:2]) if text == '+++' or text == '---' else '')
 						)
 						await self.calculate_karma()
+						self.update_map_karma()
 						await asyncio.gather(
 							self.instance.chat(message, player),
 							self.widget.display()
@@ -193,10 +205,7 @@ class Karma(AppConfig):
 
 					self.current_votes.append(new_vote)
 					await self.calculate_karma()
-
-					map = next((m for m in self.instance.map_manager.maps if m.uid == self.instance.map_manager.current_map.uid), None)
-					if map is not None:
-						map.karma = await self.get_map_karma(self.instance.map_manager.current_map)
+					self.update_map_karma()
 
 					message = '$ff0Successfully voted $fff{}$ff0{}!'.format(text,
 						(' (same as $fff{}$ff0)'.format(text[:2]) if text == '+++' or text == '---' else '')
@@ -206,23 +215,14 @@ class Karma(AppConfig):
 						self.widget.display()
 					)
 
-				# Reload map referenced information
-				asyncio.ensure_future(self.load_map_votes(map=self.instance.map_manager.current_map))
-
 	async def get_map_karma(self, map):
-		vote_list = await KarmaModel.objects.execute(KarmaModel.select().where(KarmaModel.map_id == map.get_id()))
+		return (await self.get_map_stats([map]))[map.get_id()]
 
-		total_score = 0.0
-		for vote in vote_list:
-			if vote.expanded_score is not None:
-				total_score += vote.expanded_score
-			else:
-				total_score += vote.score
-
-		return dict(
-			vote_count=len(vote_list),
-			map_karma=total_score
-		)
+	def update_map_karma(self):
+		# Update the karma stats of the current map from the votes of the current map.
+		map = self.instance.map_manager.maps.get(self.instance.map_manager.current_map.uid)
+		if map is not None:
+			map.karma = dict(vote_count=len(self.current_votes), map_karma=self.current_karma)
 
 	async def get_votes_list(self, map):
 		vote_list = await KarmaModel.objects.execute(KarmaModel.select(KarmaModel, Player).join(Player).where(KarmaModel.map_id == map.get_id()))
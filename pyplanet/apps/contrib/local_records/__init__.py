@@ -1,5 +1,7 @@
 import asyncio
 
+from peewee import fn
+
 from pyplanet.apps.config import AppConfig
 from pyplanet.apps.contrib.local_records.views import LocalRecordsListView, LocalRecordsWidget
 from pyplanet.apps.core.maniaplanet.models import Player
@@ -8,9 +10,10 @@ from pyplanet.contrib.setting import Setting
 
 from pyplanet.apps.core.trackmania import callbacks as tm_signals
 from pyplanet.apps.core.maniaplanet import callbacks as mp_signals
+from pyplanet.contrib.map.signals import playlist_changed
 
 from pyplanet.utils import times
-from pyplanet.utils.log import handle_exception
+from pyplanet.utils.leaderboard import Leaderboard
 
 from .models import LocalRecord
 
@@ -23,7 +26,7 @@ class LocalRecords(AppConfig):
 		super().__init__(*args, **kwargs)
 		self.lock = asyncio.Lock()
 
-		self.current_records = []
+		self.current_records = Leaderboard(login=lambda record: record.player.login)
 		self.widget = None
 
 		self.setting_chat_announce = Setting(
@@ -52,6 +55,7 @@ class LocalRecords(AppConfig):
 		self.context.signals.listen(mp_signals.map.map_begin, self.map_begin)
 		self.context.signals.listen(tm_signals.finish, self.player_finish)
 		self.context.signals.listen(mp_signals.player.player_connect, self.player_connect)
+		self.context.signals.listen(playlist_changed, self.playlist_changed)
 
 		# Register settings
 		await self.context.setting.register(self.setting_chat_announce, self.setting_record_limit)
@@ -61,6 +65,7 @@ class LocalRecords(AppConfig):
 
 		# Load initial data.
 		await self.refresh_locals()
+		await self.load_map_locals()
 		await self.chat_current_record()
 
 		if self.widget is None:
@@ -68,51 +73,72 @@ class LocalRecords(AppConfig):
 
 		await self.widget.display()
 
-	async def load_map_locals(self, map=None):
+	async def load_map_locals(self, map=None, maps=None):
+		"""
+		Load the local record stats (``map.local``) of the map, the given maps or all maps of the playlist.
+
+		:param map: Map instance.
+		:param maps: Map instances.
+		"""
 		if map:
-			map.local = await self.get_map_record(map)
-		else:
-			maps = {m.id: m for m in self.instance.map_manager.maps}
-			map_locals = dict()
+			maps = [map]
+		elif maps is None:
+			maps = list(self.instance.map_manager.maps)
+
+		stats = await self.get_map_stats(maps)
+		for map_instance in maps:
+			map_instance.local = stats[map_instance.get_id()]
+
+	async def get_map_stats(self, maps, chunk_size=500):
+		"""
+		Get the number of records and the first record of the maps. The counts and best scores are aggregated by the
+		database, only the first records are fetched.
+
+		:param maps: Map instances.
+		:param chunk_size: Number of maps per query.
+		:return: Dictionary with the map id as key and a dictionary with the record_count and first_record as value.
+		:rtype: dict
+		"""
+		map_ids = [m.get_id() for m in maps]
+		stats = {map_id: dict(record_count=0, first_record=None) for map_id in map_ids}
 
-			# Fetch all.
+		for start in range(0, len(map_ids), chunk_size):
+			best_scores = dict()
 			rows = await LocalRecord.execute(
-				LocalRecord.select().where(
-					LocalRecord.map_id << list(maps.keys())
-				)
+				LocalRecord.select(LocalRecord.map, fn.COUNT(LocalRecord.id), fn.MIN(LocalRecord.score))
+					.where(LocalRecord.map << map_ids[start:start + chunk_size])
+					.group_by(LocalRecord.map)
+					.tuples()
 			)
+			for map_id, record_count, best_score in rows:
+				stats[map_id]['record_count'] = record_count
+				best_scores[map_id] = best_score
+			if not best_scores:
+				continue
+
+			# Fetch the first records, the oldest record wins when several records have the best score.
+			records = await LocalRecord.execute(
+				LocalRecord.select(LocalRecord, Player)
+					.join(Player)
+					.where(LocalRecord.map << list(best_scores))
+					.where(LocalRecord.score << list(set(best_scores.values())))
+					.order_by(LocalRecord.id.asc())
+			)
+			for record in records:
+				if record.score == best_scores[record.map_id] and stats[record.map_id]['first_record'] is None:
+					stats[record.map_id]['first_record'] = record
 
-			# Group by map.
-			for row in rows:
-				if row.map_id not in map_locals:
-					map_locals[row.map_id] = list()
-				map_locals[row.map_id].append(row)
-
-			# Map local stats.
-			for map_id, local_list in map_locals.items():
-				maps[map_id].local = dict(
-					record_count=len(local_list),
-					first_record=local_list[0] if len(local_list) > 0 else None
-				)
+		return stats
 
-			del map_locals
-			del maps
+	async def playlist_changed(self, added, **kwargs):
+		# Only load the local stats of the maps that are new to the playlist.
+		if added:
+			await self.load_map_locals(maps=added)
 
 	async def get_map_record(self, map=None):
 		if not map:
 			map = self.instance.map_manager.current_map
-
-		record_list = await LocalRecord.objects.execute(
-			LocalRecord.select(LocalRecord, Player)
-				.join(Player)
-				.where(LocalRecord.map_id == map.get_id())
-				.order_by(LocalRecord.score.asc())
-		)
-
-		return {
-			'record_count': len(record_list),
-			'first_record': record_list[0] if len(record_list) > 0 else None
-		}
+		return (await self.get_map_stats([map]))[map.get_id()]
 
 	async def get_player_record_for_map(self, map, player):
 		record_list = await LocalRecord.objects.execute(
@@ -158,7 +184,7 @@ class LocalRecords(AppConfig):
 				.where(LocalRecord.map_id == self.instance.map_manager.current_map.get_id())
 				.order_by(LocalRecord.score.asc())
 		)
-		self.current_records = list(record_list)
+		self.current_records.reset(record_list)
 
 	async def show_records_list(self, player, data = None, **kwargs):
 		"""
@@ -198,20 +224,19 @@ class LocalRecords(AppConfig):
 		record_limit = await self.setting_record_limit.get_value()
 		chat_announce = await self.setting_chat_announce.get_value()
 		async with self.lock:
-			current_records = [x for x in self.current_records if x.player.login == player.login]
+			current_record = self.current_records.get(player.login)
 			score = lap_time
 
 			previous_index = None
 			previous_time = None
 
-			if len(current_records) > 0:
-				current_record = current_records[0]
+			if current_record is not None:
 				if score > current_record.score:
 					# No improvement, ignore
 					return
 
 				# Temporary make index + time local for the messages.
-				previous_index = self.current_records.index(current_record) + 1
+				previous_index = self.current_records.rank(player.login)
 				previous_time = current_record.score
 
 				# If equal, only show message.
@@ -235,18 +260,16 @@ class LocalRecords(AppConfig):
 			current_record.score = score
 			current_record.checkpoints = ','.join([str(cp) for cp in cps])
 
-			# Add to list when it's a new record!
-			if current_record.get_id() is None:
-				self.current_records.append(current_record)
-
-			# (Re)sort the record list.
-			self.current_records.sort(key=lambda x: x.score)
-			new_index = self.current_records.index(current_record) + 1
+			# Add the new record or move the improved record, an equalled record keeps its rank.
+			if score != previous_time:
+				new_index = self.current_records.submit(current_record)
+			else:
+				new_index = previous_index
 
-			if new_index == 1:
-				map = next((m for m in self.instance.map_manager.maps if m.uid == self.instance.map_manager.current_map.uid), None)
-				if map is not None:
-					map.local = {'record_count': len(self.current_records), 'first_record': current_record}
+			# Update the local stats of the map, the record list contains all records of the map.
+			map = self.instance.map_manager.maps.get(self.instance.map_manager.current_map.uid)
+			if map is not None:
+				map.local = {'record_count': len(self.current_records), 'first_record': self.current_records[0]}
 
 		# Prepare messages.
 		if previous_index is not None and (record_limit == 0 or previous_index <= record_limit):
@@ -265,15 +288,8 @@ class LocalRecords(AppConfig):
 				player.nickname, new_index, times.format_time(score)
 			)
 
-		# Save to database (but don't wait for it).
-		try:
-			asyncio.ensure_future(current_record.save())
-		except Exception as e:
-			# To investigate #283.
-			handle_exception(e, __name__, 'player_finish', extra_data={
-				'own_records': current_records,
-				'own_record': current_record
-			})
+		# Save to database (but don't wait for it), the write-behind queue writes the records in batches and in order.
+		self.instance.db.write_behind.save(current_record)
 
 		if self.widget is None:
 			self.widget = LocalRecordsWidget(self)
@@ -286,13 +302,10 @@ class LocalRecords(AppConfig):
 				coros.append(self.instance.chat(message, player))
 		await asyncio.gather(*coros)
 
-		# Reload map referenced information
-		asyncio.ensure_future(self.load_map_locals(map=self.instance.map_manager.current_map))
-
 	async def chat_current_record(self):
 		record_limit = await self.setting_record_limit.get_value()
 		if record_limit > 0:
-			records_amount = len(self.current_records[:record_limit])
+			records_amount = min(len(self.current_records), record_limit)
 		else:
 			records_amount = len(self.current_records)
 
@@ -311,16 +324,11 @@ class LocalRecords(AppConfig):
 			await self.instance.chat(message)
 
 	def chat_personal_record(self, player, record_limit):
-		if record_limit > 0:
-			records = self.current_records[:record_limit]
-		else:
-			records = self.current_records
-
-		record = [x for x in records if x.player_id == player.get_id()]
+		rank = self.current_records.rank(player.login)
 
-		if len(record) > 0:
+		if rank is not None and (record_limit <= 0 or rank <= record_limit):
 			message = '$0f3You currently hold the $fff{}.$0f3 Local Record: $fff\uf017 {}'.format(
-				self.current_records.index(record[0]) + 1, times.format_time(record[0].score)
+				rank, times.format_time(self.current_records[rank - 1].score)
 			)
 			return self.instance.chat(message, player)
 		else:
@@ -338,7 +346,7 @@ class LocalRecords(AppConfig):
 		:return:
 		"""
 		async with self.lock:
-			record = [x for x in self.current_records if x.player_id == player.get_id()]
+			record = self.current_records.get(player.login)
 
 			if data.record > len(self.current_records):
 				message = '$0b3There is no record for rank {}!'.format(data.record)
@@ -346,10 +354,10 @@ class LocalRecords(AppConfig):
 
 			compare_record = self.current_records[data.record - 1]
 
-			record_index = self.current_records.index(record[0]) if len(record) else None
-			compare_index = self.current_records.index(compare_record)
+			record_index = self.current_records.rank(player.login) - 1 if record else None
+			compare_index = data.record - 1
 
 		view = views.LocalRecordCpCompareListView(
-			self, record[0] if len(record) else None, record_index, compare_record, compare_index
+			self, record, record_index, compare_record, compare_index
 		)
 		await view.display(player)
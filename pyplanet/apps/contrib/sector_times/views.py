@@ -39,9 +39,7 @@ class SectorTimesWidget(WidgetView):
 				pass
 		if 'local_records' in self.app.instance.apps.apps:
 			try:
-				local_record = [x for x in self.app.instance.apps.apps['local_records'].current_records if x.player.login == login]
-				if len(local_record) > 0:
-					local_record = local_record[0]
+				local_record = self.app.instance.apps.apps['local_records'].current_records.get(login)
 			except:
 				pass
 
@@ -106,9 +104,7 @@ class CheckpointDiffWidget(WidgetView):
 				pass
 		if 'local_records' in self.app.instance.apps.apps:
 			try:
-				local_record = [x for x in self.app.instance.apps.apps['local_records'].current_records if x.player.login == login]
-				if len(local_record) > 0:
-					local_record = local_record[0]
+				local_record = self.app.instance.apps.apps['local_records'].current_records.get(login)
 			except:
 				pass
 
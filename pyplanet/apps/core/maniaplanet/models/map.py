@@ -5,6 +5,7 @@ import logging
 
 from peewee import *
 from pyplanet.core.db import TimedModel
+from pyplanet.utils.cache import IdentityMap
 
 
 class Map(TimedModel):
@@ -87,7 +88,11 @@ class Map(TimedModel):
 	it's been added by another method (manual upload or external software).
 	"""
 
-	CACHE = dict()
+	CACHE = IdentityMap(max_size=500, ttl=3600)
+	"""
+	Identity map of the map instances. The maps of the playlist are pinned, other maps are evicted after an hour or when
+	there are more than 500 of them.
+	"""
 
 	def __str__(self):
 		return '\'{}\' by {} ({})'.format(self.name, self.author_login, self.uid)
@@ -112,8 +117,9 @@ class Map(TimedModel):
 		:return: Map instance
 		:rtype: pyplanet.apps.core.maniaplanet.models.map.Map
 		"""
-		if uid in cls.CACHE:
-			return cls.CACHE[uid]
+		instance = cls.CACHE.get(uid)
+		if instance is not None:
+			return instance
 		return await cls.get(uid=uid)
 
 	@classmethod
@@ -3,6 +3,7 @@ Maniaplanet Core Models. This models are used in several apps and should be cons
 """
 from peewee import *
 from pyplanet.core.db import TimedModel
+from pyplanet.utils.cache import IdentityMap
 from pyplanet.utils.functional import empty
 
 
@@ -59,7 +60,11 @@ class Player(TimedModel):
 	the name of the level.
 	"""
 
-	CACHE = dict()
+	CACHE = IdentityMap(max_size=1000, ttl=3600)
+	"""
+	Identity map of the player instances. Online players are pinned, offline players are evicted after an hour or when
+	there are more than 1000 of them.
+	"""
 
 	def __str__(self):
 		return self.login
@@ -102,8 +107,9 @@ class Player(TimedModel):
 		:return: Player instance
 		:rtype: pyplanet.apps.core.maniaplanet.models.player.Player
 		"""
-		if login in cls.CACHE:
-			return cls.CACHE[login]
+		player = cls.CACHE.get(login)
+		if player is not None:
+			return player
 		try:
 			cls.CACHE[login] = player = await cls.get(login=login)
 		except DoesNotExist:
@@ -4,6 +4,7 @@ Dev app component.
 import json
 
 from pyplanet.contrib.command import Command
+from pyplanet.core.events import Signal
 
 from .views.call import CallMenuView
 
@@ -29,7 +30,11 @@ class DevComponent:
 		await self.app.instance.command_manager.register(
 			Command('call', self.admin_call, perms='core.pyplanet:execute_calls', admin=True,
 					description='Allows execution of API calls on the dedicated server.')
-				.add_param('search', type=str, required=False)
+				.add_param('search', type=str, required=False),
+			Command('signals', self.admin_signals, perms='core.pyplanet:execute_calls', admin=True,
+					description='Shows the signal receivers that took the most time (requires SIGNAL_PROFILING).')
+				.add_param('order', type=str, required=False, default='total',
+						   help='Order by total, max, average, calls or exceptions. Use reset to clear the stats.'),
 		)
 
 	async def admin_call(self, player, data, **kwargs):
@@ -40,3 +45,29 @@ class DevComponent:
 			view.search_text = data.search
 		await view.display()
 		return
+
+	async def admin_signals(self, player, data, **kwargs):
+		profiler = Signal.profiler
+		if profiler is None:
+			return await self.app.instance.chat('$f00Signal profiling is disabled, enable SIGNAL_PROFILING first!', player)
+
+		if data.order == 'reset':
+			profiler.reset()
+			return await self.app.instance.chat('$ff0Signal profiling stats have been reset.', player)
+		if data.order not in ('total', 'max', 'average', 'calls', 'exceptions'):
+			return await self.app.instance.chat('$f00Unknown order \'{}\'!'.format(data.order), player)
+
+		top = profiler.top(limit=5, order_by=data.order)
+		if not top:
+			return await self.app.instance.chat('$ff0No signal receivers have been profiled yet.', player)
+
+		await self.app.instance.gbx.multicall(
+			self.app.instance.chat('$ff0Slowest signal receivers (by {}):'.format(data.order), player),
+			*[self.app.instance.chat(
+				'$fff{receiver}$ff0 on $fff{signal}$ff0: {calls} calls, {total:.2f}s total, {max_ms:.0f}ms max, '
+				'{avg_ms:.1f}ms avg, {exceptions} exceptions'.format(
+					max_ms=entry['max'] * 1000, avg_ms=entry['average'] * 1000, **entry
+				),
+				player
+			) for entry in top]
+		)
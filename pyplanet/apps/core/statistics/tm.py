@@ -37,13 +37,13 @@ class TrackmaniaComponent:
 		)
 
 	async def on_finish(self, player, race_time, lap_time, cps, flow, raw, **kwargs):
-		# Register the score of the player.
-		await Score(
+		# Register the score of the player, written in batches by the write-behind queue.
+		self.app.instance.db.write_behind.insert(Score(
 			player=player,
 			map=self.app.instance.map_manager.current_map,
 			score=race_time,
 			checkpoints=','.join([str(cp) for cp in cps])
-		).save()
+		))
 
 	async def open_stats(self, player, **kwargs):
 		view = StatsDashboardView(self.app, self.app.context.ui, player)
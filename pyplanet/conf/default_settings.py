@@ -132,6 +132,11 @@ LOGGING_REPORTING = 3
 # Enable usage analytics. On by default. (Will be turned off when DEBUG is true!).
 ANALYTICS = True
 
+# Profile the signal receivers (wall time, calls and exceptions). Off by default. Receivers that take longer than the
+# threshold (in seconds) are logged as warnings. The slowest receivers can be listed with the //signals command.
+SIGNAL_PROFILING = False
+SIGNAL_PROFILING_THRESHOLD = 0.1
+
 
 ##########################################
 ################# APPS ###################
@@ -187,6 +192,17 @@ STORAGE = {
 	}
 }
 
+# The event journal mirrors the signals given into append-only files (one JSON line per event) for offline analytics,
+# auditing and replay tooling. The directory is relative to the project root. Files are rotated at MAX_SIZE bytes.
+JOURNAL = {
+	'default': {
+		'DIRECTORY': 'journal',
+		'SIGNALS': [],
+		'MAX_SIZE': 64 * 1024 * 1024,
+		'FLUSH_INTERVAL': 1,
+	}
+}
+
 # Owners are logins of the server owners, the owners always get *ALL* the permissions in the system.
 OWNERS = {
 	'default': []
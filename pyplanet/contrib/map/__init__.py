@@ -1,8 +1,12 @@
 """
 The map contrib will provide map list and information to the apps and core.
 """
+from .catalog import MapCatalog
 from .manager import MapManager
+from .signals import playlist_changed
 
 __all__ = [
+	'MapCatalog',
 	'MapManager',
+	'playlist_changed',
 ]
@@ -0,0 +1,186 @@
+class MapCatalog:
+	"""
+	The map catalog holds the maps of the current playlist, in the order of the playlist of the dedicated server. Maps
+	are indexed by uid, id, file name and MX-id, and by author and environment, so lookups don't scan the playlist.
+	Access it with ``instance.map_manager.maps``.
+
+	The catalog can be used like the set of maps it used to be: iterate over it, use ``len()`` and test ``in`` with a
+	map instance or uid.
+
+	.. code-block:: python
+
+		maps = self.instance.map_manager.maps
+		map_instance = maps.get('uid')
+		map_instance = maps.get_by_file('Campaigns/A01.Map.Gbx')
+		author_maps = maps.by_author('login')
+
+	"""
+
+	def __init__(self, maps=None):
+		"""
+		Initiate the catalog.
+
+		:param maps: Map instances, in playlist order.
+		"""
+		self._by_uid = dict()
+		self._by_id = dict()
+		self._by_file = dict()
+		self._by_mx_id = dict()
+		self._by_author = dict()
+		self._by_environment = dict()
+		self._keys = dict()
+
+		for map_instance in maps or ():
+			self.add(map_instance)
+
+	@staticmethod
+	def _normalize_mx_id(mx_id):
+		return str(mx_id) if mx_id is not None else None
+
+	def add(self, map_instance):
+		"""
+		Add the map to the end of the playlist, or update the indexes of the map when it's already in the catalog.
+
+		:param map_instance: Map instance.
+		:type map_instance: pyplanet.apps.core.maniaplanet.models.Map
+		"""
+		uid = map_instance.uid
+		keys = (
+			map_instance.get_id(), map_instance.file, self._normalize_mx_id(map_instance.mx_id),
+			map_instance.author_login, map_instance.environment,
+		)
+		if uid in self._keys and self._keys[uid] != keys:
+			self._unindex(uid)
+
+		self._by_uid[uid] = map_instance
+		self._keys[uid] = keys
+		for index, key in zip((self._by_id, self._by_file, self._by_mx_id), keys[:3]):
+			if key is not None:
+				index[key] = map_instance
+		for index, key in zip((self._by_author, self._by_environment), keys[3:]):
+			index.setdefault(key, dict())[uid] = map_instance
+
+	def remove(self, map_instance):
+		"""
+		Remove the map from the catalog.
+
+		:param map_instance: Map instance or uid.
+		:return: The removed map instance, None if it wasn't in the catalog.
+		"""
+		uid = getattr(map_instance, 'uid', map_instance)
+		if uid not in self._keys:
+			return None
+		self._unindex(uid)
+		return self._by_uid.pop(uid)
+
+	def _unindex(self, uid):
+		keys = self._keys.pop(uid)
+		for index, key in zip((self._by_id, self._by_file, self._by_mx_id), keys[:3]):
+			if key is not None and getattr(index.get(key), 'uid', None) == uid:
+				del index[key]
+		for index, key in zip((self._by_author, self._by_environment), keys[3:]):
+			group = index.get(key)
+			if group is not None:
+				group.pop(uid, None)
+				if not group:
+					del index[key]
+
+	def replace(self, maps):
+		"""
+		Replace all the maps of the catalog.
+
+		:param maps: Map instances, in playlist order.
+		"""
+		self.clear()
+		for map_instance in maps:
+			self.add(map_instance)
+
+	def clear(self):
+		for index in (
+			self._by_uid, self._by_id, self._by_file, self._by_mx_id, self._by_author, self._by_environment, self._keys
+		):
+			index.clear()
+
+	def get(self, uid, default=None):
+		"""
+		Get map by uid.
+
+		:param uid: Map UID.
+		:param default: Default when the map is not in the playlist.
+		:rtype: pyplanet.apps.core.maniaplanet.models.Map
+		"""
+		return self._by_uid.get(uid, default)
+
+	def get_by_id(self, pk, default=None):
+		"""
+		Get map by primary key.
+
+		:param pk: Primary key of the map.
+		:param default: Default when the map is not in the playlist.
+		:rtype: pyplanet.apps.core.maniaplanet.models.Map
+		"""
+		return self._by_id.get(pk, default)
+
+	def get_by_file(self, file, default=None):
+		"""
+		Get map by the file name on the dedicated server.
+
+		:param file: File name.
+		:param default: Default when the map is not in the playlist.
+		:rtype: pyplanet.apps.core.maniaplanet.models.Map
+		"""
+		return self._by_file.get(file, default)
+
+	def get_by_mx_id(self, mx_id, default=None):
+		"""
+		Get map by MX-id.
+
+		:param mx_id: MX-id (string or integer).
+		:param default: Default when the map is not in the playlist.
+		:rtype: pyplanet.apps.core.maniaplanet.models.Map
+		"""
+		return self._by_mx_id.get(self._normalize_mx_id(mx_id), default)
+
+	def by_author(self, login):
+		"""
+		Get the maps of the author.
+
+		:param login: Login of the author.
+		:return: List of map instances, in playlist order.
+		:rtype: list
+		"""
+		return list(self._by_author.get(login, dict()).values())
+
+	def by_environment(self, environment):
+		"""
+		Get the maps of the environment.
+
+		:param environment: Environment name.
+		:return: List of map instances, in playlist order.
+		:rtype: list
+		"""
+		return list(self._by_environment.get(environment, dict()).values())
+
+	@property
+	def authors(self):
+		return list(self._by_author.keys())
+
+	@property
+	def environments(self):
+		return list(self._by_environment.keys())
+
+	@property
+	def uids(self):
+		return list(self._by_uid.keys())
+
+	def __contains__(self, item):
+		return getattr(item, 'uid', item) in self._by_uid
+
+	def __iter__(self):
+		return iter(list(self._by_uid.values()))
+
+	def __len__(self):
+		return len(self._by_uid)
+
+	def __bool__(self):
+		return bool(self._by_uid)
@@ -10,9 +10,14 @@ from pyplanet.utils.log import handle_exception
 from pyplanet.apps.core.maniaplanet.models import Map
 from pyplanet.conf import settings
 from pyplanet.contrib import CoreContrib
+from pyplanet.contrib.map.catalog import MapCatalog
 from pyplanet.contrib.map.exceptions import MapNotFound, MapException, ModeIncompatible
+from pyplanet.contrib.map.signals import playlist_changed
+from pyplanet.contrib.map.sync import MapListSync
 from pyplanet.core.exceptions import ImproperlyConfigured
 
+logger = logging.getLogger(__name__)
+
 
 class MapManager(CoreContrib):
 	"""
@@ -40,8 +45,9 @@ class MapManager(CoreContrib):
 		# The matchsettings contains the name of the current loaded matchsettings file.
 		self._matchsettings = None
 
-		# The maps contain a list of map instances in the order that are in the current loaded list.
-		self._maps = set()
+		# The maps contain the map instances in the order that are in the current loaded list, indexed by uid, file, etc.
+		self._maps = MapCatalog()
+		self._sync = MapListSync(self)
 
 		# The current map will always be in this variable. The next map will always be here. It will be updated. once
 		# it's updated it should be send to the dedicated to queue the next map.
@@ -94,9 +100,10 @@ class MapManager(CoreContrib):
 		return map_info
 
 	async def handle_playlist_change(self, source, **kwargs):
-		pass
-		# if source and source[2]:
-		# 	return await self.update_list(full_update=True)
+		# Synchronise the list when the dedicated server reports that it has been modified.
+		if isinstance(source, (list, tuple)) and len(source) > 2 and source[2]:
+			return await self.update_list()
+		return list()
 
 	def _extract_mx_id(self, file_name):
 		"""
@@ -131,81 +138,41 @@ class MapManager(CoreContrib):
 			self._original_ta = None
 
 	async def update_list(self, full_update=False, detach_fks=True):
-		raw_list = await self._instance.gbx('GetMapList', -1, 0)
-		updated = list()
+		"""
+		Synchronise the map list with the dedicated server. The map list is fetched page by page and compared with the
+		current catalog, new maps are inserted into the database and changed maps are updated. When the list has changed,
+		the ``contrib.map:playlist_changed`` signal is sent with the difference.
+
+		:param full_update: Kept for backwards compatibility, the list is always compared completely.
+		:param detach_fks: Send the signal in the background instead of waiting for the receivers.
+		:return: List with the map instances that have been added.
+		:rtype: list
+		"""
+		async with self.lock:
+			delta = await self._sync.synchronise(self._maps)
+			if delta:
+				self._pin_maps()
 
-		if full_update:
-			# Query all existing entries from database.
-			maps = list(await Map.execute(
-				Map.select().where(Map.uid << [m['UId'] for m in raw_list])
+		if delta:
+			logger.debug('Map list synchronised: {}'.format(delta))
+			coroutine = playlist_changed.send_robust(dict(
+				added=delta.added, updated=delta.updated, removed=delta.removed, reordered=delta.reordered,
+				maps=self._maps,
 			))
+			if detach_fks:
+				asyncio.ensure_future(coroutine)
+			else:
+				await coroutine
+		return delta.added
 
-			db_uids = [m.uid for m in maps]
-			diff = [x for x in raw_list if x['UId'] not in db_uids]
-
-			# Insert all missing maps into the DB.
-			rows = list()
-			for details in diff:
-				mx_id = self._extract_mx_id(details['FileName'])
-
-				# HACK: Due to a limited map name length of 150 chars, we want to strip it to the maximum possible.
-				# This is a temporary fix and should be better handled in the future.
-				name = details['Name']
-				if len(name) > 150:
-					name = name[:150]
-					logging.getLogger(__name__).warning('Map name is very long, truncating to 150 chars.')
-
-				rows.append(dict(
-					uid=details['UId'], file=details['FileName'], name=name, author_login=details['Author'],
-					environment=details['Environnement'], time_gold=details['GoldTime'], price=details['CopperPrice'],
-					map_type=details['MapType'], map_style=details['MapStyle'], mx_id=mx_id
-				))
-
-			if len(rows) > 0:
-				await Map.execute(Map.insert_many(rows))
-				maps += list(await Map.execute(
-					Map.select().where(Map.uid << [m['uid'] for m in rows])
-				))
-
-			async with self.lock:
-				self._maps = set(maps)
-
-			# Reload locals for all maps.
-			# TODO: Find better way to remove this and handle it on the folders way.
-			coroutines = list()
-			if 'local_records' in self._instance.apps.apps:
-				if detach_fks:
-					asyncio.ensure_future(self._instance.apps.apps['local_records'].load_map_locals())
-				else:
-					coroutines.append(self._instance.apps.apps['local_records'].load_map_locals())
-
-			# Reload karma for all maps.
-			if 'karma' in self._instance.apps.apps:
-				if detach_fks:
-					asyncio.ensure_future(self._instance.apps.apps['karma'].load_map_votes())
-				else:
-					coroutines.append(self._instance.apps.apps['karma'].load_map_votes())
-
-			if coroutines:
-				await asyncio.gather(*coroutines)
-		else:
-			# Only update/insert the changed bits, (not checking for removed maps!!).
-			async with self.lock:
-				for details in raw_list:
-					if not any(m.uid == details['UId'] for m in self._maps):
-						# Detect any MX-id from the filename.
-						mx_id = self._extract_mx_id(details['FileName'])
-
-						# Map not yet in self._maps. Add it.
-						map_instance = await Map.get_or_create_from_info(
-							details['UId'], details['FileName'], details['Name'], details['Author'],
-							environment=details['Environnement'], time_gold=details['GoldTime'],
-							price=details['CopperPrice'], map_type=details['MapType'], map_style=details['MapStyle'],
-							mx_id=mx_id,
-						)
-						self._maps.add(map_instance)
-						updated.append(map_instance)
-		return updated
+	def _pin_maps(self):
+		"""
+		Pin the maps of the playlist in the map cache, they are only evicted when removed from the playlist.
+		"""
+		Map.CACHE.pin_only(m.uid for m in self._maps)
+		for map_instance in self._maps:
+			if map_instance.uid not in Map.CACHE:
+				Map.CACHE[map_instance.uid] = map_instance
 
 	async def get_map(self, uid=None):
 		"""
@@ -281,10 +248,10 @@ class MapManager(CoreContrib):
 	@property
 	def maps(self):
 		"""
-		Get the maps that are currently loaded on the server. The list should contain model instances of the currently
-		loaded matchsettings. This list should be up-to-date.
+		Get the maps that are currently loaded on the server. The catalog contains model instances of the currently
+		loaded matchsettings, in playlist order. This catalog should be up-to-date.
 
-		:rtype: list
+		:rtype: pyplanet.contrib.map.catalog.MapCatalog
 		"""
 		return self._maps
 
@@ -309,10 +276,7 @@ class MapManager(CoreContrib):
 		:param uid: UID String
 		:return: Boolean, True if it's in our current playlist (match settings in our session).
 		"""
-		for map_instance in self.maps:
-			if map_instance.uid == uid:
-				return True
-		return False
+		return uid in self._maps
 
 	async def add_map(self, filename, insert=True, save_matchsettings=True):
 		"""
@@ -391,13 +355,7 @@ class MapManager(CoreContrib):
 		try:
 			success = await self._instance.gbx('RemoveMap', map)
 			if success:
-				the_map = None
-				for m in self._maps:
-					if m.file == map:
-						the_map = m
-						break
-				if the_map:
-					self._maps.remove(the_map)
+				await self.update_list()
 		except Fault as e:
 			if 'unknown' in e.faultString:
 				raise MapNotFound('Dedicated can\'t find map. Already removed?')
@@ -0,0 +1,25 @@
+"""
+This file contains the contrib map signals, related to the map list of the server.
+"""
+from pyplanet.core.events import Signal as _Signal
+from pyplanet.core.events.manager import SignalManager as _SignalManager
+
+
+playlist_changed = _Signal(
+	code='playlist_changed',
+	namespace='contrib.map',
+)
+"""
+Is called once after the map list has been synchronised with the dedicated server and it changed, with the difference
+between the previous and the new map list:
+
+:param added: Map instances that have been added to the playlist.
+:param updated: Map instances of the playlist of which the details (file, name, etc) have been changed.
+:param removed: Map instances that have been removed from the playlist.
+:param reordered: Has the order of the playlist been changed.
+:param maps: The map catalog, ``instance.map_manager.maps``.
+"""
+
+_SignalManager.register_signal([
+	playlist_changed
+])
@@ -0,0 +1,194 @@
+"""
+Incremental synchronisation of the map list of the dedicated server with the map catalog and the database.
+"""
+import datetime
+import logging
+
+from xmlrpc.client import Fault
+from playhouse.shortcuts import case
+
+from pyplanet.apps.core.maniaplanet.models import Map
+
+logger = logging.getLogger(__name__)
+
+
+class PlaylistDelta:
+	"""
+	Difference between the previous and the new map list.
+	"""
+
+	def __init__(self, added=None, updated=None, removed=None, reordered=False):
+		self.added = added or list()
+		self.updated = updated or list()
+		self.removed = removed or list()
+		self.reordered = reordered
+
+	def __bool__(self):
+		return bool(self.added or self.updated or self.removed or self.reordered)
+
+	def __str__(self):
+		return '{} added, {} updated, {} removed{}'.format(
+			len(self.added), len(self.updated), len(self.removed), ', reordered' if self.reordered else ''
+		)
+
+
+class MapListSync:
+	"""
+	The map list synchronisation pages through the map list of the dedicated server and compares it with the catalog by
+	uid. New maps are inserted, changed maps are updated with bulk queries, and the catalog is updated to the order of
+	the dedicated server. Only the maps that are new to the catalog are fetched from the database.
+	"""
+
+	FIELDS = (
+		('FileName', 'file'), ('Name', 'name'), ('Author', 'author_login'), ('Environnement', 'environment'),
+		('GoldTime', 'time_gold'), ('CopperPrice', 'price'), ('MapType', 'map_type'), ('MapStyle', 'map_style'),
+	)
+	"""
+	Fields of the map list of the dedicated server and the model fields they are stored in.
+	"""
+
+	def __init__(self, manager, page_size=500):
+		"""
+		Initiate the synchronisation.
+
+		:param manager: Map manager.
+		:param page_size: Number of maps to fetch per call and per query.
+		:type manager: pyplanet.contrib.map.manager.MapManager
+		"""
+		self.manager = manager
+		self.page_size = page_size
+
+	async def fetch(self):
+		"""
+		Fetch the map list of the dedicated server, page by page.
+
+		:return: List of map details, in playlist order.
+		:rtype: list
+		"""
+		raw_list = list()
+		while True:
+			try:
+				page = await self.manager._instance.gbx('GetMapList', self.page_size, len(raw_list))
+			except Fault:
+				# The dedicated server raises when starting after the last map.
+				if raw_list:
+					break
+				raise
+			raw_list.extend(page or ())
+			if not page or len(page) < self.page_size:
+				break
+		return raw_list
+
+	def values(self, details):
+		"""
+		Get the model values from the details of the dedicated server.
+
+		:param details: Map details from the map list.
+		:return: Dictionary with the model values.
+		:rtype: dict
+		"""
+		values = {field: details.get(key) for key, field in self.FIELDS}
+		# HACK: Due to a limited map name length of 150 chars, we want to strip it to the maximum possible.
+		if values['name'] and len(values['name']) > 150:
+			values['name'] = values['name'][:150]
+		# Always set the MX-id, the rows of one insert_many need the same columns.
+		mx_id = self.manager._extract_mx_id(values['file'])
+		values['mx_id'] = int(mx_id) if mx_id is not None else None
+		return values
+
+	def chunks(self, items):
+		items = list(items)
+		for start in range(0, len(items), self.page_size):
+			yield items[start:start + self.page_size]
+
+	async def synchronise(self, catalog, raw_list=None):
+		"""
+		Synchronise the catalog and the database with the map list of the dedicated server.
+
+		:param catalog: Map catalog to update.
+		:param raw_list: Map list of the dedicated server, fetched when not given.
+		:type catalog: pyplanet.contrib.map.catalog.MapCatalog
+		:return: Difference between the previous and the new catalog.
+		:rtype: pyplanet.contrib.map.sync.PlaylistDelta
+		"""
+		if raw_list is None:
+			raw_list = await self.fetch()
+
+		details = dict()
+		for item in raw_list:
+			details.setdefault(item['UId'], self.values(item))
+		previous = catalog.uids
+
+		delta = PlaylistDelta()
+		delta.removed = [catalog.get(uid) for uid in previous if uid not in details]
+
+		# Get the new maps from the cache or the database, insert the unknown maps.
+		instances = dict()
+		new_uids = [uid for uid in details if uid not in catalog]
+		for uid in new_uids:
+			cached = Map.CACHE.get(uid)
+			if cached is not None:
+				instances[uid] = cached
+		missing = [uid for uid in new_uids if uid not in instances]
+		for chunk in self.chunks(missing):
+			for map_instance in await Map.execute(Map.select().where(Map.uid << chunk)):
+				instances[map_instance.uid] = map_instance
+
+		rows = [dict(uid=uid, **details[uid]) for uid in missing if uid not in instances]
+		if rows:
+			now = datetime.datetime.now()
+			for chunk in self.chunks(rows):
+				await Map.execute(Map.insert_many([dict(row, created_at=now, updated_at=now) for row in chunk]))
+			for chunk in self.chunks(row['uid'] for row in rows):
+				for map_instance in await Map.execute(Map.select().where(Map.uid << chunk)):
+					instances[map_instance.uid] = map_instance
+			logger.debug('Inserted {} new maps'.format(len(rows)))
+
+		# Update the changed details of the known maps.
+		changes = dict()
+		for uid, values in details.items():
+			map_instance = instances.get(uid) or catalog.get(uid)
+			if map_instance is None:
+				continue
+			changed = {
+				field: value for field, value in values.items()
+				if value is not None and getattr(map_instance, field) != value
+			}
+			if changed:
+				changes[uid] = changed
+				for field, value in changed.items():
+					setattr(map_instance, field, value)
+				if uid in catalog:
+					delta.updated.append(map_instance)
+		if changes:
+			await self.update(changes)
+
+		# Apply to the catalog, in the order of the dedicated server.
+		delta.added = [instances[uid] for uid in new_uids if uid in instances]
+		order = [uid for uid in details if uid in instances or uid in catalog]
+		if delta.added or delta.removed or order != previous:
+			delta.reordered = [uid for uid in order if uid in previous] != [uid for uid in previous if uid in details]
+			catalog.replace([instances.get(uid) or catalog.get(uid) for uid in order])
+		elif delta.updated:
+			for map_instance in delta.updated:
+				catalog.add(map_instance)
+
+		return delta
+
+	async def update(self, changes):
+		"""
+		Update the changed map details with one query per chunk of maps.
+
+		:param changes: Dictionary with the uid and the changed values.
+		:type changes: dict
+		"""
+		now = datetime.datetime.now()
+		for chunk in self.chunks(changes.keys()):
+			fields = {field for uid in chunk for field in changes[uid]}
+			update = {
+				field: case(
+					Map.uid, [(uid, changes[uid][field]) for uid in chunk if field in changes[uid]], getattr(Map, field)
+				)
+				for field in fields
+			}
+			await Map.execute(Map.update(updated_at=now, **update).where(Map.uid << chunk))
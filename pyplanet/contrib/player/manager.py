@@ -1,8 +1,10 @@
 import asyncio
 import datetime
 import logging
+import time
 
 from peewee import DoesNotExist
+from playhouse.shortcuts import case
 
 from pyplanet.apps.core.maniaplanet.models import Player
 from pyplanet.conf import settings
@@ -55,6 +57,11 @@ class PlayerManager(CoreContrib):
 		self._players_count = 0
 		self._spectators_count = 0
 
+		# Futures of the logins that are awaited by get_player, resolved when the player connected.
+		self._arrivals = dict()
+		self._arrival_waiters = dict()
+		self._arrival_stats = dict(waits=0, arrived=0, timeouts=0, total_wait=0., max_wait=0.)
+
 	@property
 	def performance_mode(self):
 		return self._performance_mode
@@ -82,7 +89,7 @@ class PlayerManager(CoreContrib):
 		current playing players are also initiated correctly!
 		"""
 		player_list = await self._instance.gbx('GetPlayerList', -1, 0)
-		await asyncio.gather(*[self.handle_connect(player['Login']) for player in player_list])
+		await self.handle_connect_many([player['Login'] for player in player_list])
 
 		# Load and activate blacklist.
 		try:
@@ -102,18 +109,20 @@ class PlayerManager(CoreContrib):
 		"""
 		# Update player and spectator counters.
 		player_list = await self._instance.gbx('GetPlayerList', -1, 0)
+		logins = [
+			player['Login'] for player in player_list
+			if not (self._instance.game.server_is_dedicated and self._instance.game.server_player_login == player['Login'])
+		]
+		infos = await self._instance.gbx.multicall(*[
+			self._instance.gbx('GetDetailedPlayerInfo', login) for login in logins
+		])
 
 		total = 0
 		specs = 0
 		players = 0
 
-		for player in player_list:
-			if self._instance.game.server_is_dedicated and self._instance.game.server_player_login == player['Login']:
-				continue
-
-			try:
-				info = await self._instance.gbx('GetDetailedPlayerInfo', player['Login'])
-			except:
+		for info in infos:
+			if not isinstance(info, dict):
 				# Player has left during this time.
 				continue
 
@@ -145,6 +154,7 @@ class PlayerManager(CoreContrib):
 		except:
 			# Most likely too late, did disconnect directly after connecting..
 			# See #126
+			self._arrived(login, None)
 			return
 		ip, _, port = info['IPAddress'].rpartition(':')
 		is_owner = login in settings.OWNERS[self._instance.process_name]
@@ -167,6 +177,97 @@ class PlayerManager(CoreContrib):
 				level=Player.LEVEL_MASTER if is_owner else Player.LEVEL_PLAYER,
 			)
 
+		await self._set_online(player, info)
+		self._arrived(login, player)
+		self.performance_mode = len(self._online) >= await performance_mode.get_value()
+
+		return player
+
+	async def handle_connect_many(self, logins):
+		"""
+		Handle the connection of several players at once, like the players that are online when starting. The details of
+		all the players are fetched in one multicall, the players are fetched, updated and inserted with bulk queries.
+
+		:param logins: Logins, received from dedicated.
+		:return: Database Player instances of the players that are (still) connected.
+		:rtype: list
+		"""
+		if self._instance.game.server_is_dedicated:
+			logins = [login for login in logins if login != self._instance.game.server_player_login]
+		if not logins:
+			return list()
+
+		results = await self._instance.gbx.multicall(*[
+			self._instance.gbx('GetDetailedPlayerInfo', login) for login in logins
+		])
+		# Players that did disconnect directly (see #126) result in faults.
+		infos = {login: info for login, info in zip(logins, results) if isinstance(info, dict)}
+		if not infos:
+			return list()
+
+		now = datetime.datetime.now()
+		owners = settings.OWNERS[self._instance.process_name]
+		ips = {login: info['IPAddress'].rpartition(':')[0] for login, info in infos.items()}
+
+		# Update the known players with one query.
+		known = {
+			player.login: player for player in await Player.execute(Player.select().where(Player.login << list(infos)))
+		}
+		if known:
+			update = dict(
+				nickname=case(Player.login, [(login, infos[login]['NickName']) for login in known]),
+				last_ip=case(Player.login, [(login, ips[login]) for login in known]),
+				last_seen=now, updated_at=now,
+			)
+			if any(login in owners for login in known):
+				update['level'] = case(
+					Player.login, [(login, Player.LEVEL_MASTER) for login in known if login in owners], Player.level
+				)
+			await Player.execute(Player.update(**update).where(Player.login << list(known)))
+
+		# Insert the unknown players with one query.
+		rows = [
+			dict(
+				login=login, nickname=info['NickName'], last_ip=ips[login], last_seen=now, created_at=now, updated_at=now,
+				level=Player.LEVEL_MASTER if login in owners else Player.LEVEL_PLAYER,
+			)
+			for login, info in infos.items() if login not in known
+		]
+		if rows:
+			await Player.execute(Player.insert_many(rows))
+			known.update({
+				player.login: player
+				for player in await Player.execute(Player.select().where(Player.login << [row['login'] for row in rows]))
+			})
+
+		players = list()
+		for login, info in infos.items():
+			if login not in known:
+				continue
+
+			# Keep the cached instance (and its flow) when there is one.
+			player = Player.CACHE.get(login, known[login])
+			player.nickname = info['NickName']
+			player.last_ip = ips[login]
+			player.last_seen = now
+			if login in owners:
+				player.level = Player.LEVEL_MASTER
+			Player.CACHE[login] = player
+
+			await self._set_online(player, info)
+			self._arrived(login, player)
+			players.append(player)
+
+		self.performance_mode = len(self._online) >= await performance_mode.get_value()
+		return players
+
+	async def _set_online(self, player, info):
+		"""
+		Mark the player online, set the flow state from the detailed player info and update the counters.
+
+		:param player: Player instance.
+		:param info: Detailed player info struct.
+		"""
 		# Set the join time.
 		player.flow.joined_at = datetime.datetime.now()
 
@@ -184,11 +285,10 @@ class PlayerManager(CoreContrib):
 			else:
 				self._players_count += 1
 
+		# Online players are never evicted from the cache.
+		Player.CACHE.pin(player.login)
 		self._online.add(player)
-		self._online_logins.add(login)
-		self.performance_mode = len(self._online) >= await performance_mode.get_value()
-
-		return player
+		self._online_logins.add(player.login)
 
 	async def handle_info_change(self, player, is_spectator, is_temp_spectator, is_pure_spectator, target, team_id, **kwargs):
 		if not player:
@@ -260,10 +360,7 @@ class PlayerManager(CoreContrib):
 			time_on_server = datetime.datetime.now() - player.flow.joined_at
 			player.total_playtime += int(time_on_server.total_seconds())
 
-		try:
-			del Player.CACHE[login]
-		except:
-			pass
+		Player.CACHE.unpin(login)
 		player.last_seen = datetime.datetime.now()
 		await player.save()
 
@@ -275,13 +372,14 @@ class PlayerManager(CoreContrib):
 
 		return player
 
-	async def get_player(self, login=None, pk=None, lock=True):
+	async def get_player(self, login=None, pk=None, lock=True, timeout=4):
 		"""
 		Get player by login or primary key.
 
 		:param login: Login.
 		:param pk: Primary Key identifier.
-		:param lock: Lock for a sec when receiving.
+		:param lock: Wait for the player to connect when the login isn't known (yet).
+		:param timeout: Seconds to wait for the player to connect.
 		:return: Player or exception if not found
 		:rtype: pyplanet.apps.core.maniaplanet.models.Player
 		"""
@@ -293,11 +391,67 @@ class PlayerManager(CoreContrib):
 			else:
 				raise PlayerNotFound('Player not found.')
 		except DoesNotExist:
-			if lock:
-				await asyncio.sleep(4)
-				return await self.get_player(login=login, pk=pk, lock=False)
-			else:
-				raise PlayerNotFound('Player not found.')
+			if lock and login:
+				player = await self.wait_for_player(login, timeout=timeout)
+				if player:
+					return player
+			raise PlayerNotFound('Player not found.')
+
+	async def wait_for_player(self, login, timeout=4):
+		"""
+		Wait till the player with the login given is connected and saved in the database.
+
+		:param login: Login.
+		:param timeout: Seconds to wait.
+		:return: Player instance or None when the player didn't arrive in time.
+		:rtype: pyplanet.apps.core.maniaplanet.models.Player
+		"""
+		future = self._arrivals.get(login)
+		if future is None:
+			future = self._arrivals[login] = asyncio.get_event_loop().create_future()
+		self._arrival_waiters[login] = self._arrival_waiters.get(login, 0) + 1
+
+		# The player could have been saved while we were querying the database.
+		if login in Player.CACHE:
+			self._arrived(login, Player.CACHE[login])
+
+		started = time.perf_counter()
+		try:
+			return await asyncio.wait_for(asyncio.shield(future), timeout)
+		except asyncio.TimeoutError:
+			self._arrival_stats['timeouts'] += 1
+			return None
+		finally:
+			# The last waiter cleans up the future of a player that didn't arrive.
+			waiters = self._arrival_waiters.pop(login, 1) - 1
+			if waiters > 0:
+				self._arrival_waiters[login] = waiters
+			elif self._arrivals.get(login) is future:
+				del self._arrivals[login]
+				future.cancel()
+			waited = time.perf_counter() - started
+			self._arrival_stats['waits'] += 1
+			self._arrival_stats['total_wait'] += waited
+			self._arrival_stats['max_wait'] = max(self._arrival_stats['max_wait'], waited)
+
+	def _arrived(self, login, player):
+		future = self._arrivals.pop(login, None)
+		if future is not None and not future.done():
+			self._arrival_stats['arrived'] += 1
+			future.set_result(player)
+
+	@property
+	def arrival_stats(self):
+		"""
+		Statistics of waiting on connecting players in :meth:`get_player`. Times are in seconds.
+
+		:return: Dictionary with the number of waits, arrived and timed out players and the average and max waiting time.
+		:rtype: dict
+		"""
+		stats = dict(self._arrival_stats)
+		stats['avg_wait'] = stats['total_wait'] / stats['waits'] if stats['waits'] else 0.
+		stats['pending'] = len(self._arrivals)
+		return stats
 
 	async def get_player_by_id(self, identifier):
 		"""
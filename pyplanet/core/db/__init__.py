@@ -2,6 +2,7 @@ from .database import Database, Proxy
 from .registry import Registry
 from .migrator import Migrator
 from .model import Model, TimedModel
+from .persister import WriteBehind
 
 __all__ = [
 	'Database',
@@ -10,4 +11,5 @@ __all__ = [
 	'Migrator',
 	'Model',
 	'TimedModel',
+	'WriteBehind',
 ]
@@ -11,6 +11,7 @@ import peewee_async
 from pyplanet.core.exceptions import ImproperlyConfigured
 from .registry import Registry
 from .migrator import Migrator
+from .persister import WriteBehind
 
 Proxy = peewee.Proxy()
 
@@ -30,6 +31,7 @@ class Database:
 		self.instance = instance
 		self.migrator = Migrator(self.instance, self)
 		self.registry = Registry(self.instance, self)
+		self.write_behind = WriteBehind(self.instance.loop)
 		self.objects = peewee_async.Manager(self.engine, loop=self.instance.loop)
 
 		# Don't allow any sync code.
@@ -57,7 +59,9 @@ class Database:
 		except Exception as e:
 			raise ImproperlyConfigured('Database configuration isn\'t complete or engine could\'t be found!')
 
-		return cls(engine, instance, db_name, **db_options)
+		database = cls(engine, instance, db_name, **db_options)
+		database.write_behind = WriteBehind.create_from_settings(instance, conf.get('WRITE_BEHIND', dict()))
+		return database
 
 	@contextlib.contextmanager
 	def __fake_allow_sync(self):
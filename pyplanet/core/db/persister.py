@@ -0,0 +1,290 @@
+"""
+Write-behind persistence of model instances, written to the database in batches.
+"""
+import asyncio
+import datetime
+import logging
+
+from collections import OrderedDict
+from playhouse.shortcuts import case
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehind:
+	"""
+	The write-behind queue collects model inserts and saves and writes them in batches, in the background. Use it for
+	writes that happen in bursts and don't need to be awaited, like the finishes at the end of a round. Access it with
+	``instance.db.write_behind``.
+
+	* :meth:`insert` queues a new row. The rows are written with one ``insert_many`` query per model and batch, the
+	  instance doesn't get its primary key.
+	* :meth:`save` queues saving an instance. Instances without primary key are inserted one by one (so they get their
+	  primary key), the changed fields of existing rows are written with one ``UPDATE`` per model and batch.
+
+	An instance that is saved again before it has been written is written once, with its latest values. Failed batches
+	are retried first on the next flush, up to ``max_retries`` times, the later writes of the model wait for the retry. The queue is written when ``batch_size`` writes are
+	waiting, every ``flush_interval`` seconds and when stopping.
+
+	Configure it with the optional ``WRITE_BEHIND`` key (``BATCH_SIZE``, ``FLUSH_INTERVAL``, ``MAX_RETRIES``) of the
+	``DATABASES`` setting.
+	"""
+
+	def __init__(self, loop=None, batch_size=500, flush_interval=1., max_retries=5):
+		"""
+		Initiate the queue.
+
+		:param loop: Event loop.
+		:param batch_size: Number of waiting writes to flush directly, and the maximum number of rows per query.
+		:param flush_interval: Seconds between the flushes.
+		:param max_retries: Number of times a failed write is retried before it's dropped.
+		"""
+		self.loop = loop or asyncio.get_event_loop()
+		self.batch_size = batch_size
+		self.flush_interval = flush_interval
+		self.max_retries = max_retries
+
+		self.inserts = list()
+		self.saves = OrderedDict()
+		self.lock = asyncio.Lock()
+		self.flush_task = None
+		self.flush_future = None
+
+		self.written = 0
+		self.batches = 0
+		self.failures = 0
+		self.dropped = 0
+
+	@classmethod
+	def create_from_settings(cls, instance, conf):
+		"""
+		Create the queue from the ``WRITE_BEHIND`` configuration of the database.
+
+		:param instance: Instance of the controller.
+		:param conf: Write-behind settings.
+		:type conf: dict
+		:rtype: pyplanet.core.db.persister.WriteBehind
+		"""
+		return cls(
+			instance.loop, batch_size=conf.get('BATCH_SIZE', 500), flush_interval=conf.get('FLUSH_INTERVAL', 1),
+			max_retries=conf.get('MAX_RETRIES', 5),
+		)
+
+	async def start(self):
+		self.flush_task = self.loop.create_task(self.flush_loop())
+
+	async def stop(self):
+		"""
+		Stop the background flushes and write all waiting writes.
+		"""
+		if self.flush_task:
+			self.flush_task.cancel()
+			self.flush_task = None
+		while self.depth:
+			await self.flush()
+
+	@property
+	def depth(self):
+		"""
+		Number of writes waiting.
+		"""
+		return len(self.inserts) + len(self.saves)
+
+	def insert(self, instance):
+		"""
+		Queue inserting the instance as a new row.
+
+		:param instance: Model instance, without primary key.
+		"""
+		self.inserts.append([instance, 0])
+		self._check_size()
+
+	def save(self, instance):
+		"""
+		Queue saving the instance. The values of the instance at the moment of writing are saved.
+
+		:param instance: Model instance.
+		"""
+		key = id(instance)
+		if key not in self.saves:
+			self.saves[key] = [instance, 0]
+		self._check_size()
+
+	def _check_size(self):
+		if self.depth >= self.batch_size and (self.flush_future is None or self.flush_future.done()):
+			self.flush_future = asyncio.ensure_future(self.flush())
+
+	async def flush_loop(self):
+		while True:
+			await asyncio.sleep(self.flush_interval)
+			try:
+				await self.flush()
+			except Exception as e:
+				logger.exception(e)
+
+	def chunks(self, items):
+		for start in range(0, len(items), self.batch_size):
+			yield items[start:start + self.batch_size]
+
+	def insert_batches(self, items):
+		"""
+		Split the inserts in batches of consecutive rows of the same model and set of columns, keeping the order of the
+		rows. Peewee takes the columns of the query from the first row.
+
+		:param items: Queued inserts.
+		:return: Generator yielding the model and the items of each batch.
+		"""
+		batch, batch_key = list(), None
+		for item in items:
+			key = (type(item[0]), tuple(sorted(self.row(item[0]))))
+			if batch and (key != batch_key or len(batch) >= self.batch_size):
+				yield batch_key[0], batch
+				batch = list()
+			batch_key = key
+			batch.append(item)
+		if batch:
+			yield batch_key[0], batch
+
+	async def flush(self):
+		"""
+		Write the waiting writes. When a write of a model fails, the later writes of the model wait for the retry, and are
+		queued again in front of the writes queued in the meantime.
+		"""
+		async with self.lock:
+			inserts, self.inserts = self.inserts, list()
+			saves, self.saves = self.saves, OrderedDict()
+			held = set()
+			retry_inserts, retry_saves = list(), list()
+
+			# Insert the new rows with one query per batch.
+			for model, batch in self.insert_batches(inserts):
+				if model in held:
+					retry_inserts.extend(batch)
+					continue
+				try:
+					await model.execute(model.insert_many([self.row(item[0]) for item in batch]))
+					self.written += len(batch)
+					self.batches += 1
+				except Exception as e:
+					held.add(model)
+					retry_inserts.extend(self._failed(model, batch, e))
+
+			# Insert the new instances (to get their primary key) and group the updates per model and changed fields.
+			updates = OrderedDict()
+			for key, item in saves.items():
+				instance = item[0]
+				if type(instance) in held:
+					retry_saves.append(item)
+				elif instance._get_pk_value() is None:
+					try:
+						await instance.save()
+						self.written += 1
+					except Exception as e:
+						held.add(type(instance))
+						retry_saves.extend(self._failed(type(instance), [item], e))
+						continue
+					# Saved again while inserting, write all the fields again to be sure the latest values are stored.
+					if key in self.saves:
+						instance._dirty.update(instance._data.keys())
+				elif instance._dirty:
+					updates.setdefault((type(instance), tuple(sorted(instance._dirty))), list()).append(item)
+
+			for (model, fields), items in updates.items():
+				for chunk in self.chunks(items):
+					if model in held:
+						retry_saves.extend(chunk)
+						continue
+					try:
+						await self.update(model, fields, [item[0] for item in chunk])
+						self.written += len(chunk)
+						self.batches += 1
+					except Exception as e:
+						held.add(model)
+						retry_saves.extend(self._failed(model, chunk, e))
+
+			# The retried writes go first, in their original order.
+			self.inserts[:0] = retry_inserts
+			if retry_saves:
+				# A newer save of the same instance is written with the retry, with the latest values.
+				queued, self.saves = self.saves, OrderedDict((id(item[0]), item) for item in retry_saves)
+				for key, item in queued.items():
+					self.saves.setdefault(key, item)
+
+	async def update(self, model, fields, instances):
+		"""
+		Write the changed fields of the instances with one query.
+
+		:param model: Model class.
+		:param fields: Names of the changed fields.
+		:param instances: Model instances.
+		"""
+		primary_key = model._meta.primary_key
+		now = datetime.datetime.now()
+		if 'updated_at' in model._meta.fields:
+			for instance in instances:
+				instance.updated_at = now
+			fields = tuple(sorted(set(fields) | {'updated_at'}))
+
+		values = {
+			field: case(primary_key, [
+				(instance._get_pk_value(), model._meta.fields[field].db_value(instance._data.get(field)))
+				for instance in instances
+			])
+			for field in fields
+		}
+		# Clear the dirty fields before writing: fields changed while writing become dirty again, and the fields are
+		# restored when the write fails.
+		for instance in instances:
+			instance._dirty.difference_update(fields)
+		try:
+			await model.execute(
+				model.update(**values).where(primary_key << [instance._get_pk_value() for instance in instances])
+			)
+		except Exception:
+			for instance in instances:
+				instance._dirty.update(fields)
+			raise
+
+	@staticmethod
+	def row(instance):
+		primary_key = instance._meta.primary_key
+		return {
+			name: value for name, value in instance._data.items()
+			if not (primary_key and name == primary_key.name and value is None)
+		}
+
+	def _failed(self, model, items, exception):
+		"""
+		Count the failed attempt of the writes.
+
+		:return: The writes to retry.
+		:rtype: list
+		"""
+		self.failures += 1
+		retry = list()
+		for item in items:
+			item[1] += 1
+			if item[1] > self.max_retries:
+				self.dropped += 1
+			else:
+				retry.append(item)
+
+		if len(retry) < len(items):
+			logger.error('Dropping {} writes of \'{}\' after {} attempts: {}'.format(
+				len(items) - len(retry), model.__name__, self.max_retries + 1, exception
+			))
+		else:
+			logger.warning('Writing {} rows of \'{}\' failed, retrying: {}'.format(len(items), model.__name__, exception))
+		return retry
+
+	def stats(self):
+		"""
+		Get the queue depth and counters.
+
+		:return: Dictionary with the number of waiting writes and the counters.
+		:rtype: dict
+		"""
+		return dict(
+			depth=self.depth, inserts=len(self.inserts), saves=len(self.saves), written=self.written,
+			batches=self.batches, failures=self.failures, dropped=self.dropped,
+		)
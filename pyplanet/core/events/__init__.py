@@ -1,9 +1,11 @@
-from .dispatcher import Signal
+from .dispatcher import Signal, KeyPrefix, Coalesce
 from .manager import SignalManager, public_signal, public_callback
 from .callback import Callback, handle_generic
 
 __all__ = [
 	'Signal',
+	'KeyPrefix',
+	'Coalesce',
 
 	'SignalManager',
 	'public_signal',
@@ -1,6 +1,8 @@
 """
 This file contains a glue between core callbacks and desired callbacks.
 """
+from collections.abc import Mapping
+
 from pyplanet.apps.core.maniaplanet.models import Player
 from pyplanet.core.events import Signal, SignalManager
 
@@ -46,7 +48,7 @@ async def handle_generic(source, signal, **kwargs):
 	The handle_generic is a simple handle (`processing glue`) for just forwarding the payload from the maniaplanet
 	server into the signal payload.
 	"""
-	if not isinstance(source, dict):
+	if not isinstance(source, Mapping):
 		source = dict(raw=source)
 	if 'login' in source:
 		try:
@@ -7,6 +7,9 @@ import weakref
 import logging
 import asyncio
 
+from collections.abc import Mapping
+from functools import partial
+
 from pyplanet.core.exceptions import SignalException, SignalGlueStop
 from pyplanet.utils.log import handle_exception
 
@@ -23,11 +26,217 @@ NO_RECEIVERS = object()
 logger = logging.getLogger(__name__)
 
 
+class KeyPrefix:
+	"""
+	Condition value to match all values that start with the key followed by the separator, for example all the actions
+	of a manialink (``{manialink_id}__{action}``):
+
+	.. code-block:: python
+
+		signal.register(self.handle, conditions={'action': KeyPrefix(self.id)})
+
+	"""
+
+	__slots__ = ('key', 'separator')
+
+	def __init__(self, key, separator='__'):
+		self.key = key
+		self.separator = separator
+
+
+def _extract(payload, field):
+	"""
+	Get the value of a (dotted) field from the signal payload, for example ``player.login``.
+	"""
+	value = payload
+	for part in field.split('.'):
+		if isinstance(value, Mapping):
+			value = value.get(part, None)
+		else:
+			value = getattr(value, part, None)
+		if value is None:
+			return None
+	return value
+
+
+def _compile_conditions(conditions):
+	"""
+	Compile the conditions of a receiver into the index field, index key and remaining predicate.
+
+	:param conditions: None, a callable getting the payload or a dict with field => value conditions. The first field
+					   of the dict is used to index the receiver, the others are checked when dispatching.
+	:return: Tuple with the index (field, separator) or None, the index key and the predicate or None.
+	"""
+	if conditions is None:
+		return None, None, None
+	if callable(conditions):
+		return None, None, conditions
+	if not isinstance(conditions, dict) or not conditions:
+		raise SignalException('The conditions should be a callable or a non-empty dictionary!')
+
+	items = list(conditions.items())
+	field, value = items[0]
+	if isinstance(value, KeyPrefix):
+		index, key = (field, value.separator), value.key
+	else:
+		index, key = (field, None), value
+
+	predicate = None
+	if len(items) > 1:
+		def predicate(payload, checks=items[1:]):
+			for check_field, check_value in checks:
+				actual = _extract(payload, check_field)
+				if isinstance(check_value, KeyPrefix):
+					if not isinstance(actual, str) or not (
+						actual == check_value.key or actual.startswith(check_value.key + check_value.separator)
+					):
+						return False
+				elif actual != check_value:
+					return False
+			return True
+	return index, key, predicate
+
+
+class Coalesce:
+	"""
+	Delivery option to receive the events of a signal in batches, instead of one call per event. The receiver is called
+	with the list of payloads (``events``) that arrived within the window, or only the latest payload per key when a key
+	is given:
+
+	.. code-block:: python
+
+		self.context.signals.listen(tm_signals.waypoint, self.on_waypoints, coalesce=Coalesce(.25, key='player.login'))
+
+		async def on_waypoints(self, events, **kwargs):
+			for event in events:
+				print(event['player'].login, event['race_time'])
+
+	"""
+
+	__slots__ = ('window', 'key', 'limit')
+
+	def __init__(self, window=.25, key=None, limit=None):
+		"""
+		:param window: Seconds to collect the events in, starting at the first event of the batch.
+		:param key: (Dotted) payload field or callable getting the payload, to only keep the latest event per key.
+		:param limit: Deliver the batch before the window ends when this number of events (or keys) is pending.
+		"""
+		self.window = window
+		self.key = key
+		self.limit = limit
+
+
+class CoalescingReceiver:
+	"""
+	Wraps a receiver registered with the :class:`Coalesce` option. The wrapper is called by the signal for every event
+	and delivers the collected events to the actual receiver. Only one delivery runs at the same time, events arriving
+	during a delivery are collected for the next batch.
+	"""
+
+	def __init__(self, signal, receiver, options):
+		"""
+		:param signal: Signal instance.
+		:param receiver: Receiver or weak reference to the receiver.
+		:param options: Coalesce options.
+		:type options: pyplanet.core.events.dispatcher.Coalesce
+		"""
+		self.signal = signal
+		self.receiver = receiver
+		self.options = options
+
+		if options.key is None or callable(options.key):
+			self.get_key = options.key
+		else:
+			self.get_key = lambda payload: _extract(payload, options.key)
+
+		self.args = []
+		self.pending = list() if self.get_key is None else dict()
+		self.flush_handle = None
+		self.running = False
+
+		self.received = 0
+		self.delivered = 0
+		self.batches = 0
+
+	@property
+	def target(self):
+		if isinstance(self.receiver, weakref.ReferenceType):
+			return self.receiver()
+		return self.receiver
+
+	def __call__(self, *args, **kwargs):
+		self.args = list(args)
+		self.received += 1
+		if self.get_key is None:
+			self.pending.append(kwargs)
+		else:
+			key = self.get_key(kwargs)
+			self.pending.pop(key, None)
+			self.pending[key] = kwargs
+
+		if self.running:
+			return
+		if self.options.limit and len(self.pending) >= self.options.limit:
+			self.flush()
+		elif self.flush_handle is None:
+			self.flush_handle = asyncio.get_event_loop().call_later(self.options.window, self.flush)
+
+	def flush(self):
+		"""
+		Deliver the pending events now.
+		"""
+		if self.flush_handle is not None:
+			self.flush_handle.cancel()
+			self.flush_handle = None
+		if self.running or not self.pending:
+			return
+
+		events = self.pending if self.get_key is None else list(self.pending.values())
+		self.pending = list() if self.get_key is None else dict()
+		self.running = True
+		asyncio.ensure_future(self.deliver(events))
+
+	async def deliver(self, events):
+		try:
+			receiver = self.target
+			if receiver is None:
+				return
+			self.batches += 1
+			self.delivered += len(events)
+
+			kwargs = dict(events=events, signal=self.signal)
+			if self.signal.profiler is None:
+				await self.signal.execute_receiver(receiver, self.args, kwargs, ignore_exceptions=True)
+			else:
+				await self.signal.profiler.execute_receiver(self.signal, receiver, self.args, kwargs, ignore_exceptions=True)
+		finally:
+			self.running = False
+			if self.pending and self.flush_handle is None:
+				self.flush_handle = asyncio.get_event_loop().call_later(self.options.window, self.flush)
+
+	def cancel(self):
+		"""
+		Cancel the pending delivery and drop the pending events.
+		"""
+		if self.flush_handle is not None:
+			self.flush_handle.cancel()
+			self.flush_handle = None
+		self.pending.clear()
+
+	def stats(self):
+		return dict(received=self.received, delivered=self.delivered, batches=self.batches, pending=len(self.pending))
+
+
 class Signal:
 	"""
 	A signal is a destination tho distribute to where multiple listeners get the message. (event distribution).
 	"""
 
+	profiler = None
+	"""
+	Receiver profiler (:class:`pyplanet.core.events.profiler.SignalProfiler`), only set when profiling is enabled.
+	"""
+
 	def __init__(self, code=None, namespace=None, process_target=None, use_caching=False):
 		"""
 		Create a new signal.
@@ -38,6 +247,7 @@ class Signal:
 
 		self.receivers = list()
 		self.self_refs = dict()
+		self.conditions = dict()
 		self.lock = threading.Lock()
 
 		if code:
@@ -54,6 +264,9 @@ class Signal:
 		self.sender_receivers_cache = weakref.WeakKeyDictionary() if use_caching else {}
 		self._dead_receivers = False
 
+		# Precompiled dispatch table, rebuild when the receivers change.
+		self._dispatch_table = None
+
 	class Meta:
 		"""
 		The meta-class contains the code of the signal, used for string notation.
@@ -83,7 +296,10 @@ class Signal:
 
 		:return:
 		"""
-		return bool(self._live_receivers())
+		table = self._dispatch_table
+		if table is None:
+			table = self._get_dispatch_table()
+		return bool(table[0] or table[1])
 
 	def set_self(self, receiver, slf):  # pragma: no cover
 		"""
@@ -101,13 +317,23 @@ class Signal:
 					ref = weakref.ref
 					slf = ref(slf)
 					self.self_refs[lookup_key] = slf
+					self._dispatch_table = None
 					return
 			raise Exception('Receiver is not yet known! You registered too early!')
 
-	def register(self, receiver, weak=True, dispatch_uid=None):
+	def register(self, receiver, weak=True, dispatch_uid=None, conditions=None, coalesce=None):
 		"""
 		Connect receiver to sender for signal.
 
+		Receivers can be registered with conditions, to only be called for matching payloads. The first condition of the
+		dictionary indexes the receiver, so the matching receivers are looked up instead of calling all of them:
+
+		.. code-block:: python
+
+			signal.register(self.on_waypoint, conditions={'player.login': 'login'})
+			signal.register(self.handle, conditions={'action': KeyPrefix(manialink_id)})
+			signal.register(self.on_other, conditions=lambda payload: payload['race_time'] < 10000)
+
 		:param receiver: A function or an instance method which is to receive signals. Receivers must be hashable objects.
 			If weak is True, then receiver must be weak referenceable.Receivers must be able to accept keyword arguments.
 			If a receiver is connected with a dispatch_uid argument, it
@@ -120,11 +346,17 @@ class Signal:
 
 		:param dispatch_uid: An identifier used to uniquely identify a particular instance of
 			a receiver. This will usually be a string, though it may be anything hashable.
+
+		:param conditions: Dictionary with (dotted) payload field => value (or ``KeyPrefix``) or a callable getting the
+			payload that returns if the receiver should be called.
+
+		:param coalesce: Deliver the events in batches to the receiver, see :class:`Coalesce`.
 		"""
 		if dispatch_uid:
 			lookup_key = dispatch_uid
 		else:
 			lookup_key = _make_id(receiver)
+		compiled_conditions = _compile_conditions(conditions)
 
 		if weak:
 			ref = weakref.ref
@@ -137,14 +369,20 @@ class Signal:
 			receiver = ref(receiver)
 			weakref.finalize(receiver_object, self._remove_receiver)
 
+		if coalesce is not None:
+			receiver = CoalescingReceiver(self, receiver, coalesce)
+
 		with self.lock:
 			self._clear_dead_receivers()
-			for rec_key in self.receivers:
+			for rec_key, _ in self.receivers:
 				if rec_key == lookup_key:
 					break
 			else:
 				self.receivers.append((lookup_key, receiver))
+				if conditions is not None:
+					self.conditions[lookup_key] = compiled_conditions
 			self.sender_receivers_cache.clear()
+			self._dispatch_table = None
 
 	def unregister(self, receiver=None, dispatch_uid=None):
 		"""
@@ -164,14 +402,18 @@ class Signal:
 		with self.lock:
 			self._clear_dead_receivers()
 			for index in range(len(self.receivers)):
-				(rec_key, _) = self.receivers[index]
+				(rec_key, rec) = self.receivers[index]
 				if rec_key == lookup_key:
 					disconnected = True
 					del self.receivers[index]
+					if isinstance(rec, CoalescingReceiver):
+						rec.cancel()
 					if rec_key in self.self_refs:
 						del self.self_refs[rec_key]
+					self.conditions.pop(rec_key, None)
 					break
 			self.sender_receivers_cache.clear()
+			self._dispatch_table = None
 
 		return disconnected
 
@@ -189,17 +431,31 @@ class Signal:
 		except Exception as exc:
 			if not ignore_exceptions:
 				raise
+			return receiver, Signal._receiver_exception(receiver, exc)
 
-			logger.exception(SignalException(
-				'Signal receiver \'{}\' => {} thrown an exception!'.format(receiver.__module__, receiver.__name__)
-			), exc_info=False)
+	@staticmethod
+	def execute_sync_receiver(receiver, args, kwargs, ignore_exceptions=False):
+		try:
+			if len(args) > 0:
+				return receiver, receiver(*args, **kwargs)
+			return receiver, receiver(**kwargs)
+		except Exception as exc:
+			if not ignore_exceptions:
+				raise
+			return receiver, Signal._receiver_exception(receiver, exc)
+
+	@staticmethod
+	def _receiver_exception(receiver, exc):
+		logger.exception(SignalException(
+			'Signal receiver \'{}\' => {} thrown an exception!'.format(receiver.__module__, receiver.__name__)
+		), exc_info=False)
 
-			# Handle, will send to sentry if it's related to the core/contrib apps.
-			handle_exception(exc, receiver.__module__, receiver.__name__)
+		# Handle, will send to sentry if it's related to the core/contrib apps.
+		handle_exception(exc, receiver.__module__, receiver.__name__)
 
-			# Log the actual exception.
-			logger.exception(exc)
-			return receiver, exc
+		# Log the actual exception.
+		logger.exception(exc)
+		return exc
 
 	async def send(self, source, raw=False, catch_exceptions=False, gather=True):
 		"""
@@ -224,29 +480,55 @@ class Signal:
 		else:
 			kwargs = dict(**source, signal=self)
 
-		if not self.receivers:
+		table = self._dispatch_table
+		if table is None:
+			table = self._get_dispatch_table()
+		entries, index = table
+
+		# Lookup the receivers with matching indexed conditions.
+		if index:
+			matched = self._match_index(index, kwargs)
+			if matched:
+				entries = sorted(entries + matched)
+		if not entries:
 			return []
 
-		# Prepare the responses from the calls.
+		if self.profiler is None:
+			execute, execute_sync = self.execute_receiver, self.execute_sync_receiver
+		else:
+			execute, execute_sync = partial(self.profiler.execute_receiver, self), \
+				partial(self.profiler.execute_sync_receiver, self)
+
+		# Prepare the responses from the calls. Sync receivers are called directly, coroutines are gathered.
 		responses = []
-		gather_list = []
-		for key, receiver in self._live_receivers():
-			# Dereference the weak reference.
-			slf = self.self_refs.get(key, None)
-			if slf and isinstance(slf, weakref.ReferenceType):
+		pending = []
+		for _, key, receiver, is_weak, slf, is_coroutine, predicate in entries:
+			if is_weak:
+				# Dereference the weak reference.
+				receiver = receiver()
+				if receiver is None:
+					continue
+			if predicate is not None and not predicate(kwargs):
+				continue
+			if slf is not None:
 				slf = slf()
 			args = [slf] if slf else []
 
 			# Execute the receiver.
-			coro = self.execute_receiver(receiver, args, kwargs, ignore_exceptions=catch_exceptions)
-			if gather:
-				gather_list.append(coro)
+			if not is_coroutine:
+				responses.append(execute_sync(receiver, args, kwargs, ignore_exceptions=catch_exceptions))
+			elif gather:
+				pending.append((len(responses), execute(receiver, args, kwargs, ignore_exceptions=catch_exceptions)))
+				responses.append(None)
 			else:
-				responses.append(await coro)
+				responses.append(await execute(receiver, args, kwargs, ignore_exceptions=catch_exceptions))
 
-		# If gather, wait on the asyncio.gather operation and return the responses from there.
-		if gather:
-			return await asyncio.gather(*gather_list)
+		# If gather, wait on the coroutine receivers and put the responses on their position.
+		if len(pending) == 1:
+			responses[pending[0][0]] = await pending[0][1]
+		elif pending:
+			for (position, _), response in zip(pending, await asyncio.gather(*[coro for _, coro in pending])):
+				responses[position] = response
 
 		# Done, respond with all the results
 		return responses
@@ -270,56 +552,83 @@ class Signal:
 			self._dead_receivers = False
 			new_receivers = []
 			for rec in self.receivers:
-				if isinstance(rec[1], weakref.ReferenceType) and rec[1]() is None:
+				receiver = rec[1].receiver if isinstance(rec[1], CoalescingReceiver) else rec[1]
+				if isinstance(receiver, weakref.ReferenceType) and receiver() is None:
 					continue
 				new_receivers.append(rec)
 			self.receivers = new_receivers
 
-	def _live_receivers(self):
+	def _get_dispatch_table(self):
 		"""
-		Filter sequence of receivers to get resolved, live receivers.
-		This checks for weak references and resolves them, then returning only
-		live receivers.
+		Get the dispatch table, a tuple with the entries of the unindexed receivers, and the index with the entries of
+		the receivers with indexed conditions (``{(field, separator): {key: entries}}``).
+
+		Every entry holds the position, the lookup key, the receiver (or weak reference), whether it's a weak reference,
+		the (weak) self reference, whether the receiver is a coroutine function and the remaining condition predicate.
+		The table is only rebuild after the receivers have changed.
 		"""
-		# We don't use the sender. Set it to none.
-		sender = None
-
-		receivers = None
-		if self.use_caching and not self._dead_receivers:
-			receivers = self.sender_receivers_cache.get(sender)
-			# We could end up here with NO_RECEIVERS even if we do check this case in
-			# .send() prior to calling _live_receivers() due to concurrent .send() call.
-			if receivers is NO_RECEIVERS:
-				return []
+		with self.lock:
+			self._clear_dead_receivers()
+			entries = []
+			index = dict()
+			for position, (key, receiver) in enumerate(self.receivers):
+				is_weak = isinstance(receiver, weakref.ReferenceType)
+				target = receiver() if is_weak else receiver
+				if isinstance(target, CoalescingReceiver) and target.target is None:
+					target = None
+				if target is None:
+					continue
 
-		if receivers is None:
-			with self.lock:
-				self._clear_dead_receivers()
-				receivers = []
-				for receiverkey, receiver in self.receivers:
-					receivers.append((receiverkey, receiver))
-				if self.use_caching:
-					if not receivers:
-						self.sender_receivers_cache[sender] = NO_RECEIVERS
-					else:
-						# Note, we must cache the weakref versions.
-						self.sender_receivers_cache[sender] = receivers
-		non_weak_receivers = []
-
-		for receiver in receivers:
-			key = receiver[0]
-			receiver = receiver[1]
-
-			if isinstance(receiver, weakref.ReferenceType):
-				# Dereference the weak reference.
-				receiver = receiver()
-				if receiver is not None:
-					non_weak_receivers.append((key, receiver))
-			else:
-				non_weak_receivers.append((key, receiver))
-		return non_weak_receivers
+				slf = self.self_refs.get(key, None)
+				if slf is not None and not isinstance(slf, weakref.ReferenceType):
+					slf = weakref.ref(slf)
+
+				index_field, index_key, predicate = self.conditions.get(key, (None, None, None))
+				entry = (position, key, receiver, is_weak, slf, asyncio.iscoroutinefunction(target), predicate)
+				if index_field:
+					index.setdefault(index_field, dict()).setdefault(index_key, list()).append(entry)
+				else:
+					entries.append(entry)
+
+			self._dispatch_table = table = (
+				tuple(entries),
+				{field: {k: tuple(v) for k, v in keys.items()} for field, keys in index.items()},
+			)
+		return table
+
+	@staticmethod
+	def _match_index(index, payload):
+		matched = ()
+		for (field, separator), keys in index.items():
+			value = _extract(payload, field)
+			if value is None:
+				continue
+
+			if separator is None:
+				try:
+					found = keys.get(value)
+				except TypeError:
+					continue
+				if found:
+					matched += found
+				continue
+
+			# Prefix match, try every prefix of the value that is followed by the separator.
+			if not isinstance(value, str):
+				continue
+			found = keys.get(value)
+			if found:
+				matched += found
+			position = value.find(separator)
+			while position > 0:
+				found = keys.get(value[:position])
+				if found:
+					matched += found
+				position = value.find(separator, position + 1)
+		return matched
 
 	def _remove_receiver(self):
 		# The list must be marked as dead. And will be cleaned in the next registry or call.
 		# We can't directly remove because GC is always running when lock is preserved.
 		self._dead_receivers = True
+		self._dispatch_table = None
@@ -78,8 +78,13 @@ class _SignalManager:
 
 		:param signal: Signal instance or string: "namespace:code"
 		:param target: Target method to call.
-		:param conditions: Reserved for future purposes.
+		:param conditions: Only call the target for matching payloads. Dictionary with (dotted) field => value or a
+						   callable, see :meth:`pyplanet.core.events.dispatcher.Signal.register`.
+		:param kwargs: Other register options, like ``coalesce`` to receive the events in batches, see
+					   :class:`pyplanet.core.events.dispatcher.Coalesce`.
 		"""
+		if conditions is not None:
+			kwargs['conditions'] = conditions
 		try:
 			if not isinstance(signal, Signal):
 				signal = self.get_signal(signal)
@@ -123,7 +128,7 @@ class _SignalManager:
 			for func, kwargs in recs:
 				try:
 					signal = self.get_signal(sig_name)
-					signal.connect(func, **kwargs)
+					signal.register(func, **kwargs)
 				except Exception as e:
 					logging.warning('Signal not found: {}, {}'.format(
 						sig_name, e
@@ -213,7 +218,10 @@ class AppSignalManager:
 
 		:param signal: Signal instance or string: "namespace:code"
 		:param target: Target method to call.
-		:param conditions: Reserved for future purposes.
+		:param conditions: Only call the target for matching payloads. Dictionary with (dotted) field => value or a
+						   callable, see :meth:`pyplanet.core.events.dispatcher.Signal.register`.
+		:param kwargs: Other register options, like ``coalesce`` to receive the events in batches, see
+					   :class:`pyplanet.core.events.dispatcher.Coalesce`.
 		"""
 		self.manager.listen(signal, target, conditions, **kwargs)
 		self.listeners.append((signal, target))
@@ -0,0 +1,132 @@
+"""
+Opt-in profiling of the signal receivers.
+"""
+import logging
+import time
+
+from .dispatcher import Signal
+
+logger = logging.getLogger(__name__)
+
+
+def receiver_name(receiver):
+	return '{}.{}'.format(
+		getattr(receiver, '__module__', None), getattr(receiver, '__qualname__', getattr(receiver, '__name__', receiver))
+	)
+
+
+def signal_name(signal):
+	if signal.namespace:
+		return '{}:{}'.format(signal.namespace, signal.code)
+	return signal.code
+
+
+class ReceiverStats:
+	__slots__ = ('signal', 'receiver', 'calls', 'exceptions', 'total', 'max')
+
+	def __init__(self, signal, receiver):
+		self.signal = signal
+		self.receiver = receiver
+		self.calls = 0
+		self.exceptions = 0
+		self.total = 0.
+		self.max = 0.
+
+	@property
+	def average(self):
+		return self.total / self.calls if self.calls else 0.
+
+	def as_dict(self):
+		return dict(
+			signal=self.signal, receiver=self.receiver, calls=self.calls, exceptions=self.exceptions,
+			total=self.total, max=self.max, average=self.average,
+		)
+
+
+class SignalProfiler:
+	"""
+	The signal profiler records the wall time, number of calls and number of exceptions per signal and receiver.
+	Enable it with the ``SIGNAL_PROFILING`` setting, the profiler is then available as ``Signal.profiler``.
+
+	Receivers that take longer than the threshold are logged as warnings. Use :meth:`top` (or the ``//signals`` admin
+	command) to get the receivers that took the most time.
+
+	.. note::
+
+		The wall time of coroutine receivers includes the time they are waiting, for example on calls to the dedicated
+		server or the database.
+
+	"""
+
+	def __init__(self, threshold=0.1):
+		"""
+		Initiate the profiler.
+
+		:param threshold: Seconds before a receiver call is reported as slow, ``None`` to disable the warnings.
+		"""
+		self.threshold = threshold
+		self.entries = dict()
+
+	def record(self, signal, receiver, duration, failed=False):
+		"""
+		Record a receiver call.
+
+		:param signal: Signal instance.
+		:param receiver: Receiver that got called.
+		:param duration: Wall time in seconds.
+		:param failed: Did the receiver raise an exception.
+		"""
+		key = (signal, getattr(receiver, '__func__', receiver))
+		entry = self.entries.get(key)
+		if entry is None:
+			entry = self.entries[key] = ReceiverStats(signal_name(signal), receiver_name(receiver))
+		entry.calls += 1
+		entry.total += duration
+		if duration > entry.max:
+			entry.max = duration
+		if failed:
+			entry.exceptions += 1
+
+		if self.threshold is not None and duration >= self.threshold:
+			logger.warning('Slow signal receiver \'{}\' for \'{}\' took {:.0f}ms!'.format(
+				entry.receiver, entry.signal, duration * 1000
+			))
+
+	async def execute_receiver(self, signal, receiver, args, kwargs, ignore_exceptions=False):
+		started = time.perf_counter()
+		try:
+			response = await Signal.execute_receiver(receiver, args, kwargs)
+		except Exception as exc:
+			self.record(signal, receiver, time.perf_counter() - started, failed=True)
+			if not ignore_exceptions:
+				raise
+			return receiver, Signal._receiver_exception(receiver, exc)
+		self.record(signal, receiver, time.perf_counter() - started)
+		return response
+
+	def execute_sync_receiver(self, signal, receiver, args, kwargs, ignore_exceptions=False):
+		started = time.perf_counter()
+		try:
+			response = Signal.execute_sync_receiver(receiver, args, kwargs)
+		except Exception as exc:
+			self.record(signal, receiver, time.perf_counter() - started, failed=True)
+			if not ignore_exceptions:
+				raise
+			return receiver, Signal._receiver_exception(receiver, exc)
+		self.record(signal, receiver, time.perf_counter() - started)
+		return response
+
+	def top(self, limit=10, order_by='total'):
+		"""
+		Get the receivers with the highest total, max or average time, or the most exceptions.
+
+		:param limit: Number of receivers.
+		:param order_by: ``total``, ``max``, ``average``, ``calls`` or ``exceptions``.
+		:return: List of dictionaries.
+		:rtype: list
+		"""
+		entries = sorted(self.entries.values(), key=lambda entry: getattr(entry, order_by), reverse=True)
+		return [entry.as_dict() for entry in entries[:limit]]
+
+	def reset(self):
+		self.entries.clear()
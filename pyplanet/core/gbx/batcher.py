@@ -0,0 +1,173 @@
+"""
+Transparent coalescing of GBX calls into ``system.multicall`` frames.
+"""
+import time
+
+from collections import deque
+from xmlrpc.client import dumps
+
+from pyplanet.core.gbx.multicall import MulticallPlanner, unwrap_result
+
+
+class BatchWindow:
+	"""
+	Statistics of one flushed batch window.
+	"""
+	__slots__ = ('opened_at', 'calls', 'frames', 'size')
+
+	def __init__(self, opened_at):
+		self.opened_at = opened_at
+		self.calls = 0
+		self.frames = 0
+		self.size = 0
+
+	def as_dict(self):
+		return dict(opened_at=self.opened_at, calls=self.calls, frames=self.frames, size=self.size)
+
+
+class CallBatcher:
+	"""
+	The call batcher collects the calls that are issued within the same loop tick (or the configured window) and ships
+	them as one or more ``system.multicall`` frames to the dedicated server. The results and faults are fanned out to
+	the futures of the individual calls.
+
+	Enable it with the ``AUTO_BATCH`` key in the ``DEDICATED`` setting, optionally together with ``AUTO_BATCH_WINDOW``
+	(seconds, defaults to 0 which means: the same loop tick).
+	"""
+
+	EXCLUDED_METHODS = {
+		'system.multicall', 'system.listMethods', 'Authenticate', 'SetApiVersion', 'EnableCallbacks',
+	}
+	"""
+	Methods that are never batched, nested multicalls are not allowed and the handshake must be executed in order.
+	"""
+
+	def __init__(self, remote, window=0, history=100):
+		"""
+		Initiate the batcher.
+
+		:param remote: Remote client to execute the multicalls on.
+		:param window: Window in seconds to collect the calls in, 0 to collect the calls of the same loop tick.
+		:param history: Number of windows to keep the statistics of.
+		:type remote: pyplanet.core.gbx.remote.GbxRemote
+		"""
+		self.remote = remote
+		self.window = window
+
+		self.pending = list()
+		self.pending_size = 0
+		self.flush_handle = None
+		self.current_window = None
+
+		self.windows = deque(maxlen=history)
+		self.total_calls = 0
+		self.total_frames = 0
+
+	def accepts(self, method):
+		"""
+		Check if the method can be batched.
+
+		:param method: Method name.
+		:return: Boolean
+		"""
+		return method not in self.EXCLUDED_METHODS
+
+	def submit(self, method, args):
+		"""
+		Submit a call to the current batch window.
+
+		:param method: Method name.
+		:param args: Arguments of the call.
+		:return: Future that will hold the result of the call.
+		:rtype: asyncio.Future
+		"""
+		size = len(dumps(args, methodname=method, allow_none=True)) + MulticallPlanner.CALL_OVERHEAD
+		capacity = self.remote.MAX_REQUEST_SIZE - 8 - MulticallPlanner.FRAME_OVERHEAD
+		if self.pending and self.pending_size + size > capacity:
+			self.ship()
+
+		if self.current_window is None:
+			self.current_window = BatchWindow(time.time())
+
+		future = self.remote.event_loop.create_future()
+		self.pending.append((method, args, future))
+		self.pending_size += size
+
+		if self.flush_handle is None:
+			if self.window > 0:
+				self.flush_handle = self.remote.event_loop.call_later(self.window, self.flush)
+			else:
+				self.flush_handle = self.remote.event_loop.call_soon(self.flush)
+		return future
+
+	def flush(self):
+		"""
+		Ship the pending calls and close the current window.
+		"""
+		if self.flush_handle is not None:
+			self.flush_handle.cancel()
+			self.flush_handle = None
+
+		self.ship()
+		if self.current_window is not None:
+			self.windows.append(self.current_window)
+			self.current_window = None
+
+	def ship(self):
+		"""
+		Ship the pending calls as one multicall frame. The window stays open.
+		"""
+		if not self.pending:
+			return
+
+		calls = self.pending
+		self.current_window.calls += len(calls)
+		self.current_window.frames += 1
+		self.current_window.size += self.pending_size
+		self.total_calls += len(calls)
+		self.total_frames += 1
+
+		self.pending = list()
+		self.pending_size = 0
+
+		self.remote.event_loop.create_task(self.dispatch(calls))
+
+	async def dispatch(self, calls):
+		"""
+		Execute the calls given in one multicall and fan out the results and faults to the futures.
+
+		:param calls: List of (method, args, future) tuples.
+		"""
+		try:
+			results = await self.remote.execute(
+				'system.multicall', [dict(methodName=method, params=args) for method, args, _ in calls]
+			)
+		except Exception as e:
+			for _, _, future in calls:
+				if not future.done():
+					future.set_exception(e)
+			return
+
+		for (_, _, future), result in zip(calls, results):
+			if future.done():
+				continue
+			result = unwrap_result(result)
+			if isinstance(result, Exception):
+				future.set_exception(result)
+			else:
+				future.set_result(result)
+
+	def stats(self):
+		"""
+		Get the batching statistics.
+
+		:return: Dictionary with the totals and the recent windows.
+		:rtype: dict
+		"""
+		return dict(
+			calls=self.total_calls,
+			frames=self.total_frames,
+			saved_frames=self.total_calls - self.total_frames,
+			pending=len(self.pending),
+			windows=[window.as_dict() for window in self.windows],
+		)
@@ -0,0 +1,150 @@
+"""
+Capturing of the GBX wire traffic and deterministic replay of captured traffic.
+
+A capture file starts with a short magic header, followed by the frames. Every frame is stored as a fixed size record
+header (direction, timestamp, handle, size) followed by the raw XML-RPC body.
+"""
+import asyncio
+import logging
+import struct
+import time
+
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'PPGBXCAP\x01'
+RECORD = struct.Struct('<BdLL')
+
+INBOUND = 0
+OUTBOUND = 1
+
+Frame = namedtuple('Frame', ['direction', 'timestamp', 'handle', 'body'])
+
+
+class FrameRecorder:
+	"""
+	Appends every frame to the capture file. Enable it with the ``CAPTURE`` key (file path) of the ``DEDICATED`` setting.
+	"""
+
+	def __init__(self, path):
+		"""
+		Open (or continue) the capture file.
+
+		:param path: File path.
+		:type path: str
+		"""
+		self.path = path
+		self.frames = 0
+		self.file = open(path, 'ab')
+		if self.file.tell() == 0:
+			self.file.write(MAGIC)
+
+	def record(self, direction, handle, body):
+		"""
+		Append a frame.
+
+		:param direction: ``INBOUND`` or ``OUTBOUND``.
+		:param handle: Handle number of the frame.
+		:param body: Raw body.
+		:type body: bytes
+		"""
+		self.file.write(RECORD.pack(direction, time.time(), handle, len(body)))
+		self.file.write(body)
+		self.frames += 1
+
+	def flush(self):
+		self.file.flush()
+
+	def close(self):
+		if not self.file.closed:
+			self.file.close()
+
+
+def read_capture(path):
+	"""
+	Read the frames from a capture file.
+
+	:param path: File path.
+	:return: Generator of ``Frame`` tuples.
+	"""
+	with open(path, 'rb') as file:
+		if file.read(len(MAGIC)) != MAGIC:
+			raise ValueError('The file \'{}\' is not a GBX capture!'.format(path))
+
+		while True:
+			header = file.read(RECORD.size)
+			if len(header) < RECORD.size:
+				return
+			direction, timestamp, handle, size = RECORD.unpack(header)
+			body = file.read(size)
+			if len(body) < size:
+				logger.warning('Capture \'{}\' ends with a truncated frame, ignoring it.'.format(path))
+				return
+			yield Frame(direction, timestamp, handle, body)
+
+
+class FrameReplayer:
+	"""
+	Feeds the inbound frames of a capture into a GbxRemote as if they were received from the dedicated server.
+	Responses to our own requests are skipped as they don't belong to any request of the current process.
+
+	.. code-block:: python
+
+		replayer = FrameReplayer(instance.gbx, 'cup-night.gbxcap', speed=4)
+		await replayer.run()
+
+	"""
+
+	RESPONSE_HANDLE = 0x80000000
+
+	def __init__(self, remote, path, speed=1.0, wait=False):
+		"""
+		Initiate the replayer.
+
+		:param remote: Remote client to feed the frames into.
+		:param path: Capture file path.
+		:param speed: Speed factor compared to the recorded timing, 0 to replay as fast as possible.
+		:param wait: Wait for the handling of every frame to be finished before feeding the next.
+		:type remote: pyplanet.core.gbx.remote.GbxRemote
+		"""
+		self.remote = remote
+		self.path = path
+		self.speed = speed
+		self.wait = wait
+
+		self.frames = 0
+		self.duration = None
+
+	async def run(self):
+		"""
+		Replay the capture.
+
+		:return: Number of replayed frames.
+		"""
+		started = time.perf_counter()
+		first_timestamp = None
+
+		for frame in read_capture(self.path):
+			if frame.direction != INBOUND or frame.handle >= self.RESPONSE_HANDLE:
+				continue
+
+			if self.speed > 0:
+				if first_timestamp is None:
+					first_timestamp = frame.timestamp
+				delay = (frame.timestamp - first_timestamp) / self.speed - (time.perf_counter() - started)
+				if delay > 0:
+					await asyncio.sleep(delay)
+
+			task = self.remote.handle_frame(frame.handle, frame.body)
+			if self.wait and task:
+				await task
+			elif self.frames % 100 == 0:
+				# Give the loop the chance to process the handlers.
+				await asyncio.sleep(0)
+			self.frames += 1
+
+		self.duration = time.perf_counter() - started
+		logger.info('Replayed {} frames of \'{}\' in {:.2f} seconds.'.format(self.frames, self.path, self.duration))
+		return self.frames
+
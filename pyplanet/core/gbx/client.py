@@ -2,7 +2,10 @@ import asyncio
 import logging
 import re
 
+from pyplanet.core.gbx.batcher import CallBatcher
+from pyplanet.core.gbx.multicall import MulticallPlanner
 from pyplanet.core.gbx.query import Query, ScriptQuery
+from pyplanet.core.gbx.state import StateMirror
 from pyplanet.utils.functional import empty
 from .remote import GbxRemote
 
@@ -32,6 +35,20 @@ class GbxClient(GbxRemote):
 
 		self.game = self.instance.game
 		self.refresh_task = None
+		self.planner = MulticallPlanner(self)
+		self.batcher = None
+		self.state = None
+		self.refresh_interval = 60
+
+	@classmethod
+	def create_from_settings(cls, instance, conf):
+		client = super().create_from_settings(instance, conf)
+		if conf.get('AUTO_BATCH', False):
+			client.batcher = CallBatcher(client, window=conf.get('AUTO_BATCH_WINDOW', 0))
+		if conf.get('STATE_MIRROR', True):
+			client.state = StateMirror(ttl=conf.get('STATE_MIRROR_TTL', 60))
+		client.refresh_interval = conf.get('REFRESH_INTERVAL', client.refresh_interval)
+		return client
 
 	def __call__(self, *args, **kwargs):
 		if len(args) <= 0:
@@ -51,6 +68,49 @@ class GbxClient(GbxRemote):
 			return ScriptQuery(self, method, *args, **kwargs)
 		return Query(self, method, *args, **kwargs)
 
+	async def execute(self, method, *args, timeout=45.0):
+		"""
+		Query the dedicated server and return the results. When auto batching is enabled, the call is coalesced with the
+		other calls of the same window into a ``system.multicall``. Getters cached by the state mirror are answered
+		without calling the dedicated server.
+
+		:param method: Server method.
+		:param args: Arguments.
+		:param timeout: Wait for x seconds until future is returned. Default is 45 seconds.
+		:return: Response data (after awaiting).
+		"""
+		if self.state:
+			cached, result = self.state.lookup(method, args)
+			if cached:
+				return result
+			self.state.on_call(method, args)
+			if method == 'system.multicall':
+				generation = self.state.generations_of(args[0]) if args else dict()
+			else:
+				generation = self.state.generation(method)
+
+		if self.batcher and self.batcher.accepts(method):
+			result = await asyncio.wait_for(self.batcher.submit(method, args), timeout)
+		else:
+			result = await super().execute(method, *args, timeout=timeout)
+
+		if self.state:
+			if method == 'system.multicall':
+				self.state.on_multicall_result(args[0], result, generations=generation)
+			else:
+				self.state.store(method, args, result, generation=generation)
+		return result
+
+	async def handle_callback(self, handle_nr, method, data):
+		if self.state:
+			self.state.on_callback(method, data)
+		await super().handle_callback(handle_nr, method, data)
+
+	async def handle_scripted(self, handle_nr, method, data):
+		if self.state:
+			self.state.on_callback('Script.{}'.format(data[0]), None)
+		await super().handle_scripted(handle_nr, method, data)
+
 	async def script(self, method, *args, encode_json=True, response_id=True):
 		"""
 		Execute scripted call.
@@ -70,65 +130,26 @@ class GbxClient(GbxRemote):
 		Run the queries given async. Will use one or more multicall(s), depends on content.
 
 		:param queries: Queries to execute in multicall.
-		:return: Results in tuple.
-		:rtype: tuple<any>
+		:return: Results in the order of the queries given, a ``Fault`` instance for every failed query.
+		:rtype: list<any>
 		"""
 		if len(queries) == 0:
-			return tuple()
-
-		# If we got a list instead. unpack it.
-		# if len(queries) == 1 and isinstance(queries[0], collections.Iterable):
-		# 	queries = queries[0]
+			return list()
+		return await self.planner.execute(queries)
 
-		# We will try to put the maximum possible calls into one multicall, for this we need to calculate the lengths
-		# so we can stay under the maximum allowed package size.
-		current_length = 0
-
-		# Current stack holds the current multicall,
-		# will be rotated once the multicall reaches the maximum request size.
-		current_stack = list()
-
-		# We will stack calls into multicalls. Structure of this list:
-		# multicalls = list(   list()   ) = The list contains lists with calls.
-		multicalls = list()
+	def multicall_stream(self, *queries):
+		"""
+		Run the queries given async, and yield the results as soon as the multicall frame they are part of completes.
 
-		# Create the multicall(s)
-		for query in queries:
-			if not isinstance(query, Query):
-				continue
+		.. code-block:: python
 
-			query.prepare()
-			if current_length + (query.length + 8) < self.MAX_REQUEST_SIZE:
-				current_stack.append(query)
-				current_length += (query.length + 8)
-			else:
-				multicalls.append(current_stack)
-				current_length = 0
-				current_stack = list()
-
-		# Append the last stack.
-		if len(current_stack) > 0:
-			multicalls.append(current_stack)
-
-		# Create multicall queries.
-		calls = list()
-		for mc in multicalls:
-			calls.append(
-				self.execute('system.multicall', [{'methodName': c.method, 'params': c.args} for c in mc])
-			)
-
-		multi_results = await asyncio.gather(*calls)
-		results = list()
-		for res in multi_results:
-			if isinstance(res, list) and len(res) > 0 and isinstance(res[0], list):
-				# When we have a list inside our list, we will unwrap that to our root results. This is mostly the case,
-				# except when we got error messages!
-				for row in res:
-					results += row
-			else:
-				results += res
+			async for index, result in self.instance.gbx.multicall_stream(*queries):
+				pass
 
-		return results
+		:param queries: Queries to execute in multicall.
+		:return: Async generator yielding (index, result) tuples.
+		"""
+		return self.planner.stream(queries)
 
 	async def connect(self):
 		await super().connect()
@@ -186,15 +207,19 @@ class GbxClient(GbxRemote):
 		# Clear the previous created Manialinks.
 		await self('SendHideManialinkPage')
 
-		# Schedule refresh every minute!
+		# Schedule the periodic refresh, with the state mirror this is the consistency check of the mirror as well.
 		self.refresh_task = asyncio.ensure_future(self.__refresh_info_call())
 
 	async def __refresh_info_call(self):
 		while True:
-			await asyncio.sleep(60)
+			await asyncio.sleep(self.refresh_interval)
 			await self.refresh_info()
 
 	async def refresh_info(self):
+		# The refresh is the consistency check of the state mirror, so start clean and let the calls repopulate it.
+		if self.state:
+			self.state.clear()
+
 		# Version Information
 		res = await self.multicall(
 			self('GetVersion'),
@@ -262,8 +287,8 @@ async def multicall(*calls):
 	Run the queries given async. Will use one or more multicall(s), depends on content.
 
 	:param queries: Queries to execute in multicall.
-	:return: Results in tuple.
-	:rtype: tuple<any>
+	:return: Results in the order of the queries given, a ``Fault`` instance for every failed query.
+	:rtype: list<any>
 	"""
 	from pyplanet.core import Controller
 	return await Controller.instance.gbx.multicall(*calls)
@@ -0,0 +1,236 @@
+"""
+Dedicated XML-RPC decoder for the GBXRemote 2 protocol.
+
+The standard library ``xmlrpc.client.loads`` goes through several layers of generic parser and unmarshaller classes
+for every frame we receive. The dedicated server only sends a very limited subset of XML-RPC and most of the frames
+are script callbacks with the very same shape. This decoder drives expat directly and has a fast path for the
+``ManiaPlanet.ModeScriptCallbackArray`` callback that skips the XML parser entirely.
+
+The output is exactly the same as ``loads(body, use_builtin_types=True)``.
+"""
+import base64
+import re
+
+from datetime import datetime
+from xml.parsers import expat
+from xmlrpc.client import Fault, ResponseError, loads as xmlrpc_loads
+
+# The script callback shape, method name and one array with strings. Anything else goes to the full parser.
+_SCRIPT_CALLBACK_METHOD = 'ManiaPlanet.ModeScriptCallbackArray'
+_SCRIPT_CALLBACK_MARKER = _SCRIPT_CALLBACK_METHOD.encode()
+_SCRIPT_CALLBACK_RE = re.compile(
+	r'^\s*(?:<\?xml[^>]*\?>)?\s*<methodCall>\s*<methodName>ManiaPlanet\.ModeScriptCallbackArray</methodName>\s*'
+	r'<params>\s*<param>\s*<value>\s*<string>([^<]*)</string>\s*</value>\s*</param>\s*'
+	r'<param>\s*<value>\s*<array>\s*<data>((?:\s*<value>\s*<string>[^<]*</string>\s*</value>)*)\s*</data>\s*'
+	r'</array>\s*</value>\s*</param>\s*</params>\s*</methodCall>\s*$'
+)
+_SCRIPT_CALLBACK_PART_RE = re.compile(r'<string>([^<]*)</string>')
+
+_ENTITY_RE = re.compile(r'&(#x[0-9a-fA-F]+|#[0-9]+|lt|gt|amp|quot|apos);')
+_ENTITIES = {'lt': '<', 'gt': '>', 'amp': '&', 'quot': '"', 'apos': '\''}
+
+
+def _replace_entity(match):
+	entity = match.group(1)
+	if entity[0] != '#':
+		return _ENTITIES[entity]
+	if entity[1] == 'x':
+		return chr(int(entity[2:], 16))
+	return chr(int(entity[1:]))
+
+
+def _unescape(text):
+	if '&' not in text:
+		return text
+	return _ENTITY_RE.sub(_replace_entity, text)
+
+
+def _parse_datetime(data):
+	return datetime.strptime(data, '%Y%m%dT%H:%M:%S')
+
+
+class GbxDecoder:
+	"""
+	Single pass, expat driven decoder of ``methodCall`` and ``methodResponse`` bodies. Every instance can decode one
+	body only, use the module level :func:`loads` to decode.
+	"""
+
+	def __init__(self):
+		self._stack = list()
+		self._marks = list()
+		self._data = list()
+		self._value = False
+		self._type = None
+		self._method_name = None
+
+		self._parser = parser = expat.ParserCreate('utf-8')
+		parser.buffer_text = True
+		parser.StartElementHandler = self._start
+		parser.EndElementHandler = self._end
+		parser.CharacterDataHandler = self._data.append
+
+	def decode(self, body):
+		"""
+		Decode the body given.
+
+		:param body: Raw frame body.
+		:type body: bytes
+		:return: Tuple with the params and the method name (None for responses).
+		:raise: xmlrpc.client.Fault
+		:raise: xml.parsers.expat.ExpatError
+		"""
+		self._parser.Parse(body, True)
+
+		if self._type is None or self._marks:
+			raise ResponseError()
+		if self._type == 'fault':
+			raise Fault(**self._stack[0])
+		return tuple(self._stack), self._method_name
+
+	def _start(self, tag, attrs):
+		if tag == 'array' or tag == 'struct':
+			self._marks.append(len(self._stack))
+		self._data.clear()
+		self._value = tag == 'value'
+
+	def _end(self, tag):
+		handler = self._dispatch.get(tag)
+		if handler is not None:
+			handler(self, ''.join(self._data))
+
+	def _end_value(self, data):
+		# A value without type element is a string by definition.
+		if self._value:
+			self._stack.append(data)
+
+	def _end_string(self, data):
+		self._stack.append(data)
+		self._value = False
+
+	def _end_int(self, data):
+		self._stack.append(int(data))
+		self._value = False
+
+	def _end_double(self, data):
+		self._stack.append(float(data))
+		self._value = False
+
+	def _end_boolean(self, data):
+		if data == '0':
+			self._stack.append(False)
+		elif data == '1':
+			self._stack.append(True)
+		else:
+			raise TypeError('bad boolean value')
+		self._value = False
+
+	def _end_nil(self, data):
+		self._stack.append(None)
+		self._value = False
+
+	def _end_base64(self, data):
+		self._stack.append(base64.decodebytes(data.encode('ascii')))
+		self._value = False
+
+	def _end_datetime(self, data):
+		self._stack.append(_parse_datetime(data))
+		self._value = False
+
+	def _end_array(self, data):
+		mark = self._marks.pop()
+		self._stack[mark:] = [self._stack[mark:]]
+		self._value = False
+
+	def _end_struct(self, data):
+		mark = self._marks.pop()
+		items = self._stack[mark:]
+		self._stack[mark:] = [dict(zip(items[::2], items[1::2]))]
+		self._value = False
+
+	def _end_params(self, data):
+		self._type = 'params'
+
+	def _end_fault(self, data):
+		self._type = 'fault'
+
+	def _end_method_name(self, data):
+		self._method_name = data
+		self._type = 'methodName'
+
+	_dispatch = {
+		'value': _end_value,
+		'string': _end_string,
+		'name': _end_string,
+		'i4': _end_int,
+		'i8': _end_int,
+		'int': _end_int,
+		'double': _end_double,
+		'boolean': _end_boolean,
+		'nil': _end_nil,
+		'base64': _end_base64,
+		'dateTime.iso8601': _end_datetime,
+		'array': _end_array,
+		'struct': _end_struct,
+		'params': _end_params,
+		'fault': _end_fault,
+		'methodName': _end_method_name,
+	}
+
+
+def decode_script_callback(body):
+	"""
+	Try to decode a ``ManiaPlanet.ModeScriptCallbackArray`` callback without the XML parser.
+
+	:param body: Raw frame body.
+	:type body: bytes
+	:return: Same tuple as :func:`loads` or None if the body doesn't match the common callback shape.
+	"""
+	# Carriage returns are normalized by XML parsers, leave those rare frames to the full parser.
+	if _SCRIPT_CALLBACK_MARKER not in body[:256] or b'\r' in body:
+		return None
+
+	match = _SCRIPT_CALLBACK_RE.match(body.decode('utf-8'))
+	if not match:
+		return None
+
+	method, parts = match.groups()
+	return (
+		(_unescape(method), [_unescape(part) for part in _SCRIPT_CALLBACK_PART_RE.findall(parts)]),
+		_SCRIPT_CALLBACK_METHOD,
+	)
+
+
+def loads(body):
+	"""
+	Decode a GBX XML-RPC body. Drop-in replacement of ``xmlrpc.client.loads(body, use_builtin_types=True)``.
+
+	:param body: Raw frame body.
+	:type body: bytes
+	:return: Tuple with the params and the method name (None for responses).
+	:raise: xmlrpc.client.Fault
+	:raise: xml.parsers.expat.ExpatError
+	"""
+	result = decode_script_callback(body)
+	if result is not None:
+		return result
+	return GbxDecoder().decode(body)
+
+
+def builtin_loads(body):
+	"""
+	Decode a GBX XML-RPC body with the standard library implementation.
+
+	:param body: Raw frame body.
+	:type body: bytes
+	:return: Tuple with the params and the method name (None for responses).
+	"""
+	return xmlrpc_loads(body, use_builtin_types=True)
+
+
+DECODERS = {
+	'gbx': loads,
+	'xmlrpc': builtin_loads,
+}
+"""
+Available decoder engines. Select one with the ``DECODER`` key in the ``DEDICATED`` setting.
+"""
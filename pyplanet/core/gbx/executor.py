@@ -0,0 +1,214 @@
+"""
+Bounded executor of the callbacks of the dedicated server, keeping the callbacks of the same player in order.
+"""
+import asyncio
+import logging
+import re
+import time
+
+from collections import deque
+
+from pyplanet.core.gbx.payload import mentions_response_id
+
+logger = logging.getLogger(__name__)
+
+LOGIN_PATTERN = re.compile(r'"login"\s*:\s*"([^"]*)"')
+
+
+class CallbackExecutor:
+	"""
+	The callback executor handles the callbacks of the dedicated server with a maximum number of callbacks being handled
+	at the same time. Callbacks are queued per key, the callbacks of one key are handled one after the other in the order
+	they have been received. The key is the login of the player for the player callbacks and events, and the callback
+	name for all other callbacks.
+
+	When more than ``queue_limit`` callbacks are waiting, the low priority callbacks are dropped (policy ``drop``) or
+	replace the waiting callback with the same name and key (policy ``merge``, dropped when there is none). The merge only
+	callbacks replace the waiting callback with the same name and key with both policies, and are never dropped.
+
+	Configure it with the ``DISPATCH_CONCURRENCY`` (0 to handle every callback directly), ``DISPATCH_QUEUE_LIMIT``,
+	``DISPATCH_OVERLOAD_POLICY`` and ``DISPATCH_LOW_PRIORITY`` keys of the ``DEDICATED`` setting.
+	"""
+
+	POLICIES = ('drop', 'merge')
+
+	LOW_PRIORITY = frozenset({
+		'Trackmania.Event.Respawn', 'Trackmania.Event.Stunt', 'Trackmania.Event.OnPlayerRequestRespawn',
+		'Shootmania.Event.OnShoot', 'Shootmania.Event.OnNearMiss', 'Shootmania.Event.OnFallDamage',
+		'Shootmania.Event.OnShotDeny',
+	})
+	"""
+	Callbacks that are dropped or merged when overloaded.
+	"""
+
+	MERGE_ONLY = frozenset({
+		'ManiaPlanet.PlayerInfoChanged',
+	})
+	"""
+	Callbacks that are merged when overloaded but never dropped, the player manager and the state mirror depend on them.
+	Only the latest one matters, it contains the complete information of the player.
+	"""
+
+	LOGIN_POSITIONS = {
+		'ManiaPlanet.PlayerConnect': 0, 'ManiaPlanet.PlayerDisconnect': 0, 'ManiaPlanet.PlayerChat': 1,
+		'ManiaPlanet.PlayerManialinkPageAnswer': 1,
+	}
+	"""
+	Position of the login in the data of the player callbacks.
+	"""
+
+	SCRIPT_METHODS = ('ManiaPlanet.ModeScriptCallbackArray', 'ManiaPlanet.ModeScriptCallback')
+
+	def __init__(self, loop, concurrency=64, queue_limit=2000, policy='merge', low_priority=None):
+		"""
+		Initiate the executor.
+
+		:param loop: Event loop.
+		:param concurrency: Maximum number of callbacks handled at the same time.
+		:param queue_limit: Number of waiting callbacks from which the low priority callbacks are dropped or merged.
+		:param policy: Overload policy, ``drop`` or ``merge``.
+		:param low_priority: Names of the low priority callbacks, :attr:`LOW_PRIORITY` by default.
+		"""
+		self.loop = loop
+		self.concurrency = concurrency
+		self.queue_limit = queue_limit
+		self.policy = policy
+		self.low_priority = frozenset(low_priority) if low_priority is not None else self.LOW_PRIORITY
+
+		self.queues = dict()
+		self.ready = deque()
+		self.running = set()
+		self.active = 0
+		self.queued = 0
+
+		self.submitted = 0
+		self.handled = 0
+		self.dropped = 0
+		self.merged = 0
+		self.lag_total = 0.
+		self.lag_max = 0.
+
+	@classmethod
+	def key_for(cls, method, data):
+		"""
+		Get the ordering key and the name of a callback.
+
+		:param method: Callback method.
+		:param data: Decoded callback data.
+		:return: Tuple with the key (None if the callback must be handled directly) and the name of the callback.
+		"""
+		if method in cls.SCRIPT_METHODS and isinstance(data, (list, tuple)) and len(data) == 2:
+			name, raw = data
+			# Responses to our script calls are awaited by the handlers, they can't wait in the queue.
+			if mentions_response_id(raw):
+				return None, name
+			if '.Event.' in name:
+				for part in (raw if isinstance(raw, list) else [raw]):
+					match = LOGIN_PATTERN.search(part) if isinstance(part, str) else None
+					if match:
+						return ('login', match.group(1)), name
+			return name, name
+
+		position = cls.LOGIN_POSITIONS.get(method)
+		if position is not None and isinstance(data, (list, tuple)) and len(data) > position:
+			return ('login', data[position]), method
+		if method == 'ManiaPlanet.PlayerInfoChanged' and isinstance(data, dict) and 'Login' in data:
+			return ('login', data['Login']), method
+		return method, method
+
+	def submit(self, key, name, factory):
+		"""
+		Queue a callback.
+
+		:param key: Ordering key.
+		:param name: Name of the callback.
+		:param factory: Callable that returns the coroutine handling the callback.
+		:return: Future resolved when the callback has been handled, None if the callback has been dropped.
+		:rtype: asyncio.Future
+		"""
+		self.submitted += 1
+		if self.queued >= self.queue_limit and (name in self.low_priority or name in self.MERGE_ONLY):
+			if self.policy == 'merge' or name in self.MERGE_ONLY:
+				for item in self.queues.get(key, ()):
+					if item[1] == name:
+						item[2] = factory
+						self.merged += 1
+						return item[3]
+			if name not in self.MERGE_ONLY:
+				self.dropped += 1
+				return None
+
+		future = self.loop.create_future()
+		queue = self.queues.get(key)
+		if queue is None:
+			queue = self.queues[key] = deque()
+			if key not in self.running:
+				self.ready.append(key)
+		queue.append([time.perf_counter(), name, factory, future])
+		self.queued += 1
+
+		self.pump()
+		return future
+
+	def pump(self):
+		"""
+		Start handling the waiting callbacks, as long as the concurrency allows.
+		"""
+		while self.ready and self.active < self.concurrency:
+			key = self.ready.popleft()
+			queue = self.queues[key]
+			item = queue.popleft()
+			if not queue:
+				del self.queues[key]
+
+			self.queued -= 1
+			self.active += 1
+			self.running.add(key)
+
+			lag = time.perf_counter() - item[0]
+			self.lag_total += lag
+			if lag > self.lag_max:
+				self.lag_max = lag
+
+			self.loop.create_task(self.run(key, item))
+
+	async def run(self, key, item):
+		_, name, factory, future = item
+		try:
+			await factory()
+		except Exception as e:
+			logger.exception(e)
+		finally:
+			self.handled += 1
+			self.active -= 1
+			self.running.discard(key)
+			if key in self.queues:
+				self.ready.append(key)
+			if not future.done():
+				future.set_result(None)
+			self.pump()
+
+	@property
+	def lag(self):
+		"""
+		Seconds the oldest waiting callback is waiting.
+		"""
+		if not self.queues:
+			return 0.
+		return time.perf_counter() - min(queue[0][0] for queue in self.queues.values())
+
+	def stats(self):
+		"""
+		Get the gauges and counters of the executor.
+
+		:return: Dictionary with the queue size, lag and counters.
+		:rtype: dict
+		"""
+		started = self.submitted - self.dropped - self.merged - self.queued
+		return dict(
+			queued=self.queued, active=self.active, keys=len(self.queues),
+			lag_ms=round(self.lag * 1000, 2),
+			avg_lag_ms=round(self.lag_total / started * 1000, 2) if started else 0.,
+			max_lag_ms=round(self.lag_max * 1000, 2),
+			submitted=self.submitted, handled=self.handled, dropped=self.dropped, merged=self.merged,
+		)
@@ -0,0 +1,354 @@
+"""
+Local stand-in for the dedicated server, speaking the GBXRemote 2 protocol. It implements the methods PyPlanet calls while
+starting and simulates virtual players that emit callbacks, to measure the throughput and latency of the controller
+without a real dedicated server.
+
+Start it with the ``fake_dedicated`` management command and point the ``DEDICATED`` setting of a pool to it:
+
+.. code-block:: bash
+
+	./manage.py fake_dedicated --port 5000 --players 200 --waypoint-rate 1
+
+"""
+import asyncio
+import json
+import logging
+import random
+import struct
+import time
+
+from xmlrpc.client import dumps, loads, Fault
+
+logger = logging.getLogger(__name__)
+
+
+class VirtualPlayer:
+	"""
+	A simulated player on the fake server.
+	"""
+
+	__slots__ = ('player_id', 'login', 'nickname', 'is_spectator', 'checkpoint', 'race_time')
+
+	def __init__(self, player_id, login, nickname, is_spectator=False):
+		self.player_id = player_id
+		self.login = login
+		self.nickname = nickname
+		self.is_spectator = is_spectator
+		self.checkpoint = 0
+		self.race_time = 0
+
+	def info(self):
+		return dict(
+			Login=self.login, NickName=self.nickname, PlayerId=self.player_id, TeamId=-1, SpectatorStatus=0,
+			LadderRanking=-1, Flags=0, LadderScore=0.0,
+		)
+
+	def detailed_info(self):
+		return dict(
+			Login=self.login, NickName=self.nickname, PlayerId=self.player_id, TeamId=-1, IsSpectator=self.is_spectator,
+			IsInOfficialMode=False, Avatar=dict(FileName='', Checksum=''), Skins=[], LadderStats=dict(),
+			HoursSinceZoneInscription=0, BroadcasterLogin='', Allies=[], ClubLink='',
+			Path='World|Europe|Netherlands', Language='en', IPAddress='127.0.0.1:{}'.format(2350 + self.player_id),
+			DownloadRate=8000, UploadRate=8000, IsManagedByAnOtherServer=False, IsServer=False,
+			IsBroadcasting=False, IsPodiumReady=False, ClientVersion='', ClientTitleVersion='',
+		)
+
+
+class FakeDedicatedServer:
+	"""
+	Fake dedicated server. Every connection gets the handshake, the responses to its calls and, once it enables the
+	callbacks, the simulated callbacks of the virtual players.
+
+	The rates are the number of callbacks per player per second.
+	"""
+
+	SERVER_LOGIN = 'fake_dedicated'
+	TICK = 0.1
+
+	def __init__(
+		self, host='127.0.0.1', port=5000, players=0, maps=10, waypoint_rate=0.0, chat_rate=0.0, answer_rate=0.0,
+		checkpoints=10, loop=None
+	):
+		"""
+		Initiate the fake server.
+
+		:param host: Host to listen on.
+		:param port: Port to listen on, 0 to pick a free one.
+		:param players: Number of virtual players.
+		:param maps: Number of maps in the map list.
+		:param waypoint_rate: ``Trackmania.Event.WayPoint`` callbacks per player per second.
+		:param chat_rate: ``ManiaPlanet.PlayerChat`` callbacks per player per second.
+		:param answer_rate: ``ManiaPlanet.PlayerManialinkPageAnswer`` callbacks per player per second.
+		:param checkpoints: Number of checkpoints of every map (including the finish).
+		:param loop: Event loop.
+		"""
+		self.host = host
+		self.port = port
+		self.loop = loop or asyncio.get_event_loop()
+		self.rates = dict(waypoint=waypoint_rate, chat=chat_rate, answer=answer_rate)
+		self.checkpoints = checkpoints
+
+		self.players = [
+			VirtualPlayer(player_id, 'virtual_{}'.format(player_id), '$o$fffVirtual {}'.format(player_id))
+			for player_id in range(1, players + 1)
+		]
+		self.players_by_login = {player.login: player for player in self.players}
+		self.maps = [dict(
+			UId='FakeMap{:021d}'.format(nr), Name='Fake Map {}'.format(nr), FileName='Fake/Map{}.Map.Gbx'.format(nr),
+			Author='fake_author', AuthorNickname='Fake Author', Environnement='Stadium', Mood='Day', MapType='Race',
+			MapStyle='', NbLaps=0, NbCheckpoints=checkpoints, LapRace=False, AuthorTime=30000, GoldTime=32000,
+			SilverTime=36000, BronzeTime=45000, CopperPrice=500,
+		) for nr in range(1, maps + 1)]
+		self.current_map = 0
+
+		self.methods = {
+			'system.listMethods': lambda: sorted(self.methods.keys()),
+			'GetVersion': lambda: dict(
+				Name='ManiaPlanet', TitleId='TMStadium@nadeo', Version='3.3.0', Build='2019-10-23_20_00',
+				ApiVersion='2013-04-16',
+			),
+			'GetSystemInfo': lambda: dict(
+				PublishedIp='127.0.0.1', Port=self.port, P2PPort=3450, TitleId='TMStadium@nadeo',
+				ServerLogin=self.SERVER_LOGIN, ServerPlayerId=0, ConnectionDownloadRate=102400,
+				ConnectionUploadRate=102400, IsServer=True, IsDedicated=True,
+			),
+			'GetGameMode': lambda: 0,
+			'GetModeScriptSettings': lambda: dict(S_TimeLimit=300, S_UseScriptCallbacks=True),
+			'GetModeScriptInfo': lambda: dict(Name='TimeAttack.Script.txt', CompatibleMapTypes='Race', Description=''),
+			'GetModeScriptVariables': lambda: dict(),
+			'GetScriptName': lambda: dict(CurrentValue='TimeAttack.Script.txt', NextValue='TimeAttack.Script.txt'),
+			'GameDataDirectory': lambda: '/fake/UserData/',
+			'GetMapsDirectory': lambda: '/fake/UserData/Maps/',
+			'GetSkinsDirectory': lambda: '/fake/UserData/Skins/',
+			'GetServerPassword': lambda: '',
+			'GetServerPasswordForSpectator': lambda: '',
+			'GetMaxPlayers': lambda: dict(CurrentValue=255, NextValue=255),
+			'GetMaxSpectators': lambda: dict(CurrentValue=32, NextValue=32),
+			'GetHideServer': lambda: 0,
+			'GetLadderServerLimits': lambda: dict(LadderServerLimitMin=0.0, LadderServerLimitMax=50000.0),
+			'GetCurrentMapInfo': lambda: self.maps[self.current_map] if self.maps else dict(),
+			'GetNextMapInfo': lambda: self.maps[(self.current_map + 1) % len(self.maps)] if self.maps else dict(),
+			'GetMapList': self.get_map_list,
+			'GetPlayerList': self.get_player_list,
+			'GetDetailedPlayerInfo': self.get_detailed_player_info,
+			'GetPlayerInfo': lambda login, *args: self.get_player(login).info(),
+		}
+
+		self.server = None
+		self.connections = set()
+		self.requests = dict()
+		self.callbacks_sent = 0
+		self.started_at = None
+
+	async def start(self):
+		"""
+		Start listening.
+		"""
+		self.server = await asyncio.start_server(self.handle_connection, host=self.host, port=self.port)
+		if not self.port:
+			self.port = self.server.sockets[0].getsockname()[1]
+		self.started_at = time.time()
+		logger.info('Fake dedicated server listening on {}:{} with {} virtual players.'.format(
+			self.host, self.port, len(self.players)
+		))
+
+	async def stop(self):
+		"""
+		Close all connections and stop listening.
+		"""
+		for connection in list(self.connections):
+			connection.close()
+		if self.server:
+			self.server.close()
+			await self.server.wait_closed()
+			self.server = None
+
+	def get_player(self, login):
+		try:
+			return self.players_by_login[login]
+		except KeyError:
+			raise Fault(-1000, 'Login unknown.')
+
+	def get_map_list(self, limit=-1, offset=0):
+		return self.maps[offset:] if limit < 0 else self.maps[offset:offset + limit]
+
+	def get_player_list(self, limit=-1, offset=0, *args):
+		players = [player.info() for player in self.players]
+		return players[offset:] if limit < 0 else players[offset:offset + limit]
+
+	def get_detailed_player_info(self, login):
+		if login == self.SERVER_LOGIN:
+			return dict(
+				VirtualPlayer(0, self.SERVER_LOGIN, 'Fake Dedicated').detailed_info(), IsServer=True
+			)
+		return self.get_player(login).detailed_info()
+
+	def call(self, connection, method, params):
+		"""
+		Execute a method call.
+
+		:param connection: Connection that did the call.
+		:param method: Method name.
+		:param params: Parameters.
+		:return: Result of the call.
+		:raise: Fault
+		"""
+		self.requests[method] = self.requests.get(method, 0) + 1
+
+		if method == 'system.multicall':
+			results = list()
+			for call in params[0]:
+				try:
+					results.append([self.call(connection, call['methodName'], call['params'])])
+				except Fault as e:
+					results.append(dict(faultCode=e.faultCode, faultString=e.faultString))
+			return results
+		if method == 'EnableCallbacks':
+			connection.enable_callbacks(bool(params[0]))
+			return True
+		if method in ('TriggerModeScriptEvent', 'TriggerModeScriptEventArray'):
+			self.script_call(connection, params[0], params[1] if len(params) > 1 else list())
+			return True
+		if method in self.methods:
+			try:
+				return self.methods[method](*params)
+			except TypeError as e:
+				raise Fault(-501, 'Invalid params: {}'.format(str(e)))
+		if method.startswith('Get'):
+			raise Fault(-1000, 'Method not implemented by the fake dedicated server.')
+
+		# All the other calls (setters, chat, manialinks, ...) are accepted.
+		return True
+
+	def script_call(self, connection, method, args):
+		"""
+		Answer the getters of the mode script, the response id is always the last argument.
+		"""
+		if '.Get' not in method or not isinstance(args, list) or not args:
+			return
+		response_id = args[-1]
+		if method == 'XmlRpc.GetAllApiVersions':
+			payload = dict(latest='2.5.0', versions=['2.0.0', '2.1.0', '2.2.0', '2.3.0', '2.4.0', '2.5.0'])
+		elif method == 'XmlRpc.GetApiVersion':
+			payload = dict(version='2.5.0')
+		elif method == 'Maniaplanet.Pause.GetStatus':
+			payload = dict(active=False, available=True)
+		else:
+			payload = dict()
+		payload['responseid'] = response_id
+		connection.send_callback('ManiaPlanet.ModeScriptCallbackArray', (method, [json.dumps(payload)]))
+
+	def random_event(self, kind):
+		"""
+		Create a random callback of the kind given.
+
+		:param kind: waypoint, chat or answer.
+		:return: Tuple with method and parameters.
+		"""
+		player = random.choice(self.players)
+		if kind == 'chat':
+			return 'ManiaPlanet.PlayerChat', (player.player_id, player.login, 'Hello from {}!'.format(player.nickname), False)
+		if kind == 'answer':
+			return 'ManiaPlanet.PlayerManialinkPageAnswer', (player.player_id, player.login, 'fake__answer', [])
+
+		player.checkpoint += 1
+		player.race_time += random.randint(2000, 4000)
+		is_finish = player.checkpoint == self.checkpoints
+		payload = dict(
+			time=int((time.time() - self.started_at) * 1000), login=player.login, accountid='', racetime=player.race_time,
+			laptime=player.race_time, checkpointinrace=player.checkpoint - 1, checkpointinlap=player.checkpoint - 1,
+			isendrace=is_finish, isendlap=is_finish, curracecheckpoints=[], curlapcheckpoints=[],
+			blockid='#{}'.format(player.checkpoint), speed=random.uniform(100, 500), distance=player.race_time * 0.1,
+		)
+		if is_finish:
+			player.checkpoint = player.race_time = 0
+		return 'ManiaPlanet.ModeScriptCallbackArray', ('Trackmania.Event.WayPoint', [json.dumps(payload)])
+
+	async def handle_connection(self, reader, writer):
+		connection = FakeConnection(self, reader, writer)
+		self.connections.add(connection)
+		try:
+			await connection.run()
+		finally:
+			self.connections.discard(connection)
+
+	def stats(self):
+		"""
+		Get the counters of the fake server.
+
+		:return: Dictionary with the requests per method and the callbacks sent.
+		:rtype: dict
+		"""
+		return dict(
+			connections=len(self.connections), callbacks_sent=self.callbacks_sent,
+			requests=sum(self.requests.values()), methods=dict(self.requests),
+		)
+
+
+class FakeConnection:
+	"""
+	Connection of a client to the fake server.
+	"""
+
+	def __init__(self, server, reader, writer):
+		self.server = server
+		self.reader = reader
+		self.writer = writer
+		self.callback_handle = 0
+		self.simulation_task = None
+
+	async def run(self):
+		self.writer.write(struct.pack('<L11s', 11, b'GBXRemote 2'))
+		try:
+			while True:
+				size, handle = struct.unpack_from('<LL', await self.reader.readexactly(8))
+				params, method = loads(await self.reader.readexactly(size))
+
+				try:
+					response = dumps((self.server.call(self, method, params),), methodresponse=True, allow_none=True)
+				except Fault as e:
+					response = dumps(e, methodresponse=True)
+				self.write(handle, response)
+		except (asyncio.IncompleteReadError, ConnectionError):
+			pass
+		finally:
+			self.close()
+
+	def write(self, handle, body):
+		body = body.encode('utf-8')
+		self.writer.write(struct.pack('<LL', len(body), handle) + body)
+
+	def send_callback(self, method, params):
+		"""
+		Send a callback to the client.
+		"""
+		self.callback_handle = self.callback_handle % 0x7fffffff + 1
+		self.write(self.callback_handle, dumps(params, methodname=method, allow_none=True))
+		self.server.callbacks_sent += 1
+
+	def enable_callbacks(self, enable):
+		if enable and not self.simulation_task and self.server.players and any(self.server.rates.values()):
+			self.simulation_task = asyncio.ensure_future(self.simulate(), loop=self.server.loop)
+		elif not enable and self.simulation_task:
+			self.simulation_task.cancel()
+			self.simulation_task = None
+
+	async def simulate(self):
+		"""
+		Emit the callbacks of the virtual players, every tick the amount of callbacks the rates give.
+		"""
+		carry = {kind: 0.0 for kind in self.server.rates}
+		while True:
+			await asyncio.sleep(self.server.TICK)
+			for kind, rate in self.server.rates.items():
+				carry[kind] += rate * len(self.server.players) * self.server.TICK
+				while carry[kind] >= 1:
+					carry[kind] -= 1
+					self.send_callback(*self.server.random_event(kind))
+			await self.writer.drain()
+
+	def close(self):
+		if self.simulation_task:
+			self.simulation_task.cancel()
+			self.simulation_task = None
+		self.writer.close()
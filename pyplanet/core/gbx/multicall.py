@@ -0,0 +1,162 @@
+"""
+The multicall planner packs prepared queries into ``system.multicall`` frames and executes them.
+"""
+import asyncio
+
+from xmlrpc.client import Fault
+
+from pyplanet.core.gbx.query import Query
+
+
+def unwrap_result(result):
+	"""
+	Convert one entry of a ``system.multicall`` response into the result of the call.
+
+	:param result: Raw entry, a list with the result or a fault struct.
+	:return: Result of the call or a Fault instance.
+	"""
+	if isinstance(result, dict) and 'faultCode' in result:
+		return Fault(result['faultCode'], result['faultString'])
+	if isinstance(result, list) and len(result) == 1:
+		return result[0]
+	return result
+
+
+class MulticallPlanner:
+	"""
+	The planner packs the queries given into as few frames as possible while staying under the ``MAX_REQUEST_SIZE``,
+	sends the frames concurrently and gives back the results in the exact order of the input.
+
+	A fault of a single query doesn't fail the multicall, the ``Fault`` instance is returned on the position of the query
+	instead. Transport errors (timeouts, connection issues) are raised.
+	"""
+
+	CALL_OVERHEAD = 256
+	"""
+	Bytes of the struct wrapping one call inside of the multicall (methodName, params members), on top of the prepared
+	query length.
+	"""
+
+	FRAME_OVERHEAD = 256
+	"""
+	Bytes of the multicall frame itself (method call, params, array).
+	"""
+
+	def __init__(self, client):
+		"""
+		Initiate planner.
+
+		:param client: Client to execute the frames on.
+		:type client: pyplanet.core.gbx.client.GbxClient
+		"""
+		self.client = client
+
+	@property
+	def capacity(self):
+		"""
+		Maximum bytes of calls in one frame.
+		"""
+		return self.client.MAX_REQUEST_SIZE - 8 - self.FRAME_OVERHEAD
+
+	def plan(self, queries, preserve_order=True):
+		"""
+		Pack the queries into frames. Items that are no queries are ignored (and will get None as result).
+
+		With ``preserve_order`` the frames are filled in the order of the input (next fit), so the dedicated server will
+		execute the calls in order (important for chat messages for example). Without it, the queries are packed first
+		fit decreasing, which gives less frames for mixed sizes.
+
+		:param queries: List of queries.
+		:param preserve_order: Keep the execution order of the queries.
+		:return: List of frames, every frame is a list of the indexes of the queries inside.
+		:rtype: list
+		"""
+		sizes = dict()
+		for index, query in enumerate(queries):
+			if isinstance(query, Query):
+				query.prepare()
+				sizes[index] = query.length + self.CALL_OVERHEAD
+
+		capacity = self.capacity
+		frames = list()
+		remaining = list()
+
+		if preserve_order:
+			for index, size in sizes.items():
+				if frames and size <= remaining[-1]:
+					frames[-1].append(index)
+					remaining[-1] -= size
+				else:
+					frames.append([index])
+					remaining.append(capacity - size)
+			return frames
+
+		for index in sorted(sizes, key=sizes.get, reverse=True):
+			size = sizes[index]
+			for frame_nr, free in enumerate(remaining):
+				if size <= free:
+					frames[frame_nr].append(index)
+					remaining[frame_nr] -= size
+					break
+			else:
+				frames.append([index])
+				remaining.append(capacity - size)
+		return [sorted(frame) for frame in frames]
+
+	async def execute_frame(self, queries, frame):
+		"""
+		Execute one planned frame.
+
+		:param queries: All queries.
+		:param frame: List of indexes of the queries to execute.
+		:return: List of (index, result) tuples.
+		"""
+		if len(frame) == 1 and queries[frame[0]].length + self.CALL_OVERHEAD > self.capacity:
+			# The query alone doesn't fit a multicall, but still fits as a direct call.
+			query = queries[frame[0]]
+			try:
+				return [(frame[0], await self.client.execute(query.method, *query.args, timeout=query.timeout))]
+			except Fault as e:
+				return [(frame[0], e)]
+
+		results = await self.client.execute(
+			'system.multicall',
+			[dict(methodName=queries[index].method, params=queries[index].args) for index in frame],
+			timeout=max(queries[index].timeout for index in frame),
+		)
+		return [(index, unwrap_result(result)) for index, result in zip(frame, results)]
+
+	async def stream(self, queries, preserve_order=True):
+		"""
+		Execute the queries and yield the results as soon as their frame completes.
+
+		:param queries: List of queries.
+		:param preserve_order: Keep the execution order of the queries, see :meth:`plan`.
+		:return: Async generator yielding (index, result) tuples.
+		"""
+		frames = self.plan(queries, preserve_order=preserve_order)
+		tasks = [asyncio.ensure_future(self.execute_frame(queries, frame)) for frame in frames]
+		try:
+			for next_done in asyncio.as_completed(tasks):
+				for index, result in await next_done:
+					yield index, result
+		finally:
+			for task in tasks:
+				if not task.done():
+					task.cancel()
+
+	async def execute(self, queries, preserve_order=True):
+		"""
+		Execute the queries and give back the results in the order of the input.
+
+		:param queries: List of queries.
+		:param preserve_order: Keep the execution order of the queries, see :meth:`plan`.
+		:return: List with the results, a Fault instance for the failed queries.
+		:rtype: list
+		"""
+		results = [None] * len(queries)
+		frames = self.plan(queries, preserve_order=preserve_order)
+		for frame_results in await asyncio.gather(*[self.execute_frame(queries, frame) for frame in frames]):
+			for index, result in frame_results:
+				results[index] = result
+		return results
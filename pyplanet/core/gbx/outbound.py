@@ -0,0 +1,210 @@
+"""
+Outbound frame scheduler of the GBX connection, with priority lanes and flow control.
+"""
+import asyncio
+import logging
+
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class OutboundScheduler:
+	"""
+	The outbound scheduler queues all frames that we send to the dedicated server into priority lanes and writes them to
+	the socket one by one, waiting on the transport to drain when its buffer is full. This way the transport buffer stays
+	small and a small gameplay query doesn't have to wait behind megabytes of manialinks or chat messages.
+
+	Lanes (highest priority first):
+
+	- ``control``: Handshake and ``system.*`` calls.
+	- ``gameplay``: Every call that isn't UI or chat.
+	- ``ui``: Manialink pages and UI properties.
+	- ``chat``: Chat messages.
+
+	A frame that waited longer than ``max_wait`` seconds is written before the frames of the higher lanes, so a steady
+	stream of high priority calls can't starve the lower lanes. When writing to the socket fails, the queued frames are
+	dropped and ``on_error`` is called with the exception and the handlers of the lost frames, so the callers waiting on
+	those responses can be failed directly.
+	"""
+
+	LANE_CONTROL = 0
+	LANE_GAMEPLAY = 1
+	LANE_UI = 2
+	LANE_CHAT = 3
+	LANE_NAMES = ('control', 'gameplay', 'ui', 'chat')
+
+	CONTROL_METHODS = {'Authenticate', 'SetApiVersion', 'EnableCallbacks'}
+	UI_PREFIXES = ('SendDisplayManialinkPage', 'SendHideManialinkPage', 'Maniaplanet.UI.', 'Common.UIModules.')
+	CHAT_PREFIXES = ('ChatSend', 'ChatForward')
+
+	# Size of the transport buffer before we wait for the socket to drain.
+	WRITE_BUFFER_HIGH = 64 * 1024
+
+	def __init__(self, writer, loop=None, max_wait=.5, on_error=None):
+		"""
+		Initiate the scheduler.
+
+		:param writer: Stream writer of the connection.
+		:param loop: Event loop.
+		:param max_wait: Seconds a frame can wait before it goes before the frames of the higher lanes.
+		:param on_error: Callable called with the exception and the handler numbers of the lost frames when writing fails.
+		:type writer: asyncio.StreamWriter
+		"""
+		self.writer = writer
+		self.loop = loop or asyncio.get_event_loop()
+		self.max_wait = max_wait
+		self.on_error = on_error
+
+		self.lanes = [deque() for _ in self.LANE_NAMES]
+		self.queued_bytes = 0
+		self.frames_written = 0
+		self.bytes_written = 0
+		self.frames_aged = 0
+		self.frames_dropped = 0
+		self.write_errors = 0
+
+		self.has_frames = asyncio.Event()
+		self.task = None
+
+		try:
+			self.writer.transport.set_write_buffer_limits(high=self.WRITE_BUFFER_HIGH)
+		except (AttributeError, NotImplementedError):
+			pass
+
+	@classmethod
+	def lane_for(cls, method, args=None):
+		"""
+		Determinate the lane of the call given.
+
+		:param method: Method name.
+		:param args: Arguments, used to inspect the calls of a multicall.
+		:return: Lane number.
+		:rtype: int
+		"""
+		if method == 'system.multicall' and args:
+			return min(
+				(cls.lane_for(call['methodName'], call['params']) for call in args[0]), default=cls.LANE_GAMEPLAY
+			)
+		if method == 'TriggerModeScriptEventArray' and args:
+			method = args[0]
+		if method in cls.CONTROL_METHODS or method.startswith('system.'):
+			return cls.LANE_CONTROL
+		if method.startswith(cls.UI_PREFIXES):
+			return cls.LANE_UI
+		if method.startswith(cls.CHAT_PREFIXES):
+			return cls.LANE_CHAT
+		return cls.LANE_GAMEPLAY
+
+	def start(self):
+		self.task = self.loop.create_task(self.run())
+
+	def stop(self):
+		if self.task:
+			self.task.cancel()
+			self.task = None
+
+	def send(self, frame, lane=LANE_GAMEPLAY):
+		"""
+		Queue a frame to be written to the socket.
+
+		:param frame: Complete frame (header + body).
+		:param lane: Lane number.
+		:type frame: bytes
+		"""
+		self.lanes[lane].append((frame, self.loop.time()))
+		self.queued_bytes += len(frame)
+		self.has_frames.set()
+
+	def next_frame(self):
+		"""
+		Get the next frame to write: the first frame of the highest lane, or the oldest frame when it waited too long.
+
+		:return: Frame or None when all lanes are empty.
+		:rtype: bytes
+		"""
+		lanes = [lane for lane in self.lanes if lane]
+		if not lanes:
+			return None
+
+		lane = lanes[0]
+		oldest = min(lanes, key=lambda queue: queue[0][1])
+		if oldest is not lane and self.loop.time() - oldest[0][1] >= self.max_wait:
+			lane = oldest
+			self.frames_aged += 1
+
+		frame, _ = lane.popleft()
+		self.queued_bytes -= len(frame)
+		return frame
+
+	def fail(self, exception, frame):
+		"""
+		Drop the queued frames after writing failed and report the exception with the handlers of the lost frames.
+
+		:param exception: Exception raised by the writer.
+		:param frame: Frame that failed to be written.
+		"""
+		frames = [frame] + [queued for lane in self.lanes for queued, _ in lane]
+		logger.error('Writing to the dedicated server failed, dropping {} queued frames: {}'.format(
+			len(frames) - 1, exception
+		))
+		self.write_errors += 1
+		self.frames_dropped += len(frames) - 1
+		for lane in self.lanes:
+			lane.clear()
+		self.queued_bytes = 0
+
+		if self.on_error:
+			try:
+				self.on_error(exception, [int.from_bytes(lost[4:8], byteorder='little') for lost in frames])
+			except Exception as e:
+				logger.exception(e)
+
+	async def run(self):
+		"""
+		Write the queued frames, highest priority lane first. Keeps running when writing fails.
+		"""
+		while True:
+			frame = self.next_frame()
+			if frame is None:
+				self.has_frames.clear()
+				await self.has_frames.wait()
+				continue
+
+			try:
+				self.writer.write(frame)
+				self.frames_written += 1
+				self.bytes_written += len(frame)
+				await self.writer.drain()
+			except asyncio.CancelledError:
+				raise
+			except Exception as e:
+				self.fail(e, frame)
+
+	@property
+	def bytes_in_flight(self):
+		"""
+		Bytes written but not yet flushed to the socket by the transport.
+		"""
+		try:
+			return self.writer.transport.get_write_buffer_size()
+		except AttributeError:
+			return 0
+
+	def stats(self):
+		"""
+		Get the gauges of the scheduler.
+
+		:return: Dictionary with queue depths and byte counters.
+		:rtype: dict
+		"""
+		return dict(
+			lanes={name: len(lane) for name, lane in zip(self.LANE_NAMES, self.lanes)},
+			queued_bytes=self.queued_bytes,
+			bytes_in_flight=self.bytes_in_flight,
+			frames_written=self.frames_written,
+			bytes_written=self.bytes_written,
+			frames_aged=self.frames_aged,
+			frames_dropped=self.frames_dropped,
+			write_errors=self.write_errors,
+		)
@@ -0,0 +1,159 @@
+"""
+Decoding of the JSON payloads of the mode script callbacks.
+
+The JSON parts are only decoded when there is something in PyPlanet interested in the callback, and then only when the
+payload is actually accessed. ``orjson`` or ``ujson`` are used for the decoding when installed.
+"""
+import json
+
+from collections.abc import MutableMapping
+
+try:
+	import orjson as _json_backend
+except ImportError:
+	try:
+		import ujson as _json_backend
+	except ImportError:
+		_json_backend = json
+
+JSON_BACKEND = _json_backend.__name__
+json_loads = _json_backend.loads
+
+
+def parse_script_payload(raw):
+	"""
+	Decode the raw script callback parts. A list of parts is merged into one dictionary, parts that are no JSON are
+	added as ``raw_<index>``. A single part that can't be decoded is returned as is.
+
+	:param raw: Raw part (str) or list of raw parts.
+	:return: Decoded payload.
+	"""
+	try:
+		if isinstance(raw, list):
+			payload = dict()
+			for idx, part in enumerate(raw):
+				try:
+					payload.update(json_loads(part))
+				except Exception:
+					payload['raw_{}'.format(idx)] = part
+			return payload
+		return json_loads(raw)
+	except Exception:
+		return raw
+
+
+def mentions_response_id(raw):
+	"""
+	Quick check (without decoding) if the raw parts could contain a response id.
+
+	:param raw: Raw part (str) or list of raw parts.
+	:rtype: bool
+	"""
+	if isinstance(raw, list):
+		return any('"responseid"' in part for part in raw if isinstance(part, str))
+	return isinstance(raw, str) and '"responseid"' in raw
+
+
+def is_lazy_compatible(raw):
+	"""
+	Check if the raw parts will decode into a dictionary, and can be wrapped in a :class:`LazyScriptPayload`.
+
+	:param raw: Raw part (str) or list of raw parts.
+	:rtype: bool
+	"""
+	if isinstance(raw, list):
+		return True
+	return isinstance(raw, str) and raw.lstrip().startswith('{')
+
+
+class LazyScriptPayload(MutableMapping):
+	"""
+	Mapping that decodes the raw script callback parts on first access. It behaves like the decoded dictionary, but it
+	isn't a ``dict`` subclass: C-level shortcuts like ``json.dumps()`` read the (empty) storage of a dict subclass
+	directly. Use ``dict(payload)`` or :meth:`copy` when a real dictionary is needed, and check for
+	:class:`collections.abc.Mapping` instead of ``dict``.
+	"""
+
+	__slots__ = ('_raw', '_data', '_on_load')
+
+	def __init__(self, raw, on_load=None):
+		"""
+		Wrap the raw parts.
+
+		:param raw: Raw part (str) or list of raw parts, see :func:`is_lazy_compatible`.
+		:param on_load: Called once the payload is decoded.
+		"""
+		self._raw = raw
+		self._data = None
+		self._on_load = on_load
+
+	@property
+	def is_loaded(self):
+		return self._data is not None
+
+	@property
+	def data(self):
+		"""
+		The decoded payload.
+
+		:rtype: dict
+		"""
+		if self._data is None:
+			self._load()
+		return self._data
+
+	def _load(self):
+		raw, self._raw = self._raw, None
+		payload = parse_script_payload(raw)
+		if not isinstance(payload, dict):
+			payload = dict(raw_0=raw)
+		self._data = payload
+		if self._on_load:
+			self._on_load()
+			self._on_load = None
+
+	def __getitem__(self, key):
+		return self.data[key]
+
+	def __setitem__(self, key, value):
+		self.data[key] = value
+
+	def __delitem__(self, key):
+		del self.data[key]
+
+	def __contains__(self, key):
+		return key in self.data
+
+	def __iter__(self):
+		return iter(self.data)
+
+	def __len__(self):
+		return len(self.data)
+
+	def __eq__(self, other):
+		if isinstance(other, LazyScriptPayload):
+			other = other.data
+		return self.data == other
+
+	def __repr__(self):
+		return repr(self.data)
+
+	def get(self, key, default=None):
+		return self.data.get(key, default)
+
+	def keys(self):
+		return self.data.keys()
+
+	def values(self):
+		return self.data.values()
+
+	def items(self):
+		return self.data.items()
+
+	def copy(self):
+		return self.data.copy()
+
+	__hash__ = None
+
+	def __reduce__(self):
+		return dict, (self.data.copy(),)
@@ -2,15 +2,23 @@
 GBXRemote 2 client for python 3.5+ part of PyPlanet.
 """
 import asyncio
-import json
 import logging
 import struct
+import time
 
-from xmlrpc.client import dumps, loads, Fault
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from xmlrpc.client import dumps, Fault
 from xml.parsers.expat import ExpatError
 
-from pyplanet.core.exceptions import TransportException
+from pyplanet.core.exceptions import ImproperlyConfigured, TransportException
 from pyplanet.core.events.manager import SignalManager
+from pyplanet.core.gbx import capture
+from pyplanet.core.gbx.decoder import DECODERS
+from pyplanet.core.gbx.executor import CallbackExecutor
+from pyplanet.core.gbx.outbound import OutboundScheduler
+from pyplanet.core.gbx.payload import LazyScriptPayload, is_lazy_compatible, mentions_response_id, parse_script_payload
+from pyplanet.core.gbx.stats import GbxStats
 from pyplanet.utils.log import handle_exception
 
 logger = logging.getLogger(__name__)
@@ -23,7 +31,14 @@ class GbxRemote:
 	MAX_REQUEST_SIZE  = 2000000  # 2MB
 	MAX_RESPONSE_SIZE = 4000000  # 4MB
 
-	def __init__(self, host, port, event_pool=None, user=None, password=None, api_version='2013-04-16', instance=None):
+	OFFLOAD_EXECUTORS = {'thread': ThreadPoolExecutor, 'process': ProcessPoolExecutor}
+
+	def __init__(
+		self, host, port, event_pool=None, user=None, password=None, api_version='2013-04-16', instance=None,
+		decoder='gbx', stats_dump=None, stats_dump_interval=60, capture_path=None, offload_threshold=262144,
+		offload_executor='thread', dispatch_concurrency=64, dispatch_queue_limit=2000, dispatch_overload_policy='merge',
+		dispatch_low_priority=None,
+	):
 		"""
 		Initiate the GbxRemote client.
 
@@ -35,6 +50,17 @@ class GbxRemote:
 		:param api_version: API Version to use. In most cases you won't override the default because version changes
 							should be abstracted by the other core components.
 		:param instance: Instance of the app.
+		:param decoder: Name of the XML-RPC decoder engine, see ``pyplanet.core.gbx.decoder.DECODERS``.
+		:param stats_dump: Path of the file to periodically dump the GBX statistics to, None to disable.
+		:param stats_dump_interval: Interval in seconds to dump the statistics.
+		:param capture_path: Path of the file to capture all frames into, None to disable.
+		:param offload_threshold: Size in bytes from which responses are decoded in a worker, 0 to disable.
+		:param offload_executor: Worker to decode large responses in, 'thread' or 'process'.
+		:param dispatch_concurrency: Maximum number of callbacks handled at the same time, 0 to handle every callback
+									 directly without ordering or limits.
+		:param dispatch_queue_limit: Number of waiting callbacks from which low priority callbacks are dropped or merged.
+		:param dispatch_overload_policy: Policy for the low priority callbacks when overloaded, 'drop' or 'merge'.
+		:param dispatch_low_priority: Names of the low priority callbacks, None for the defaults of the executor.
 		:type host: str
 		:type port: str int
 		:type event_pool: asyncio.BaseEventPool
@@ -42,6 +68,16 @@ class GbxRemote:
 		:type password: str
 		:type api_version: str
 		:type instance: pyplanet.core.instance.Instance
+		:type decoder: str
+		:type stats_dump: str
+		:type stats_dump_interval: int
+		:type capture_path: str
+		:type offload_threshold: int
+		:type offload_executor: str
+		:type dispatch_concurrency: int
+		:type dispatch_queue_limit: int
+		:type dispatch_overload_policy: str
+		:type dispatch_low_priority: list
 		"""
 		self.host = host
 		self.port = port
@@ -50,6 +86,13 @@ class GbxRemote:
 		self.api_version = api_version
 		self.instance = instance
 
+		try:
+			self.decode = DECODERS[decoder]
+		except KeyError:
+			raise ImproperlyConfigured(
+				'The GBX decoder \'{}\' doesn\'t exist! Possible decoders: {}'.format(decoder, ', '.join(DECODERS.keys()))
+			)
+
 		self.dedicated_version = None
 		self.dedicated_build = None
 
@@ -61,8 +104,39 @@ class GbxRemote:
 
 		self.script_handlers = dict()
 
+		self.stats = GbxStats()
+		self.stats_dump = stats_dump
+		self.stats_dump_interval = stats_dump_interval
+		self.capture_path = capture_path
+		self.recorder = None
+
+		if offload_executor not in self.OFFLOAD_EXECUTORS:
+			raise ImproperlyConfigured(
+				'The GBX offload executor \'{}\' doesn\'t exist! Possible executors: {}'.format(
+					offload_executor, ', '.join(self.OFFLOAD_EXECUTORS.keys())
+				)
+			)
+		self.offload_threshold = offload_threshold
+		self.offload_executor = offload_executor
+		self.offload_pool = None
+
+		if dispatch_overload_policy not in CallbackExecutor.POLICIES:
+			raise ImproperlyConfigured(
+				'The GBX dispatch overload policy \'{}\' doesn\'t exist! Possible policies: {}'.format(
+					dispatch_overload_policy, ', '.join(CallbackExecutor.POLICIES)
+				)
+			)
+		self.executor = None
+		if dispatch_concurrency:
+			self.executor = CallbackExecutor(
+				self.event_loop, concurrency=dispatch_concurrency, queue_limit=dispatch_queue_limit,
+				policy=dispatch_overload_policy, low_priority=dispatch_low_priority,
+			)
+			self.stats.dispatch = self.executor
+
 		self.reader = None
 		self.writer = None
+		self.outbound = None
 		self.loop_task = None
 
 	@classmethod
@@ -78,7 +152,15 @@ class GbxRemote:
 		"""
 		return cls(
 			instance=instance,
-			host=conf['HOST'], port=conf['PORT'], user=conf['USER'], password=conf['PASSWORD']
+			host=conf['HOST'], port=conf['PORT'], user=conf['USER'], password=conf['PASSWORD'],
+			decoder=conf.get('DECODER', 'gbx'),
+			stats_dump=conf.get('STATS_DUMP', None), stats_dump_interval=conf.get('STATS_DUMP_INTERVAL', 60),
+			capture_path=conf.get('CAPTURE', None),
+			offload_threshold=conf.get('OFFLOAD_THRESHOLD', 262144), offload_executor=conf.get('OFFLOAD_EXECUTOR', 'thread'),
+			dispatch_concurrency=conf.get('DISPATCH_CONCURRENCY', 64),
+			dispatch_queue_limit=conf.get('DISPATCH_QUEUE_LIMIT', 2000),
+			dispatch_overload_policy=conf.get('DISPATCH_OVERLOAD_POLICY', 'merge'),
+			dispatch_low_priority=conf.get('DISPATCH_LOW_PRIORITY', None),
 		)
 
 	def get_next_handler(self):
@@ -125,9 +207,21 @@ class GbxRemote:
 			raise TransportException('Server is not a valid GBXRemote 2 server.')
 		logger.debug('Dedicated connection established!')
 
-		# From now we need to start listening.
+		if self.capture_path:
+			self.recorder = capture.FrameRecorder(self.capture_path)
+			logger.info('Capturing all GBX frames into \'{}\'.'.format(self.capture_path))
+
+		if self.offload_threshold:
+			self.offload_pool = self.OFFLOAD_EXECUTORS[self.offload_executor](max_workers=1)
+
+		# From now we need to start listening and writing.
+		self.outbound = OutboundScheduler(self.writer, loop=self.event_loop, on_error=self.fail_handlers)
+		self.outbound.start()
 		self.loop_task = self.event_loop.create_task(self.listen())
 
+		if self.stats_dump:
+			self.stats.start_dump(self.stats_dump, self.stats_dump_interval, loop=self.event_loop)
+
 		# Startup tasks.
 		await self.execute('Authenticate', self.user, self.password)
 		await asyncio.gather(
@@ -172,6 +266,15 @@ class GbxRemote:
 		if self.loop_task:
 			self.loop_task.cancel()
 			del self.loop_task
+		if self.outbound:
+			self.outbound.stop()
+		self.stats.stop_dump()
+		if self.recorder:
+			self.recorder.close()
+			self.recorder = None
+		if self.offload_pool:
+			self.offload_pool.shutdown(wait=False)
+			self.offload_pool = None
 		if self.reader:
 			del self.reader
 		if self.writer:
@@ -200,10 +303,33 @@ class GbxRemote:
 		# Create new future to be returned.
 		self.handlers[handler] = future = asyncio.Future()
 
-		# Send to server.
-		self.writer.write(length_bytes + handler_bytes + request_bytes)
+		# Queue to be send to the server.
+		self.outbound.send(length_bytes + handler_bytes + request_bytes, self.outbound.lane_for(method, args))
+		self.stats.request(handler, method, len(request_bytes))
+		if self.recorder:
+			self.recorder.record(capture.OUTBOUND, handler, request_bytes)
+
+		try:
+			return await asyncio.wait_for(future, timeout)
+		except asyncio.TimeoutError:
+			self.stats.timeout(handler)
+			raise
+		finally:
+			# Reap the handler when we timed out or got cancelled, a late response will be ignored.
+			if self.handlers.pop(handler, None) is not None:
+				self.stats.discard(handler)
 
-		return await asyncio.wait_for(future, timeout)
+	def fail_handlers(self, exception, handles):
+		"""
+		Fail the calls of the frames that couldn't be written to the dedicated server.
+
+		:param exception: Exception raised when writing.
+		:param handles: Handler numbers of the lost frames.
+		"""
+		for handle in handles:
+			future = self.handlers.get(handle)
+			if future is not None and not future.done():
+				future.set_exception(TransportException('Writing to the dedicated server failed: {}'.format(exception)))
 
 	async def listen(self):
 		"""
@@ -214,21 +340,15 @@ class GbxRemote:
 				head = await self.reader.readexactly(8)
 				size, handle = struct.unpack_from('<LL', head)
 				body = await self.reader.readexactly(size)
-				data = method = fault = None
-
-				try:
-					data, method = loads(body, use_builtin_types=True)
-				except Fault as e:
-					fault = e
-				except ExpatError as e:
-					# See #121 for this solution.
-					handle_exception(exception=e, module_name=__name__, func_name='listen', extra_data={'body': body})
-					continue
 
-				if data and len(data) == 1:
-					data = data[0]
+				if self.recorder:
+					self.recorder.record(capture.INBOUND, handle, body)
 
-				self.event_loop.create_task(self.handle_payload(handle, method, data, fault))
+				# Large responses are decoded in the worker, callbacks always inline to keep them in order.
+				if self.offload_pool and size >= self.offload_threshold and handle in self.handlers:
+					self.event_loop.create_task(self.handle_offloaded_frame(handle, body))
+				else:
+					self.handle_frame(handle, body)
 		except ConnectionResetError as e:
 			logger.critical(
 				'Connection with the dedicated server has been closed, we will now close down the subprocess! {}'.format(str(e))
@@ -240,6 +360,75 @@ class GbxRemote:
 			handle_exception(exception=e, module_name=__name__, func_name='listen')
 			raise
 
+	def handle_frame(self, handle, body):
+		"""
+		Decode a received frame and schedule the handling of it.
+
+		:param handle: Handle number of the frame.
+		:param body: Raw XML-RPC body.
+		:type body: bytes
+		:return: Task handling the payload or None if the body is invalid.
+		:rtype: asyncio.Task
+		"""
+		data = method = fault = None
+
+		try:
+			data, method = self.decode(body)
+		except Fault as e:
+			fault = e
+		except ExpatError as e:
+			# See #121 for this solution.
+			handle_exception(exception=e, module_name=__name__, func_name='listen', extra_data={'body': body})
+			return None
+
+		return self.handle_decoded(handle, len(body), data, method, fault)
+
+	async def handle_offloaded_frame(self, handle, body):
+		"""
+		Decode a received frame in the offload worker and handle it.
+
+		:param handle: Handle number of the frame.
+		:param body: Raw XML-RPC body.
+		:type body: bytes
+		"""
+		data = method = fault = None
+		started = time.perf_counter()
+
+		try:
+			data, method = await self.event_loop.run_in_executor(self.offload_pool, self.decode, body)
+		except Fault as e:
+			fault = e
+		except ExpatError as e:
+			handle_exception(exception=e, module_name=__name__, func_name='listen', extra_data={'body': body})
+			return
+		finally:
+			self.stats.offloaded(len(body), (time.perf_counter() - started) * 1000)
+
+		# The caller timed out or got cancelled while decoding, nobody is waiting on the result anymore.
+		if handle not in self.handlers:
+			logger.debug('GBX: Dropping the offloaded response to handler {}, the call has been reaped.'.format(handle))
+			return
+
+		task = self.handle_decoded(handle, len(body), data, method, fault)
+		if task:
+			await task
+
+	def handle_decoded(self, handle, size, data, method, fault):
+		is_response = handle in self.handlers
+		if is_response:
+			self.stats.response(handle, size, fault is not None)
+
+		if data and len(data) == 1:
+			data = data[0]
+
+		# Responses are handled directly, callbacks are queued in the executor (in order per player).
+		if not is_response and self.executor and method:
+			key, name = self.executor.key_for(method, data)
+			if key is not None:
+				return self.executor.submit(key, name, partial(self.handle_payload, handle, method, data, fault))
+
+		return self.event_loop.create_task(self.handle_payload(handle, method, data, fault))
+
 	async def handle_payload(self, handle_nr, method=None, data=None, fault=None):
 		"""
 		Handle a callback/response payload or fault.
@@ -261,7 +450,8 @@ class GbxRemote:
 		elif fault is not None:
 			raise TransportException('Handle payload got invalid parameters, see fault exception! {}'.format(fault)) from fault
 		else:
-			print(method, handle_nr, data)
+			if logger.isEnabledFor(logging.DEBUG):
+				logger.debug('GBX: Unhandled payload of handler {}, method {}: {}'.format(handle_nr, method, data))
 			logging.warning('Received gbx data, but handle wasn\'t known or payload invalid: handle_nr: {}, method: {}'.format(
 				handle_nr, method,
 			))
@@ -297,38 +487,41 @@ class GbxRemote:
 		except:
 			pass
 
-		# Try to parse JSON, mostly the case.
-		try:
-			if isinstance(raw, list):
-				payload = dict()
-				for idx, part in enumerate(raw):
-					try:
-						payload.update(json.loads(part))
-					except:
-						payload['raw_{}'.format(idx)] = part
-			else:
-				payload = json.loads(raw)
-		except Exception as e:
-			payload = raw
-
-		# Check if payload contains a responseid, when it does, we call the scripted handler future object.
-		if isinstance(payload, dict) and 'responseid' in payload and len(payload['responseid']) > 0:
-			response_id = payload['responseid']
-
-			if response_id in self.script_handlers:
-				logger.debug('GBX: Received scripted response to method: {} and responseid: {}'.format(method, response_id))
-				handler = self.script_handlers.pop(response_id)
-				handler.set_result(payload)
-				handler.done()
-				return
-			else:
-				# We don't have this handler registered, throw warning in console.
-				logger.warning('GBX: Received scripted response with responseid, but no hander was registered! Payload: {}'.format(payload))
-				return
-
-		# If not, we should just throw it as an ordinary callback.
-		logger.debug('GBX: Received scripted callback: {}: {}'.format(method, payload))
+		# Only decode the JSON upfront when it could be the response to one of our script calls.
+		if mentions_response_id(raw):
+			payload = parse_script_payload(raw)
+
+			# Check if payload contains a responseid, when it does, we call the scripted handler future object.
+			if isinstance(payload, dict) and 'responseid' in payload and len(payload['responseid']) > 0:
+				response_id = payload['responseid']
+
+				if response_id in self.script_handlers:
+					logger.debug('GBX: Received scripted response to method: {} and responseid: {}'.format(method, response_id))
+					handler = self.script_handlers.pop(response_id)
+					handler.set_result(payload)
+					handler.done()
+					return
+				else:
+					# We don't have this handler registered, throw warning in console.
+					logger.warning('GBX: Received scripted response with responseid, but no hander was registered! Payload: {}'.format(payload))
+					return
+		else:
+			payload = None
 
+		# If not, we should just throw it as an ordinary callback. Skip the decoding when nobody is interested in it.
 		signal = SignalManager.get_callback('Script.{}'.format(method))
-		if signal:
-			await signal.send_robust(payload)
+		self.stats.script_callback(method, skipped=signal is None)
+		if not signal:
+			return
+
+		if payload is None:
+			if is_lazy_compatible(raw):
+				payload = LazyScriptPayload(raw, on_load=partial(self.stats.script_parsed, method))
+			else:
+				payload = parse_script_payload(raw)
+				self.stats.script_parsed(method)
+		else:
+			self.stats.script_parsed(method)
+
+		logger.debug('GBX: Received scripted callback: {}'.format(method))
+		await signal.send_robust(payload)
@@ -0,0 +1,265 @@
+"""
+Mirror of the server state, caching the results of the idempotent getters of the dedicated server.
+"""
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+_MAP_GETTERS = frozenset({'GetCurrentMapInfo', 'GetNextMapInfo'})
+# The dedicated server applies the NextValue of these getters as CurrentValue when the map changes.
+_MAP_CHANGE_GETTERS = _MAP_GETTERS | {'GetMaxPlayers', 'GetMaxSpectators'}
+_MODE_GETTERS = frozenset({'GetModeScriptSettings', 'GetModeScriptInfo', 'GetScriptName', 'GetGameMode'})
+
+
+class StateMirror:
+	"""
+	The state mirror caches the results of the getters of the dedicated server that don't change without the server
+	telling us (with a callback) or without us changing it (with a setter). Access it with ``instance.gbx.state``.
+
+	The cached getters are served by ``instance.gbx.execute`` (and so ``instance.gbx('GetCurrentMapInfo')``) without
+	a call to the dedicated server. Apps can also read the mirror synchronous:
+
+	.. code-block:: python
+
+		map_info = self.instance.gbx.state.get('GetCurrentMapInfo')
+		if map_info is None:
+			map_info = await self.instance.gbx('GetCurrentMapInfo')
+
+	Entries expire after ``ttl`` seconds as a safety net, the periodic refresh of the client repopulates the mirror.
+
+	.. warning::
+
+		The cached results are shared with every caller and must be handled as read-only, copy a result before
+		modifying it. The mirror never modifies a result it handed out, it replaces the result instead.
+	"""
+
+	CACHED_METHODS = frozenset({
+		'GetVersion', 'GetSystemInfo', 'GameDataDirectory', 'GetMapsDirectory', 'GetSkinsDirectory',
+		'GetServerName', 'GetServerComment', 'GetServerPassword', 'GetServerPasswordForSpectator', 'GetMaxPlayers',
+		'GetMaxSpectators', 'GetHideServer', 'GetLadderServerLimits', 'GetCurrentMapInfo', 'GetNextMapInfo',
+		'GetMapList', 'GetPlayerList', 'GetPlayerInfo', 'GetDetailedPlayerInfo', 'GetModeScriptSettings',
+		'GetModeScriptInfo', 'GetScriptName', 'GetGameMode',
+	})
+	"""
+	Getters that are cached.
+	"""
+
+	CALLBACK_INVALIDATES = {
+		'ManiaPlanet.BeginMap': _MAP_CHANGE_GETTERS,
+		'ManiaPlanet.EndMap': _MAP_CHANGE_GETTERS,
+		'ManiaPlanet.StatusChanged': _MAP_CHANGE_GETTERS,
+		'ManiaPlanet.BeginMatch': _MAP_CHANGE_GETTERS | _MODE_GETTERS,
+		'ManiaPlanet.MapListModified': _MAP_GETTERS | {'GetMapList'},
+		'ManiaPlanet.PlayerConnect': {'GetPlayerList'},
+		'Script.Maniaplanet.LoadingMap_Start': _MAP_CHANGE_GETTERS | _MODE_GETTERS,
+		'Script.Maniaplanet.StartMap_Start': _MAP_CHANGE_GETTERS | _MODE_GETTERS,
+	}
+	"""
+	Getters to invalidate when receiving the callback.
+	"""
+
+	WRITE_INVALIDATES = {
+		'AddMap': {'GetMapList'}, 'AddMapList': {'GetMapList'}, 'InsertMap': {'GetMapList'},
+		'InsertMapList': {'GetMapList'}, 'RemoveMap': {'GetMapList'}, 'RemoveMapList': {'GetMapList'},
+		'ChooseNextMap': {'GetMapList', 'GetNextMapInfo'}, 'ChooseNextMapList': {'GetMapList', 'GetNextMapInfo'},
+		'LoadMatchSettings': {'GetMapList', 'GetNextMapInfo'} | _MODE_GETTERS,
+		'AppendPlaylistFromMatchSettings': {'GetMapList', 'GetNextMapInfo'},
+		'InsertPlaylistFromMatchSettings': {'GetMapList', 'GetNextMapInfo'},
+		'SetNextMapIdent': {'GetNextMapInfo'}, 'SetNextMapIndex': {'GetNextMapInfo'},
+		'JumpToMapIdent': _MAP_GETTERS, 'JumpToMapIndex': _MAP_GETTERS, 'NextMap': _MAP_GETTERS,
+		'RestartMap': _MAP_GETTERS, 'SetScriptName': _MODE_GETTERS, 'SetModeScriptText': _MODE_GETTERS,
+		'ForceSpectator': {'GetPlayerList', 'GetPlayerInfo', 'GetDetailedPlayerInfo'},
+		'ForcePlayerTeam': {'GetPlayerList', 'GetPlayerInfo', 'GetDetailedPlayerInfo'},
+	}
+	"""
+	Getters to invalidate when calling the method, on top of the matching getter of every setter (``SetX`` => ``GetX``).
+	"""
+
+	def __init__(self, ttl=60):
+		"""
+		Initiate the mirror.
+
+		:param ttl: Seconds till an entry expires.
+		"""
+		self.ttl = ttl
+		self.entries = dict()
+		self.generations = dict()
+		self.hits = 0
+		self.misses = 0
+		self.invalidations = 0
+
+	@staticmethod
+	def key(method, args):
+		try:
+			key = (method, args)
+			hash(key)
+			return key
+		except TypeError:
+			return None
+
+	def get(self, method, *args, default=None):
+		"""
+		Read the cached result of a getter.
+
+		:param method: Method name.
+		:param args: Arguments of the getter.
+		:param default: Value when not cached.
+		:return: Cached result (read-only) or the default.
+		"""
+		key = self.key(method, args)
+		entry = self.entries.get(key)
+		if entry is None or entry[1] < time.monotonic():
+			return default
+		return entry[0]
+
+	def lookup(self, method, args):
+		"""
+		Lookup a call, used by the client before calling the dedicated server.
+
+		:return: Tuple with a bool if the result is cached, and the result.
+		"""
+		if method not in self.CACHED_METHODS:
+			return False, None
+		key = self.key(method, args)
+		entry = self.entries.get(key)
+		if entry is None or entry[1] < time.monotonic():
+			self.misses += 1
+			return False, None
+		self.hits += 1
+		return True, entry[0]
+
+	def generation(self, method):
+		return self.generations.get(method, 0)
+
+	def store(self, method, args, result, generation=None):
+		"""
+		Store the result of a getter.
+
+		:param method: Method name.
+		:param args: Arguments of the getter.
+		:param result: Result of the call.
+		:param generation: Generation of the method when the call was started. The result is dropped when the method got
+						   invalidated in the meantime, as the result could be outdated already.
+		"""
+		if method not in self.CACHED_METHODS:
+			return
+		if generation is not None and generation != self.generation(method):
+			return
+		key = self.key(method, args)
+		if key is not None:
+			self.entries[key] = (result, time.monotonic() + self.ttl)
+
+	def invalidate(self, *methods):
+		"""
+		Invalidate all cached results of the methods given.
+
+		:param methods: Method names.
+		"""
+		for method in methods:
+			self.generations[method] = self.generation(method) + 1
+		methods = set(methods)
+		for key in [key for key in self.entries if key[0] in methods]:
+			del self.entries[key]
+		self.invalidations += 1
+
+	def invalidate_login(self, login):
+		"""
+		Invalidate the player specific results of the login given.
+		"""
+		for method in ('GetPlayerInfo', 'GetDetailedPlayerInfo'):
+			self.generations[method] = self.generation(method) + 1
+			for key in [key for key in self.entries if key[0] == method and key[1][:1] == (login,)]:
+				del self.entries[key]
+
+	def clear(self):
+		for method in {key[0] for key in self.entries}:
+			self.generations[method] = self.generation(method) + 1
+		self.entries.clear()
+
+	def on_call(self, method, args):
+		"""
+		Handle a call we send to the dedicated server, invalidating the getters the call affects.
+
+		:param method: Method name.
+		:param args: Arguments.
+		"""
+		if method == 'system.multicall' and args:
+			for call in args[0]:
+				self.on_call(call['methodName'], call['params'])
+			return
+		if method in self.CACHED_METHODS or method.startswith(('Get', 'system.', 'TriggerModeScriptEvent')):
+			return
+
+		invalidates = set(self.WRITE_INVALIDATES.get(method, ()))
+		if method.startswith('Set'):
+			invalidates.add('Get{}'.format(method[3:]))
+		invalidates &= self.CACHED_METHODS
+		if invalidates:
+			self.invalidate(*invalidates)
+
+	def generations_of(self, calls):
+		"""
+		Get the generations of the methods of the calls inside of a multicall, see :meth:`on_multicall_result`.
+
+		:param calls: Calls of the multicall.
+		:return: Dictionary with the method names and their generation.
+		:rtype: dict
+		"""
+		return {call['methodName']: self.generation(call['methodName']) for call in calls}
+
+	def on_multicall_result(self, calls, results, generations=None):
+		"""
+		Store the results of the getters inside of a multicall.
+
+		:param calls: Calls of the multicall.
+		:param results: Raw results of the multicall.
+		:param generations: Generations of the methods when the multicall was started (see :meth:`generations_of`). The
+							results of methods invalidated in the meantime are dropped.
+		"""
+		generations = generations or dict()
+		for call, result in zip(calls, results):
+			method = call['methodName']
+			if method in self.CACHED_METHODS and isinstance(result, list) and len(result) == 1:
+				self.store(method, tuple(call['params']), result[0], generation=generations.get(method))
+
+	def on_callback(self, method, data):
+		"""
+		Update the mirror with a callback of the dedicated server.
+
+		:param method: Callback name, script callbacks prefixed with ``Script.``.
+		:param data: Callback payload.
+		"""
+		if method == 'ManiaPlanet.PlayerInfoChanged' and isinstance(data, dict):
+			self.patch_player(data)
+		elif method == 'ManiaPlanet.PlayerDisconnect' and data:
+			self.invalidate('GetPlayerList')
+			self.invalidate_login(data[0])
+		elif method in self.CALLBACK_INVALIDATES:
+			self.invalidate(*self.CALLBACK_INVALIDATES[method])
+
+	def patch_player(self, info):
+		"""
+		Patch the player lists with the new information of the player.
+
+		:param info: Player info struct, as given by the ``PlayerInfoChanged`` callback.
+		:type info: dict
+		"""
+		login = info.get('Login')
+		for key, (result, expires) in self.entries.items():
+			if key[0] != 'GetPlayerList' or not isinstance(result, list):
+				continue
+			for position, player in enumerate(result):
+				if isinstance(player, dict) and player.get('Login') == login:
+					# The list could have been handed out already, replace it instead of changing it.
+					result = list(result)
+					result[position] = dict(player, **{k: v for k, v in info.items() if k in player})
+					self.entries[key] = (result, expires)
+					break
+		self.invalidate_login(login)
+
+	def stats(self):
+		return dict(
+			entries=len(self.entries), hits=self.hits, misses=self.misses, invalidations=self.invalidations,
+		)
@@ -0,0 +1,307 @@
+"""
+Instrumentation of the GBX connection, latencies, faults, timeouts and sizes per XML-RPC method.
+"""
+import asyncio
+import bisect
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _write_file(path, content):
+	with open(path, 'w') as file:
+		file.write(content)
+
+
+class MethodStats:
+	"""
+	Statistics of a single XML-RPC method.
+	"""
+
+	BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+	"""
+	Upper bounds of the latency histogram buckets in milliseconds. The last bucket holds everything above.
+	"""
+
+	def __init__(self, method):
+		self.method = method
+		self.calls = 0
+		self.responses = 0
+		self.faults = 0
+		self.timeouts = 0
+		self.request_bytes = 0
+		self.response_bytes = 0
+		self.total_time = 0.0
+		self.max_time = 0.0
+		self.histogram = [0] * (len(self.BUCKETS) + 1)
+
+	def record(self, duration, size, fault=False):
+		"""
+		Record a response.
+
+		:param duration: Duration in milliseconds.
+		:param size: Size of the response body.
+		:param fault: Is the response a fault.
+		"""
+		self.responses += 1
+		self.response_bytes += size
+		self.total_time += duration
+		if duration > self.max_time:
+			self.max_time = duration
+		if fault:
+			self.faults += 1
+		self.histogram[bisect.bisect_left(self.BUCKETS, duration)] += 1
+
+	def percentile(self, percentile):
+		"""
+		Estimate the percentile from the histogram (upper bound of the bucket).
+
+		:param percentile: Percentile, 0 - 100.
+		:return: Latency in milliseconds or None without responses.
+		"""
+		if not self.responses:
+			return None
+		threshold = self.responses * percentile / 100
+		seen = 0
+		for bucket, count in enumerate(self.histogram):
+			seen += count
+			if seen >= threshold:
+				return self.BUCKETS[bucket] if bucket < len(self.BUCKETS) else self.max_time
+		return self.max_time
+
+	def as_dict(self):
+		return dict(
+			method=self.method,
+			calls=self.calls,
+			responses=self.responses,
+			faults=self.faults,
+			timeouts=self.timeouts,
+			request_bytes=self.request_bytes,
+			response_bytes=self.response_bytes,
+			avg_ms=round(self.total_time / self.responses, 3) if self.responses else None,
+			max_ms=round(self.max_time, 3),
+			p50_ms=self.percentile(50),
+			p95_ms=self.percentile(95),
+			p99_ms=self.percentile(99),
+			histogram=dict(zip([str(b) for b in self.BUCKETS] + ['inf'], self.histogram)),
+		)
+
+
+class GbxStats:
+	"""
+	Keeps track of the requests in flight and the statistics per method. Access it with ``instance.gbx.stats``.
+
+	The statistics can be dumped to a file periodically with the ``STATS_DUMP`` (path) and ``STATS_DUMP_INTERVAL``
+	(seconds) keys of the ``DEDICATED`` setting. The file is JSON if the path ends with ``.json``, plain text otherwise.
+	"""
+
+	def __init__(self):
+		self.methods = dict()
+		self.in_flight = dict()
+		self.script_callbacks = dict()
+		self.offload = dict(frames=0, bytes=0, total_ms=0.0, max_ms=0.0)
+		self.dispatch = None
+		self.started_at = time.time()
+		self.dump_task = None
+
+	def get(self, method):
+		"""
+		Get the statistics of a method.
+
+		:param method: Method name.
+		:return: Method statistics.
+		:rtype: pyplanet.core.gbx.stats.MethodStats
+		"""
+		try:
+			return self.methods[method]
+		except KeyError:
+			self.methods[method] = stats = MethodStats(method)
+			return stats
+
+	def request(self, handler, method, size):
+		"""
+		Record a request that has been sent.
+
+		:param handler: Handler number.
+		:param method: Method name.
+		:param size: Size of the request body.
+		"""
+		stats = self.get(method)
+		stats.calls += 1
+		stats.request_bytes += size
+		self.in_flight[handler] = (stats, time.perf_counter())
+
+	def response(self, handler, size, fault=False):
+		"""
+		Record a response of a request in flight.
+
+		:param handler: Handler number.
+		:param size: Size of the response body.
+		:param fault: Is the response a fault.
+		"""
+		try:
+			stats, started = self.in_flight.pop(handler)
+		except KeyError:
+			return
+		stats.record((time.perf_counter() - started) * 1000, size, fault)
+
+	def timeout(self, handler):
+		"""
+		Record a timeout of a request in flight.
+
+		:param handler: Handler number.
+		"""
+		try:
+			stats, _ = self.in_flight.pop(handler)
+		except KeyError:
+			return
+		stats.timeouts += 1
+
+	def discard(self, handler):
+		"""
+		Stop tracking a request (cancelled by the caller).
+
+		:param handler: Handler number.
+		"""
+		self.in_flight.pop(handler, None)
+
+	def script_callback(self, method, skipped=False):
+		"""
+		Record a received script callback.
+
+		:param method: Script callback method name.
+		:param skipped: Was the callback skipped without decoding (nothing registered for it).
+		"""
+		try:
+			counters = self.script_callbacks[method]
+		except KeyError:
+			self.script_callbacks[method] = counters = dict(received=0, skipped=0, parsed=0)
+		counters['received'] += 1
+		if skipped:
+			counters['skipped'] += 1
+
+	def script_parsed(self, method):
+		"""
+		Record the decoding of the payload of a script callback.
+
+		:param method: Script callback method name.
+		"""
+		if method in self.script_callbacks:
+			self.script_callbacks[method]['parsed'] += 1
+
+	def offloaded(self, size, duration):
+		"""
+		Record a frame that has been decoded in the offload worker.
+
+		:param size: Size of the body.
+		:param duration: Time from offloading till decoded, in milliseconds.
+		"""
+		self.offload['frames'] += 1
+		self.offload['bytes'] += size
+		self.offload['total_ms'] += duration
+		if duration > self.offload['max_ms']:
+			self.offload['max_ms'] = duration
+
+	def snapshot(self):
+		"""
+		Get all statistics.
+
+		:return: Dictionary with the in flight count and the statistics per method.
+		:rtype: dict
+		"""
+		return dict(
+			time=time.time(),
+			uptime=time.time() - self.started_at,
+			in_flight=len(self.in_flight),
+			methods={method: stats.as_dict() for method, stats in self.methods.items()},
+			script_callbacks={method: dict(counters) for method, counters in self.script_callbacks.items()},
+			offload=dict(self.offload),
+			dispatch=self.dispatch.stats() if self.dispatch else None,
+		)
+
+	def render_text(self):
+		"""
+		Render the statistics into a plain text table, slowest methods (p95) first.
+
+		:return: Text.
+		:rtype: str
+		"""
+		lines = [
+			'GBX statistics, in flight: {}, uptime: {:.0f}s'.format(len(self.in_flight), time.time() - self.started_at),
+			'{:<45} {:>8} {:>7} {:>8} {:>9} {:>9} {:>9} {:>9} {:>12} {:>12}'.format(
+				'method', 'calls', 'faults', 'timeouts', 'avg ms', 'p95 ms', 'p99 ms', 'max ms', 'req bytes', 'resp bytes'
+			),
+		]
+		for stats in sorted(self.methods.values(), key=lambda s: s.percentile(95) or 0, reverse=True):
+			data = stats.as_dict()
+			lines.append('{:<45} {:>8} {:>7} {:>8} {:>9} {:>9} {:>9} {:>9} {:>12} {:>12}'.format(
+				stats.method[:45], data['calls'], data['faults'], data['timeouts'], str(data['avg_ms']),
+				str(data['p95_ms']), str(data['p99_ms']), str(data['max_ms']), data['request_bytes'], data['response_bytes'],
+			))
+		if self.offload['frames']:
+			lines.append('')
+			lines.append('Offloaded decoding: {} frames, {} bytes, avg {:.1f} ms, max {:.1f} ms'.format(
+				self.offload['frames'], self.offload['bytes'], self.offload['total_ms'] / self.offload['frames'],
+				self.offload['max_ms'],
+			))
+		if self.dispatch:
+			dispatch = self.dispatch.stats()
+			lines.append('')
+			lines.append(
+				'Callback dispatch: {queued} queued, {active} active, lag {lag_ms} ms (avg {avg_lag_ms} ms, max {max_lag_ms} '
+				'ms), {handled} handled, {dropped} dropped, {merged} merged'.format(**dispatch)
+			)
+		if self.script_callbacks:
+			lines.append('')
+			lines.append('{:<45} {:>10} {:>10} {:>10}'.format('script callback', 'received', 'skipped', 'parsed'))
+			for method, counters in sorted(self.script_callbacks.items(), key=lambda i: i[1]['received'], reverse=True):
+				lines.append('{:<45} {:>10} {:>10} {:>10}'.format(
+					method[:45], counters['received'], counters['skipped'], counters['parsed']
+				))
+		return '\n'.join(lines) + '\n'
+
+	def render(self, path):
+		"""
+		Render the statistics for the file given (JSON when the path ends with ``.json``).
+
+		:param path: File path.
+		:return: File contents.
+		:rtype: str
+		"""
+		if path.endswith('.json'):
+			return json.dumps(self.snapshot(), indent=2)
+		return self.render_text()
+
+	def dump(self, path):
+		"""
+		Write the statistics to the file given (JSON when the path ends with ``.json``).
+
+		:param path: File path.
+		"""
+		_write_file(path, self.render(path))
+
+	def start_dump(self, path, interval=60, loop=None):
+		"""
+		Start dumping the statistics periodically.
+
+		:param path: File path.
+		:param interval: Interval in seconds.
+		:param loop: Event loop.
+		"""
+		loop = loop or asyncio.get_event_loop()
+		self.dump_task = loop.create_task(self.dump_loop(path, interval, loop))
+
+	def stop_dump(self):
+		if self.dump_task:
+			self.dump_task.cancel()
+			self.dump_task = None
+
+	async def dump_loop(self, path, interval, loop):
+		while True:
+			await asyncio.sleep(interval)
+			try:
+				await loop.run_in_executor(None, _write_file, path, self.render(path))
+			except Exception as e:
+				logger.warning('Can\'t dump the GBX statistics to \'{}\': {}'.format(path, str(e)))
@@ -16,10 +16,12 @@ from pyplanet import __version__ as version
 from pyplanet.apps import Apps
 from pyplanet.conf import settings
 from pyplanet.core import signals
-from pyplanet.core.events import SignalManager
+from pyplanet.core.events import Signal, SignalManager
+from pyplanet.core.events.profiler import SignalProfiler
 from pyplanet.core.db.database import Database
 from pyplanet.core.game import Game
 from pyplanet.core.gbx import GbxClient
+from pyplanet.core.journal import EventJournal
 from pyplanet.core.exceptions import ImproperlyConfigured
 from pyplanet.core.storage.storage import Storage
 from pyplanet.core.ui import GlobalUIManager
@@ -74,6 +76,7 @@ class Instance:
 		self.db = 					Database.create_from_settings(self, settings.DATABASES[self.process_name])
 		self.storage =				Storage.create_from_settings(self, settings.STORAGE[self.process_name])
 		self.signals =				SignalManager
+		self.journal =				EventJournal.create_from_settings(self, settings.JOURNAL.get(self.process_name, dict()))
 		self.ui_manager =			GlobalUIManager(self)
 		self.apps = 				Apps(self)
 
@@ -86,6 +89,10 @@ class Instance:
 		self.mode_manager =				ModeManager(self)
 		self.chat_manager = self.chat = ChatManager(self)
 
+		# Opt-in profiling of the signal receivers.
+		if settings.SIGNAL_PROFILING:
+			Signal.profiler = SignalProfiler(threshold=settings.SIGNAL_PROFILING_THRESHOLD)
+
 		# Populate apps.
 		self.apps.populate(settings.MANDATORY_APPS, in_order=True)
 		try:
@@ -162,6 +169,7 @@ class Instance:
 		await self.db.connect()				# Connect and initial state.
 		await self.apps.discover() 			# Discover apps models.
 		await self.db.initiate() 			# Execute migrations and initial tasks.
+		await self.db.write_behind.start()	# Start writing the queued writes.
 		await self.apps.check(True)    		# Check for incompatible apps and remove them.
 		await self.apps.init()				# Initiate apps
 		await self.ui_manager.on_start()    # Initiate UI manager.
@@ -185,6 +193,7 @@ class Instance:
 
 		# Utils.
 		await Analytics.start(self)
+		await self.journal.start()
 
 		# Finish signalling and send finish signal.
 		await self.signals.finish_start()
@@ -195,6 +204,8 @@ class Instance:
 		The stop coroutine is executed when the process exits with the SIGINT signal.
 		"""
 		await self.apps.stop()
+		await self.db.write_behind.stop()
+		await self.journal.stop()
 
 	async def print_header(self):  # pragma: no cover
 		await self.chat.execute(
@@ -0,0 +1,8 @@
+from .journal import EventJournal
+from .reader import JournalEvent, read_journal
+
+__all__ = [
+	'EventJournal',
+	'JournalEvent',
+	'read_journal',
+]
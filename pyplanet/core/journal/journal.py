@@ -0,0 +1,228 @@
+import asyncio
+import datetime
+import json
+import logging
+import os
+import time
+
+from collections.abc import Mapping
+
+from pyplanet.conf import settings
+from pyplanet.core.events import Signal, SignalManager
+
+logger = logging.getLogger(__name__)
+
+_SKIP = object()
+
+
+def serialize(value):
+	"""
+	Convert a signal payload (value) into JSON compatible data. Players and maps are journaled by their login or uid,
+	other objects that can't be represented are left out.
+
+	:param value: Payload value.
+	:return: JSON compatible value.
+	"""
+	if value is None or isinstance(value, (bool, int, float, str)):
+		return value
+	if isinstance(value, Mapping):
+		data = dict()
+		for key, item in value.items():
+			item = serialize(item)
+			if item is not _SKIP:
+				data[str(key)] = item
+		return data
+	if isinstance(value, (list, tuple, set)):
+		return [item for item in (serialize(item) for item in value) if item is not _SKIP]
+
+	for attribute in ('login', 'uid'):
+		identifier = getattr(value, attribute, None)
+		if isinstance(identifier, str):
+			return identifier
+	return _SKIP
+
+
+class EventJournal:
+	"""
+	The event journal mirrors signals into append-only files, so statistics, audits and replay tooling can work with the
+	events offline instead of writing to the database while handling the event. Access it with ``instance.journal``.
+
+	Every event is written as one JSON line (``{"t": timestamp, "s": signal, "d": payload}``). The events are collected
+	in memory and written in batches by a background task, the file is rotated when it reaches the maximum size. Read
+	the journal with :func:`pyplanet.core.journal.read_journal`.
+
+	Mirror signals with the ``SIGNALS`` key of the ``JOURNAL`` setting or from an app:
+
+	.. code-block:: python
+
+		self.instance.journal.mirror('trackmania:finish', fields=['player', 'race_time', 'lap_cps'])
+
+	"""
+
+	def __init__(self, directory, signals=None, max_size=64 * 1024 * 1024, flush_interval=1., batch_size=1000,
+				 loop=None):
+		"""
+		Initiate the journal.
+
+		:param directory: Directory to write the journal files into.
+		:param signals: Signals to mirror when starting (instances or ``namespace:code`` strings).
+		:param max_size: Size in bytes to rotate the journal file at.
+		:param flush_interval: Seconds between writing the collected events.
+		:param batch_size: Number of collected events to write directly, without waiting for the interval.
+		:param loop: Event loop.
+		"""
+		self.directory = directory
+		self.signals = list(signals or [])
+		self.max_size = max_size
+		self.flush_interval = flush_interval
+		self.batch_size = batch_size
+		self.loop = loop or asyncio.get_event_loop()
+
+		self.pending = list()
+		self.lock = asyncio.Lock()
+		self.flush_task = None
+		self.flush_future = None
+
+		self.file = None
+		self.path = None
+		self.size = 0
+		self.events = 0
+		self.files = 0
+		self.lost = 0
+
+	@classmethod
+	def create_from_settings(cls, instance, conf):
+		"""
+		Create the journal from the configuration of the pool.
+
+		:param instance: Instance of the controller.
+		:param conf: Journal settings for the pool.
+		:type conf: dict
+		:rtype: pyplanet.core.journal.EventJournal
+		"""
+		directory = conf.get('DIRECTORY', 'journal')
+		if not os.path.isabs(directory):
+			directory = os.path.join(settings.ROOT_PATH or os.getcwd(), directory, instance.process_name)
+		return cls(
+			directory, signals=conf.get('SIGNALS', []), max_size=conf.get('MAX_SIZE', 64 * 1024 * 1024),
+			flush_interval=conf.get('FLUSH_INTERVAL', 1), loop=instance.loop,
+		)
+
+	async def start(self):
+		"""
+		Mirror the configured signals and start the writer.
+		"""
+		for signal in self.signals:
+			self.mirror(signal)
+		self.flush_task = self.loop.create_task(self.flush_loop())
+
+	async def stop(self):
+		"""
+		Stop the writer, write the remaining events and close the file.
+		"""
+		if self.flush_task:
+			self.flush_task.cancel()
+			self.flush_task = None
+		await self.flush()
+		if self.file:
+			self.file.close()
+			self.file = None
+
+	def mirror(self, signal, fields=None):
+		"""
+		Mirror a signal into the journal.
+
+		:param signal: Signal instance or ``namespace:code`` string.
+		:param fields: Payload fields to journal, all (serializable) fields by default.
+		:type signal: pyplanet.core.events.dispatcher.Signal | str
+		:type fields: list
+		"""
+		if isinstance(signal, Signal):
+			code = '{}:{}'.format(signal.namespace, signal.code) if signal.namespace else signal.code
+		else:
+			code = signal
+
+		def receiver(signal=None, **kwargs):
+			self.record(code, kwargs, fields)
+
+		SignalManager.listen(signal, receiver, weak=False, dispatch_uid=('journal', code))
+
+	def record(self, code, payload, fields=None):
+		"""
+		Add an event to the journal.
+
+		:param code: Signal code.
+		:param payload: Payload of the event.
+		:param fields: Payload fields to journal, all (serializable) fields by default.
+		"""
+		if fields is not None:
+			payload = {field: payload.get(field) for field in fields}
+		self.pending.append(dict(t=round(time.time(), 3), s=code, d=serialize(payload)))
+
+		if len(self.pending) >= self.batch_size and (self.flush_future is None or self.flush_future.done()):
+			self.flush_future = asyncio.ensure_future(self.flush())
+
+	async def flush_loop(self):
+		while True:
+			await asyncio.sleep(self.flush_interval)
+			try:
+				await self.flush()
+			except Exception as e:
+				logger.exception(e)
+
+	async def flush(self):
+		"""
+		Write the collected events. The events are lost (and counted) when writing fails.
+		"""
+		async with self.lock:
+			if not self.pending:
+				return
+			events, self.pending = self.pending, list()
+			try:
+				await self.loop.run_in_executor(None, self.write, events)
+			except Exception as e:
+				self.lost += len(events)
+				logger.error('Writing {} events into the event journal failed, {} events lost in total: {}'.format(
+					len(events), self.lost, e
+				))
+
+	def write(self, events):
+		"""
+		Write events to the journal file, rotating the file when needed. Executed in a worker thread.
+
+		:param events: Events.
+		:type events: list
+		"""
+		data = ''.join(json.dumps(event, separators=(',', ':')) + '\n' for event in events).encode()
+		if self.file is None or (self.size and self.size + len(data) > self.max_size):
+			self.rotate()
+		self.file.write(data)
+		self.file.flush()
+		self.size += len(data)
+		self.events += len(events)
+
+	def rotate(self):
+		"""
+		Close the current journal file and open a new one.
+		"""
+		if self.file:
+			self.file.close()
+
+		os.makedirs(self.directory, exist_ok=True)
+		now, number = datetime.datetime.now(), 0
+		path = os.path.join(self.directory, 'events-{:%Y%m%d-%H%M%S}-{:03d}.jsonl'.format(now, number))
+		while os.path.exists(path):
+			number += 1
+			path = os.path.join(self.directory, 'events-{:%Y%m%d-%H%M%S}-{:03d}.jsonl'.format(now, number))
+
+		self.path = path
+		self.file = open(path, 'ab')
+		self.size = 0
+		self.files += 1
+		logger.debug('Writing event journal into \'{}\''.format(path))
+
+	def stats(self):
+		return dict(
+			path=self.path, files=self.files, events=self.events, pending=len(self.pending), size=self.size,
+			lost=self.lost,
+		)
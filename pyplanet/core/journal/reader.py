@@ -0,0 +1,58 @@
+import json
+import logging
+import os
+
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+JournalEvent = namedtuple('JournalEvent', ['timestamp', 'signal', 'payload'])
+
+
+def journal_files(path):
+	"""
+	Get the journal files of a directory in the order they have been written.
+
+	:param path: Journal directory or a single journal file.
+	:return: List of file paths.
+	"""
+	if os.path.isfile(path):
+		return [path]
+	return [
+		os.path.join(path, name) for name in sorted(os.listdir(path))
+		if name.startswith('events-') and name.endswith('.jsonl')
+	]
+
+
+def read_journal(path, signals=None, since=None, until=None):
+	"""
+	Read the events from the journal.
+
+	.. code-block:: python
+
+		for event in read_journal('journal/default', signals={'trackmania:finish'}):
+			print(event.timestamp, event.payload['player'], event.payload['race_time'])
+
+	:param path: Journal directory or a single journal file.
+	:param signals: Only read the events of these signals.
+	:param since: Only read the events from this timestamp.
+	:param until: Only read the events before this timestamp.
+	:return: Generator of ``JournalEvent`` tuples.
+	"""
+	for file_path in journal_files(path):
+		with open(file_path, 'rb') as file:
+			for number, line in enumerate(file, start=1):
+				try:
+					event = json.loads(line.decode())
+				except ValueError:
+					# The last line can be incomplete when the controller got killed while writing.
+					logger.warning('Skipping invalid journal line {} of \'{}\''.format(number, file_path))
+					continue
+
+				if signals is not None and event['s'] not in signals:
+					continue
+				if since is not None and event['t'] < since:
+					continue
+				if until is not None and event['t'] >= until:
+					continue
+				yield JournalEvent(event['t'], event['s'], event['d'])
@@ -0,0 +1,49 @@
+import asyncio
+import logging
+
+from pyplanet.core.gbx.fake_server import FakeDedicatedServer
+from pyplanet.core.management import BaseCommand
+
+
+class Command(BaseCommand):  # pragma: no cover
+	help = 'Start a fake dedicated server with virtual players, to load test PyPlanet without a real dedicated server.'
+
+	requires_system_checks = False
+	requires_migrations_checks = False
+
+	def add_arguments(self, parser):
+		parser.add_argument('--host', type=str, default='127.0.0.1')
+		parser.add_argument('--port', type=int, default=5000)
+		parser.add_argument('--players', type=int, default=100, help='Number of virtual players.')
+		parser.add_argument('--maps', type=int, default=10, help='Number of maps in the map list.')
+		parser.add_argument('--waypoint-rate', type=float, default=0.3, help='Waypoints per player per second.')
+		parser.add_argument('--chat-rate', type=float, default=0.01, help='Chat messages per player per second.')
+		parser.add_argument('--answer-rate', type=float, default=0.05, help='Manialink answers per player per second.')
+		parser.add_argument('--stats-interval', type=int, default=10, help='Seconds between printing the counters.')
+
+	def handle(self, *args, **options):
+		logging.basicConfig(level=logging.INFO)
+		loop = asyncio.get_event_loop()
+		server = FakeDedicatedServer(
+			host=options['host'], port=options['port'], players=options['players'], maps=options['maps'],
+			waypoint_rate=options['waypoint_rate'], chat_rate=options['chat_rate'], answer_rate=options['answer_rate'],
+			loop=loop,
+		)
+		loop.run_until_complete(server.start())
+		try:
+			loop.run_until_complete(self.print_stats(server, options['stats_interval']))
+		except KeyboardInterrupt:
+			pass
+		finally:
+			loop.run_until_complete(server.stop())
+
+	async def print_stats(self, server, interval):
+		last_callbacks = last_requests = 0
+		while True:
+			await asyncio.sleep(interval)
+			stats = server.stats()
+			self.stdout.write('Connections: {}, callbacks: {:.1f}/s, requests: {:.1f}/s'.format(
+				stats['connections'], (stats['callbacks_sent'] - last_callbacks) / interval,
+				(stats['requests'] - last_requests) / interval,
+			))
+			last_callbacks, last_requests = stats['callbacks_sent'], stats['requests']
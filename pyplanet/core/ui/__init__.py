@@ -4,6 +4,7 @@ import logging
 from xmlrpc.client import Fault
 
 from pyplanet.apps.core.maniaplanet.models import Player
+from pyplanet.core.ui.router import ActionRouter
 from pyplanet.core.ui.ui_properties import UIProperties
 from pyplanet.utils.log import handle_exception
 
@@ -200,10 +201,12 @@ class GlobalUIManager(_BaseUIManager):
 		super().__init__(instance)
 		self.app_managers = dict()
 		self.properties = UIProperties(self.instance)
+		self.router = ActionRouter()
 
 	async def on_start(self):
 		await super().on_start()
 		await self.properties.on_start()
+		await self.router.on_start()
 
 		# Start app ui managers.
 		await asyncio.gather(*[
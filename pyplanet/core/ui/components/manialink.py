@@ -4,7 +4,7 @@ import logging
 
 from asyncio import iscoroutinefunction
 
-from pyplanet.core.events import SignalManager
+from pyplanet.core.events import KeyPrefix, SignalManager
 from pyplanet.core.ui.exceptions import ManialinkMemoryLeakException
 from pyplanet.core.ui.template import Template
 
@@ -54,11 +54,64 @@ class _ManiaLink:
 		self._is_global_shown = False
 		self._is_player_shown = dict()  # Holds per player login a boolean if the ml is shown.
 
-		self.__register_listener = False
+		self.__routed_id = None
+		self.__routed_by = None
+
+	@property
+	def router(self):
+		"""
+		The action router of the global UI manager, None when not available.
+
+		:rtype: pyplanet.core.ui.router.ActionRouter
+		"""
+		try:
+			return self.manager.instance.ui_manager.router
+		except AttributeError:
+			return None
+
+	def register_route(self):
+		"""
+		Route the actions of the manialink to the handle method.
+		"""
+		if self.__routed_id == self.id:
+			return
+		if self.__routed_id is not None:
+			# The id has been changed after subscribing.
+			self.unregister_route()
+
+		router = self.router
+		if router:
+			router.add(self)
+		else:
+			SignalManager.listen('maniaplanet:manialink_answer', self.handle, conditions={'action': KeyPrefix(self.id)})
+		self.__routed_id = self.id
+		self.__routed_by = router
+
+	def unregister_route(self):
+		"""
+		Stop routing the actions of the manialink, the same way as they have been routed when registering.
+		"""
+		if self.__routed_id is None:
+			return
+		if self.__routed_by:
+			self.__routed_by.remove(self, self.__routed_id)
+		else:
+			SignalManager.get_signal('maniaplanet:manialink_answer').unregister(self.handle)
+		self.__routed_id = None
+		self.__routed_by = None
 
 	async def is_global(self):
 		return not self.player_data or self.player_data.keys() == 0
 
+	def is_shown_to(self, login):
+		"""
+		Is the manialink shown to the player (globally or to the player specific).
+
+		:param login: Player login.
+		:rtype: bool
+		"""
+		return self._is_global_shown or login in self._is_player_shown
+
 	async def get_template(self):
 		return self._template
 
@@ -113,10 +166,8 @@ class _ManiaLink:
 		else:
 			self._is_global_shown = True
 
-		if not self.__register_listener:
-			# Register handle
-			SignalManager.listen('maniaplanet:manialink_answer', self.handle)
-			self.__register_listener = True
+		# Route the actions to the handle.
+		self.register_route()
 
 		return await self.manager.send(self, player_logins, **kwargs)
 
@@ -148,6 +199,7 @@ class _ManiaLink:
 		if action not in self.receivers:
 			self.receivers[action] = list()
 		self.receivers[action].append(target)
+		self.register_route()
 
 	async def handle(self, player, action, values, **kwargs):
 		if not action.startswith(self.id):
@@ -198,7 +250,7 @@ class _ManiaLink:
 		Will also hide the Manialink for all users!
 		"""
 		try:
-			SignalManager.get_signal('maniaplanet:manialink_answer').unregister(self.handle)
+			self.unregister_route()
 		except Exception as e:
 			logging.exception(e)
 		try:
@@ -218,7 +270,7 @@ class _ManiaLink:
 		be executed at the same time. Be aware with this one!
 		"""
 		try:
-			SignalManager.get_signal('maniaplanet:manialink_answer').unregister(self.handle)
+			self.unregister_route()
 			asyncio.ensure_future(self.manager.destroy(self))
 		except Exception as e:
 			logging.exception(e)
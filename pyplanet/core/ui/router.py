@@ -0,0 +1,116 @@
+import logging
+import weakref
+
+from pyplanet.core.events import SignalManager
+
+logger = logging.getLogger(__name__)
+
+
+class ActionRouter:
+	"""
+	The action router is the only listener of the manialink answers. It routes the answer of the player to the manialink
+	the action belongs to, by looking up the manialink id in the routing table instead of passing the answer to all the
+	manialinks. Access it with ``instance.ui_manager.router``.
+
+	The actions of a manialink have the format ``{manialink_id}__{action_name}``. The router resolves the manialink id,
+	the manialink looks up the receivers of the action name in its own receivers (see
+	:meth:`pyplanet.core.ui.components.manialink._ManiaLink.subscribe`). The action names aren't part of the routing
+	table, as the manialink that is shown to the player has to be known first and the actions without receivers are
+	handled by the catch all of the manialink.
+	"""
+
+	SEPARATOR = '__'
+
+	def __init__(self):
+		self.routes = dict()
+		self.routed = 0
+		self.unrouted = 0
+
+	async def on_start(self):
+		SignalManager.listen('maniaplanet:manialink_answer', self.handle)
+
+	def add(self, manialink):
+		"""
+		Add the manialink to the routing table. Several manialinks can share an id, like the views that are created per
+		player, the answer is routed to the manialink that is shown to the player.
+
+		:param manialink: Manialink instance.
+		:type manialink: pyplanet.core.ui.components.manialink._ManiaLink
+		"""
+		refs = self.routes.setdefault(manialink.id, list())
+		if not any(ref() is manialink for ref in refs):
+			refs.append(weakref.ref(manialink))
+
+	def remove(self, manialink, identifier=None):
+		"""
+		Remove the manialink from the routing table.
+
+		:param manialink: Manialink instance.
+		:param identifier: Identifier the manialink is routed with, the current id of the manialink by default.
+		:type manialink: pyplanet.core.ui.components.manialink._ManiaLink
+		"""
+		identifier = identifier or manialink.id
+		refs = self.routes.get(identifier)
+		if refs is None:
+			return
+		refs[:] = [ref for ref in refs if ref() not in (manialink, None)]
+		if not refs:
+			del self.routes[identifier]
+
+	def _manialinks(self, identifier):
+		refs = self.routes.get(identifier)
+		if refs is None:
+			return list()
+		manialinks = [ref() for ref in refs]
+		if None in manialinks:
+			refs[:] = [ref for ref, manialink in zip(refs, manialinks) if manialink is not None]
+			manialinks = [manialink for manialink in manialinks if manialink is not None]
+			if not refs:
+				del self.routes[identifier]
+		return manialinks
+
+	def resolve(self, action, login=None):
+		"""
+		Get the manialink of the action. When several manialink ids match, the longest one is used. When several
+		manialinks share the id, the manialink shown to the player is used, or the last added one if none is shown.
+
+		:param action: Action string.
+		:param login: Login of the player that answered.
+		:return: Manialink instance or None.
+		:rtype: pyplanet.core.ui.components.manialink._ManiaLink
+		"""
+		candidates = [action]
+		position = action.find(self.SEPARATOR)
+		while position > 0:
+			candidates.append(action[:position])
+			position = action.find(self.SEPARATOR, position + 1)
+
+		for identifier in sorted(candidates, key=len, reverse=True):
+			manialinks = self._manialinks(identifier)
+			if not manialinks:
+				continue
+			if login is not None and len(manialinks) > 1:
+				for manialink in reversed(manialinks):
+					if manialink.is_shown_to(login):
+						return manialink
+			return manialinks[-1]
+		return None
+
+	async def handle(self, player, action, values, **kwargs):
+		manialink = self.resolve(action, login=player.login if player else None)
+		if manialink is None:
+			self.unrouted += 1
+			logger.debug('No manialink found for action \'{}\''.format(action))
+			return
+
+		self.routed += 1
+		return await manialink.handle(player, action, values)
+
+	def stats(self):
+		"""
+		Get the statistics of the router.
+
+		:return: Dictionary with the number of routes and the routed/unrouted actions.
+		:rtype: dict
+		"""
+		return dict(routes=len(self.routes), routed=self.routed, unrouted=self.unrouted)
@@ -0,0 +1,162 @@
+import time
+
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+
+class IdentityMap(MutableMapping):
+	"""
+	Bounded identity map, used as cache of model instances (``Player.CACHE`` and ``Map.CACHE``). The map holds one
+	instance per key, so all parts of PyPlanet work with the same instance.
+
+	Pinned keys (online players, maps of the playlist) are never evicted. The other entries are evicted when they have
+	not been accessed for ``ttl`` seconds, or when there are more than ``max_size`` of them (least recently used first).
+	"""
+
+	def __init__(self, max_size=None, ttl=None):
+		"""
+		Initiate the map.
+
+		:param max_size: Maximum number of entries that are not pinned, None for no maximum.
+		:param ttl: Seconds after the last access to evict entries that are not pinned, None to never expire.
+		"""
+		self.max_size = max_size
+		self.ttl = ttl
+
+		self._entries = OrderedDict()
+		self._pinned = dict()
+		self._pins = set()
+
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self.expirations = 0
+
+	def _lookup(self, key):
+		if key in self._pinned:
+			return True, self._pinned[key]
+
+		entry = self._entries.get(key)
+		if entry is None:
+			return False, None
+		now = time.monotonic()
+		if self.ttl is not None and now - entry[1] > self.ttl:
+			del self._entries[key]
+			self.expirations += 1
+			return False, None
+		entry[1] = now
+		self._entries.move_to_end(key)
+		return True, entry[0]
+
+	def get(self, key, default=None):
+		"""
+		Get the instance of the key, counted in the hit/miss statistics.
+
+		:param key: Key.
+		:param default: Default when not in the map.
+		"""
+		found, value = self._lookup(key)
+		if not found:
+			self.misses += 1
+			return default
+		self.hits += 1
+		return value
+
+	def __getitem__(self, key):
+		found, value = self._lookup(key)
+		if not found:
+			raise KeyError(key)
+		return value
+
+	def __contains__(self, key):
+		return self._lookup(key)[0]
+
+	def __setitem__(self, key, value):
+		if key in self._pins:
+			self._pinned[key] = value
+			self._entries.pop(key, None)
+			return
+
+		self._entries[key] = [value, time.monotonic()]
+		self._entries.move_to_end(key)
+		self.prune()
+
+	def __delitem__(self, key):
+		self._pins.discard(key)
+		if key in self._pinned:
+			del self._pinned[key]
+		else:
+			del self._entries[key]
+
+	def __iter__(self):
+		return iter(list(self._pinned) + list(self._entries))
+
+	def __len__(self):
+		return len(self._pinned) + len(self._entries)
+
+	def clear(self):
+		"""
+		Remove all instances, the pins are kept.
+		"""
+		self._pinned.clear()
+		self._entries.clear()
+
+	def pin(self, key):
+		"""
+		Pin the key, the instance of the key will not be evicted till it's unpinned.
+
+		:param key: Key.
+		"""
+		self._pins.add(key)
+		if key in self._entries:
+			self._pinned[key] = self._entries.pop(key)[0]
+
+	def unpin(self, key):
+		"""
+		Unpin the key, the instance can be evicted again.
+
+		:param key: Key.
+		"""
+		self._pins.discard(key)
+		if key in self._pinned:
+			self._entries[key] = [self._pinned.pop(key), time.monotonic()]
+			self.prune()
+
+	def pin_only(self, keys):
+		"""
+		Replace the pinned keys with the keys given.
+
+		:param keys: Keys to pin.
+		"""
+		keys = set(keys)
+		for key in self._pins - keys:
+			self.unpin(key)
+		for key in keys - self._pins:
+			self.pin(key)
+
+	def prune(self):
+		"""
+		Evict the expired entries and the least recently used entries above the maximum size.
+		"""
+		now = time.monotonic()
+		while self._entries:
+			key, entry = next(iter(self._entries.items()))
+			if self.ttl is not None and now - entry[1] > self.ttl:
+				self.expirations += 1
+			elif self.max_size is not None and len(self._entries) > self.max_size:
+				self.evictions += 1
+			else:
+				break
+			del self._entries[key]
+
+	def stats(self):
+		"""
+		Get the statistics of the map.
+
+		:return: Dictionary with the sizes and counters.
+		:rtype: dict
+		"""
+		return dict(
+			size=len(self), pinned=len(self._pinned), hits=self.hits, misses=self.misses, evictions=self.evictions,
+			expirations=self.expirations,
+		)
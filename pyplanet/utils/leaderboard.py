@@ -0,0 +1,151 @@
+import bisect
+import itertools
+
+from collections.abc import Sequence
+from operator import attrgetter
+
+
+class Leaderboard(Sequence):
+	"""
+	Leaderboard of records, sorted by score (lowest first) and indexed by login. Positions are found by bisecting the
+	sorted scores, so getting the rank of a player and improving a record don't scan or re-sort the records. Records
+	with the same score are ranked in the order they have been submitted.
+
+	Getting the record of a player is O(1) and getting the rank is O(log n). Submitting and removing a record is an
+	O(log n) search plus moving the references after the position in the list (O(n), but a single ``memmove``). Storing
+	the positions for O(1) ranks would need updating all the positions after every change, and a tree or skip list in
+	Python is slower than the ``memmove`` for the sizes of record lists (up to some thousands of records).
+
+	The leaderboard can be used like the sorted list of records: index it, slice it, iterate over it and use ``len()``.
+
+	.. code-block:: python
+
+		records = Leaderboard(record_list, login=lambda record: record.player.login)
+		rank = records.submit(record)
+		rank = records.rank('login')
+		top = records[:10]
+
+	"""
+
+	def __init__(self, entries=None, score=attrgetter('score'), login=attrgetter('login')):
+		"""
+		Initiate the leaderboard.
+
+		:param entries: Records to start with.
+		:param score: Function to get the score of a record.
+		:param login: Function to get the login of the player of a record.
+		"""
+		self.score = score
+		self.login = login
+
+		self._entries = list()
+		self._keys = list()
+		self._by_login = dict()
+		self._counter = itertools.count()
+
+		if entries:
+			self.reset(entries)
+
+	def reset(self, entries):
+		"""
+		Replace all records.
+
+		:param entries: Records, in any order.
+		"""
+		self._entries = list()
+		self._keys = list()
+		self._by_login = dict()
+
+		for entry in sorted(entries, key=self.score):
+			login = self.login(entry)
+			if login in self._by_login:
+				continue
+			key = (self.score(entry), next(self._counter))
+			self._entries.append(entry)
+			self._keys.append(key)
+			self._by_login[login] = (entry, key)
+
+	def clear(self):
+		self.reset(())
+
+	def get(self, login, default=None):
+		"""
+		Get the record of the player.
+
+		:param login: Login of the player.
+		:param default: Default when the player has no record.
+		"""
+		item = self._by_login.get(login)
+		return item[0] if item else default
+
+	def rank(self, login):
+		"""
+		Get the rank of the record of the player, O(log n).
+
+		:param login: Login of the player.
+		:return: Rank (starting at 1) or None when the player has no record.
+		:rtype: int
+		"""
+		item = self._by_login.get(login)
+		if item is None:
+			return None
+		return bisect.bisect_left(self._keys, item[1]) + 1
+
+	def submit(self, entry):
+		"""
+		Add the record, or move it when the player already has a record. The score of the record can be changed in place
+		before submitting it again. O(log n) to find the position, the insert moves the records after it.
+
+		:param entry: Record.
+		:return: New rank of the record (starting at 1).
+		:rtype: int
+		"""
+		login = self.login(entry)
+		if login in self._by_login:
+			self._remove_at(bisect.bisect_left(self._keys, self._by_login[login][1]))
+
+		key = (self.score(entry), next(self._counter))
+		position = bisect.bisect_right(self._keys, key)
+		self._entries.insert(position, entry)
+		self._keys.insert(position, key)
+		self._by_login[login] = (entry, key)
+		return position + 1
+
+	def remove(self, login):
+		"""
+		Remove the record of the player.
+
+		:param login: Login of the player.
+		:return: Removed record or None.
+		"""
+		item = self._by_login.pop(login, None)
+		if item is None:
+			return None
+		self._remove_at(bisect.bisect_left(self._keys, item[1]))
+		return item[0]
+
+	def _remove_at(self, position):
+		del self._entries[position]
+		del self._keys[position]
+
+	def index(self, entry, *args):
+		item = self._by_login.get(self.login(entry))
+		if item is None or item[0] is not entry:
+			raise ValueError('Record is not in the leaderboard')
+		return bisect.bisect_left(self._keys, item[1])
+
+	def __contains__(self, entry):
+		item = self._by_login.get(self.login(entry))
+		return item is not None and item[0] is entry
+
+	def __getitem__(self, item):
+		return self._entries[item]
+
+	def __iter__(self):
+		return iter(self._entries)
+
+	def __len__(self):
+		return len(self._entries)
+
+	def __bool__(self):
+		return bool(self._entries)
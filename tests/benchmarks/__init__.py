@@ -0,0 +1,7 @@
+"""
+Micro-benchmarks of the hot paths of PyPlanet. These are not part of the test-suite, run them manually with:
+
+.. code-block:: bash
+
+	python -m tests.benchmarks.<name>
+"""
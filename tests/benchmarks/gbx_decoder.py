@@ -0,0 +1,48 @@
+"""
+Benchmark the GBX decoder against the ``xmlrpc.client.loads`` implementation.
+"""
+import json
+import timeit
+
+from xmlrpc.client import dumps
+
+from pyplanet.core.gbx.decoder import DECODERS
+
+
+def map_list_response(size=5000):
+	return dumps(([
+		dict(
+			UId='{:027d}'.format(nr), Name='$o$fffMap {}'.format(nr), FileName='MX/{}.Map.Gbx'.format(nr),
+			Author='author', Environnement='Stadium', MapType='TrackMania\\TM_Race', MapStyle='', GoldTime=34000,
+			CopperPrice=1500, LapRace=False, NbLaps=0, NbCheckpoints=12,
+		) for nr in range(size)
+	],), methodresponse=True).encode()
+
+
+def waypoint_callback():
+	return dumps(('Trackmania.Event.WayPoint', [json.dumps(dict(
+		time=123456, login='player_login', racetime=23456, laptime=23456, checkpointinrace=4, checkpointinlap=4,
+		isendrace=False, isendlap=False, curracecheckpoints=[4000, 9000, 15000, 23456],
+		curlapcheckpoints=[4000, 9000, 15000, 23456], blockid='#4', speed=456.2, distance=1234.5,
+	))]), methodname='ManiaPlanet.ModeScriptCallbackArray').encode()
+
+
+def run():
+	frames = [
+		('GetMapList(5000 maps)', map_list_response(), 5),
+		('Trackmania.Event.WayPoint', waypoint_callback(), 20000),
+	]
+
+	for name, body, number in frames:
+		print('{} ({} bytes, {} runs):'.format(name, len(body), number))
+		baseline = None
+		for engine in ('xmlrpc', 'gbx'):
+			duration = timeit.timeit(lambda: DECODERS[engine](body), number=number)
+			baseline = baseline or duration
+			print('  {:<8} {:>10.2f} us/frame  {:>5.2f}x'.format(
+				engine, duration / number * 1000000, baseline / duration
+			))
+
+
+if __name__ == '__main__':
+	run()
@@ -0,0 +1,122 @@
+"""
+Benchmark the dispatching of signals with the precompiled dispatch table against the previous dispatching, that resolved
+the live receivers on every send.
+
+Run with ``python -m tests.benchmarks.signals``.
+"""
+import asyncio
+import time
+import weakref
+
+from pyplanet.core.events.dispatcher import NO_RECEIVERS, Signal
+
+
+class LegacySignal(Signal):
+	"""
+	Signal that dispatches like before the dispatch table was introduced.
+	"""
+
+	async def send(self, source, raw=False, catch_exceptions=False, gather=True):
+		kwargs = dict(**source, signal=self)
+		if not self.receivers:
+			return []
+
+		responses = []
+		gather_list = []
+		for key, receiver in self.live_receivers():
+			slf = self.self_refs.get(key, None)
+			if slf and isinstance(slf, weakref.ReferenceType):
+				slf = slf()
+			args = [slf] if slf else []
+
+			coro = self.execute_receiver(receiver, args, kwargs, ignore_exceptions=catch_exceptions)
+			if gather:
+				gather_list.append(coro)
+			else:
+				responses.append(await coro)
+
+		if gather:
+			return await asyncio.gather(*gather_list)
+		return responses
+
+	def live_receivers(self):
+		"""
+		Resolve the live receivers, like the dispatcher did on every send before the dispatch table was introduced.
+		"""
+		# We don't use the sender. Set it to none.
+		sender = None
+
+		receivers = None
+		if self.use_caching and not self._dead_receivers:
+			receivers = self.sender_receivers_cache.get(sender)
+			# We could end up here with NO_RECEIVERS even if we do check this case in
+			# .send() prior to calling live_receivers() due to concurrent .send() call.
+			if receivers is NO_RECEIVERS:
+				return []
+
+		if receivers is None:
+			with self.lock:
+				self._clear_dead_receivers()
+				receivers = []
+				for receiverkey, receiver in self.receivers:
+					receivers.append((receiverkey, receiver))
+				if self.use_caching:
+					if not receivers:
+						self.sender_receivers_cache[sender] = NO_RECEIVERS
+					else:
+						# Note, we must cache the weakref versions.
+						self.sender_receivers_cache[sender] = receivers
+		non_weak_receivers = []
+
+		for receiver in receivers:
+			key = receiver[0]
+			receiver = receiver[1]
+
+			if isinstance(receiver, weakref.ReferenceType):
+				# Dereference the weak reference.
+				receiver = receiver()
+				if receiver is not None:
+					non_weak_receivers.append((key, receiver))
+			else:
+				non_weak_receivers.append((key, receiver))
+		return non_weak_receivers
+
+
+class Listener:
+	def __init__(self):
+		self.calls = 0
+
+	async def async_receiver(self, **kwargs):
+		self.calls += 1
+
+	def sync_receiver(self, **kwargs):
+		self.calls += 1
+
+
+async def measure(signal_class, listeners, number):
+	signal = signal_class(code='benchmark', namespace='benchmarks')
+	for listener in listeners:
+		signal.register(listener.async_receiver)
+		signal.register(listener.sync_receiver)
+
+	payload = dict(login='player_login', race_time=23456)
+	started = time.perf_counter()
+	for _ in range(number):
+		await signal.send_robust(payload, raw=True)
+	return time.perf_counter() - started
+
+
+async def run():
+	number = 20000
+	for receivers in (1, 3, 10):
+		listeners = [Listener() for _ in range(receivers)]
+		print('{} async + {} sync receivers ({} sends):'.format(receivers, receivers, number))
+		baseline = None
+		for name, signal_class in (('legacy', LegacySignal), ('table', Signal)):
+			duration = await measure(signal_class, listeners, number)
+			baseline = baseline or duration
+			print('  {:<8} {:>10.2f} us/send  {:>5.2f}x'.format(name, duration / number * 1000000, baseline / duration))
+
+
+if __name__ == '__main__':
+	asyncio.get_event_loop().run_until_complete(run())
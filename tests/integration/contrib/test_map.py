@@ -1,5 +1,7 @@
 import random
 
+from pyplanet.contrib.map import MapCatalog
+from pyplanet.contrib.map.sync import MapListSync
 from tests.integration import ControllerTestCase
 
 
@@ -9,6 +11,24 @@ class TestMapManager(ControllerTestCase):
 		real_list = await self.instance.gbx.execute('GetMapList', -1, 0)
 		assert len(real_list) == len(self.instance.map_manager.maps)
 
+	async def test_map_list_sync(self):
+		real_list = await self.instance.gbx.execute('GetMapList', -1, 0)
+		sync = MapListSync(self.instance.map_manager, page_size=2)
+		assert [m['UId'] for m in await sync.fetch()] == [m['UId'] for m in real_list]
+		assert self.instance.map_manager.maps.uids == [m['UId'] for m in real_list]
+
+		# Nothing changed since the last synchronisation.
+		catalog = MapCatalog(self.instance.map_manager.maps)
+		assert not await sync.synchronise(catalog)
+
+		# A removed map is detected and a new map is added.
+		removed = catalog.remove(real_list[0]['UId'])
+		delta = await sync.synchronise(catalog, raw_list=real_list[1:])
+		assert delta.removed == [] and delta.added == []
+		delta = await sync.synchronise(catalog, raw_list=real_list)
+		assert delta.added == [removed]
+		assert catalog.uids == [m['UId'] for m in real_list]
+
 	async def test_map_juke(self):
 		if len(self.instance.map_manager.maps) <= 1:
 			raise Exception('Test server should contain more than 1 map!')
@@ -0,0 +1,42 @@
+from pyplanet.contrib.map.catalog import MapCatalog
+
+
+class FakeMap:
+	def __init__(self, pk, uid, author_login='author', environment='Canyon', mx_id=None):
+		self.id = pk
+		self.uid = uid
+		self.file = 'Maps/{}.Map.Gbx'.format(uid)
+		self.author_login = author_login
+		self.environment = environment
+		self.mx_id = mx_id
+
+	def get_id(self):
+		return self.id
+
+
+def test_catalog_lookups():
+	first, second, third = FakeMap(1, 'a', mx_id=10), FakeMap(2, 'b', environment='Stadium'), FakeMap(3, 'c')
+	catalog = MapCatalog([first, second, third])
+
+	assert [m.uid for m in catalog] == ['a', 'b', 'c']
+	assert len(catalog) == 3
+	assert 'b' in catalog and second in catalog and 'd' not in catalog
+	assert catalog.get('c') is third
+	assert catalog.get_by_id(2) is second
+	assert catalog.get_by_file('Maps/a.Map.Gbx') is first
+	assert catalog.get_by_mx_id('10') is first
+	assert catalog.by_environment('Canyon') == [first, third]
+	assert catalog.by_author('author') == [first, second, third]
+
+	# Updating a map keeps its position in the playlist.
+	second.author_login = 'other'
+	catalog.add(second)
+	assert [m.uid for m in catalog] == ['a', 'b', 'c']
+	assert catalog.by_author('author') == [first, third]
+	assert catalog.by_author('other') == [second]
+
+	assert catalog.remove('a') is first
+	assert catalog.get_by_mx_id(10) is None
+	assert catalog.get_by_file('Maps/a.Map.Gbx') is None
+	assert catalog.remove('a') is None
+	assert [m.uid for m in catalog] == ['b', 'c']
@@ -0,0 +1,109 @@
+import asynctest
+
+from xmlrpc.client import Fault
+from peewee import SelectQuery, SqliteDatabase
+
+from pyplanet.apps.core.maniaplanet.models import Map
+from pyplanet.contrib.map import MapCatalog
+from pyplanet.contrib.map.manager import MapManager
+from pyplanet.contrib.map.sync import MapListSync
+
+
+async def execute(query):
+	if isinstance(query, SelectQuery):
+		return list(query)
+	return query.execute()
+
+
+def map_info(uid, name=None, file=None):
+	return dict(
+		UId=uid, Name=name or 'Map {}'.format(uid), FileName=file or 'Maps/{}.Map.Gbx'.format(uid), Author='author',
+		Environnement='Stadium', GoldTime=30000, CopperPrice=500, MapType='TrackMania\\TM_Race', MapStyle='',
+	)
+
+
+class FakeGbx:
+	def __init__(self, map_list):
+		self.map_list = map_list
+		self.calls = list()
+
+	async def __call__(self, method, size, offset):
+		self.calls.append((method, size, offset))
+		if offset and offset >= len(self.map_list):
+			raise Fault(-1000, 'Start index out of bound.')
+		return self.map_list[offset:offset + size]
+
+
+class FakeInstance:
+	def __init__(self, map_list):
+		self.gbx = FakeGbx(map_list)
+
+
+class TestMapListSync(asynctest.TestCase):
+	def setUp(self):
+		self.database = SqliteDatabase(':memory:')
+		self.proxy, Map._meta.database = Map._meta.database, self.database
+		Map.create_table()
+		Map.CACHE.pin_only(())
+		Map.CACHE.clear()
+		self.patch = asynctest.patch.object(Map, 'execute', side_effect=execute)
+		self.patch.start()
+
+	def tearDown(self):
+		self.patch.stop()
+		Map.CACHE.pin_only(())
+		Map.CACHE.clear()
+		Map._meta.database = self.proxy
+		self.database.close()
+
+	async def test_fetch_pages(self):
+		instance = FakeInstance([map_info(uid) for uid in 'abcde'])
+		sync = MapListSync(MapManager(instance), page_size=2)
+		assert [m['UId'] for m in await sync.fetch()] == list('abcde')
+		assert [call[2] for call in instance.gbx.calls] == [0, 2, 4]
+
+		# The dedicated server raises when the offset is at the end of the list.
+		instance.gbx.map_list = instance.gbx.map_list[:4]
+		instance.gbx.calls.clear()
+		assert [m['UId'] for m in await sync.fetch()] == list('abcd')
+		assert [call[2] for call in instance.gbx.calls] == [0, 2, 4]
+
+	async def test_synchronise(self):
+		# Map 'b' is known in the database, with an outdated name.
+		Map.insert(uid='b', name='Old name', file='Maps/b.Map.Gbx', author_login='author').execute()
+
+		map_list = [map_info('a', file='PyPlanet-MX/TM-123.Map.Gbx'), map_info('b'), map_info('c'), map_info('d')]
+		instance = FakeInstance(map_list)
+		sync = MapListSync(MapManager(instance), page_size=2)
+		catalog = MapCatalog()
+
+		delta = await sync.synchronise(catalog)
+		assert [m.uid for m in delta.added] == ['a', 'b', 'c', 'd']
+		assert delta.updated == [] and delta.removed == [] and not delta.reordered
+		assert catalog.uids == ['a', 'b', 'c', 'd']
+		rows = {m.uid: m for m in Map.select()}
+		assert len(rows) == 4
+		assert rows['b'].name == 'Map b'
+		assert rows['a'].mx_id == 123 and rows['c'].mx_id is None
+		assert catalog.get_by_mx_id(123) is catalog.get('a')
+
+		# Nothing changed.
+		delta = await sync.synchronise(catalog)
+		assert not delta
+		assert str(delta) == '0 added, 0 updated, 0 removed'
+
+		# Rename 'a', remove 'c', swap 'b' and 'd' and add 'e'.
+		instance.gbx.map_list = [
+			map_info('a', name='Renamed', file='PyPlanet-MX/TM-123.Map.Gbx'), map_info('d'), map_info('b'), map_info('e'),
+		]
+		previous = catalog.get('a')
+		delta = await sync.synchronise(catalog)
+		assert [m.uid for m in delta.added] == ['e']
+		assert delta.updated == [previous] and previous.name == 'Renamed'
+		assert [m.uid for m in delta.removed] == ['c']
+		assert delta.reordered
+		assert str(delta) == '1 added, 1 updated, 1 removed, reordered'
+		assert catalog.uids == ['a', 'd', 'b', 'e']
+		rows = {m.uid: m for m in Map.select()}
+		assert rows['a'].name == 'Renamed' and rows['a'].mx_id == 123
+		assert rows['b'].name == 'Map b'
@@ -0,0 +1,153 @@
+import asyncio
+import asynctest
+
+from peewee import SelectQuery, SqliteDatabase
+
+from pyplanet.apps.core.maniaplanet.models import Player
+from pyplanet.contrib.player.manager import PlayerManager
+from pyplanet.contrib.setting.core_settings import performance_mode
+
+
+async def execute(query):
+	if isinstance(query, SelectQuery):
+		return list(query)
+	return query.execute()
+
+
+def detailed_info(login, player_id, spectator=False):
+	return dict(
+		Login=login, NickName='$f00{}'.format(login), PlayerId=player_id, TeamId=-1, IsSpectator=spectator,
+		IPAddress='127.0.0.{}:2350'.format(player_id), Path='World|Europe|Netherlands',
+	)
+
+
+class FakeGbx:
+	def __init__(self, infos):
+		self.infos = infos
+		self.multicalls = 0
+
+	def __call__(self, method, *args):
+		return args[0]
+
+	async def multicall(self, *logins):
+		self.multicalls += 1
+		return [self.infos.get(login, Exception('Login unknown')) for login in logins]
+
+
+class FakeInstance:
+	process_name = 'default'
+
+	def __init__(self, infos):
+		self.gbx = FakeGbx(infos)
+		self.game = asynctest.Mock(server_is_dedicated=True, server_player_login='server')
+
+
+class TestPlayerManager(asynctest.TestCase):
+	def setUp(self):
+		self.database = SqliteDatabase(':memory:')
+		self.proxy, Player._meta.database = Player._meta.database, self.database
+		Player.create_table()
+		Player.CACHE.pin_only(())
+		Player.CACHE.clear()
+
+		self.patches = [
+			asynctest.patch.object(Player, 'execute', side_effect=execute),
+			asynctest.patch.object(performance_mode, 'get_value', return_value=30),
+		]
+		for patch in self.patches:
+			patch.start()
+
+	def tearDown(self):
+		for patch in self.patches:
+			patch.stop()
+		Player.CACHE.pin_only(())
+		Player.CACHE.clear()
+		Player._meta.database = self.proxy
+		self.database.close()
+
+	async def test_connect_many(self):
+		Player.insert_many([
+			dict(login='known', nickname='Old', last_ip='10.0.0.1', level=Player.LEVEL_PLAYER),
+			dict(login='your-maniaplanet-login', nickname='Owner', last_ip=None, level=Player.LEVEL_PLAYER),
+			dict(login='offline', nickname='Offline', last_ip='10.0.0.9', level=Player.LEVEL_ADMIN),
+		]).execute()
+
+		instance = FakeInstance(dict(
+			known=detailed_info('known', 1), new=detailed_info('new', 2, spectator=True),
+			**{'your-maniaplanet-login': detailed_info('your-maniaplanet-login', 3)}
+		))
+		manager = PlayerManager(instance)
+		players = await manager.handle_connect_many(['known', 'new', 'your-maniaplanet-login', 'left', 'server'])
+
+		# One multicall, the players that left directly and the server itself are skipped.
+		assert instance.gbx.multicalls == 1
+		assert [player.login for player in players] == ['known', 'new', 'your-maniaplanet-login']
+
+		# The known players are updated per login, the unknown player is inserted.
+		rows = {player.login: player for player in Player.select()}
+		assert len(rows) == 4
+		assert rows['known'].nickname == '$f00known' and rows['known'].last_ip == '127.0.0.1'
+		assert rows['known'].level == Player.LEVEL_PLAYER
+		assert rows['new'].nickname == '$f00new' and rows['new'].last_ip == '127.0.0.2'
+		assert rows['your-maniaplanet-login'].level == Player.LEVEL_MASTER
+		assert rows['offline'].nickname == 'Offline' and rows['offline'].level == Player.LEVEL_ADMIN
+
+		# The players are online, pinned in the cache and counted.
+		assert manager.online_logins == {'known', 'new', 'your-maniaplanet-login'}
+		assert manager.count_players == 2 and manager.count_spectators == 1 and manager.count_all == 3
+		assert Player.CACHE.stats()['pinned'] == 3
+		assert Player.CACHE['new'] is players[1]
+		assert players[1].flow.is_spectator and players[1].flow.player_id == 2
+		assert players[2].flow.zone
+
+	async def test_wait_for_player(self):
+		instance = FakeInstance(dict(early=detailed_info('early', 1), late=detailed_info('late', 2)))
+		manager = PlayerManager(instance)
+
+		# The player arrived before the wait.
+		early, = await manager.handle_connect_many(['early'])
+		assert await manager.wait_for_player('early', timeout=1) is early
+
+		# The player arrives while waiting.
+		waits = [self.loop.create_task(manager.wait_for_player('late', timeout=1)) for _ in range(2)]
+		await asyncio.sleep(0)
+		assert manager.arrival_stats['pending'] == 1
+		late, = await manager.handle_connect_many(['late'])
+		assert await asyncio.gather(*waits) == [late, late]
+
+		stats = manager.arrival_stats
+		assert stats['waits'] == 3 and stats['arrived'] == 2 and stats['timeouts'] == 0 and stats['pending'] == 0
+		assert stats['max_wait'] < 1 and stats['avg_wait'] <= stats['max_wait']
+
+	async def test_wait_timeout(self):
+		manager = PlayerManager(FakeInstance(dict(late=detailed_info('late', 1))))
+
+		# The first waiter gives up, the second one still gets the player.
+		waits = [
+			self.loop.create_task(manager.wait_for_player('late', timeout=timeout)) for timeout in (.01, 1)
+		]
+		await asyncio.sleep(.05)
+		assert waits[0].done() and waits[0].result() is None
+		assert manager.arrival_stats['pending'] == 1
+		late, = await manager.handle_connect_many(['late'])
+		assert await waits[1] is late
+
+		# The future of a player that never arrives is cleaned up.
+		waits = [self.loop.create_task(manager.wait_for_player('never', timeout=.01)) for _ in range(2)]
+		await asyncio.sleep(0)
+		future = manager._arrivals['never']
+		assert await asyncio.gather(*waits) == [None, None]
+		assert future.cancelled()
+		assert manager.arrival_stats['pending'] == 0 and manager.arrival_stats['timeouts'] == 3
+
+	async def test_wait_failed_connect(self):
+		instance = FakeInstance(dict())
+		instance.gbx = asynctest.CoroutineMock(side_effect=Exception('Login unknown'))
+		manager = PlayerManager(instance)
+
+		# The player disconnected directly, the waiter doesn't wait for the timeout.
+		wait = self.loop.create_task(manager.wait_for_player('gone', timeout=5))
+		await asyncio.sleep(0)
+		assert await manager.handle_connect('gone') is None
+		assert await wait is None
+		assert manager.arrival_stats['pending'] == 0 and manager.arrival_stats['timeouts'] == 0
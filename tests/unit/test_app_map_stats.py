@@ -0,0 +1,105 @@
+import asynctest
+import importlib
+
+from peewee import Model, SelectQuery, SqliteDatabase
+
+from pyplanet.apps.contrib.karma import Karma
+from pyplanet.apps.contrib.karma.models import Karma as KarmaModel
+from pyplanet.apps.contrib.local_records import LocalRecords
+from pyplanet.apps.contrib.local_records.models import LocalRecord
+from pyplanet.apps.core.maniaplanet.models import Map, Player
+
+MODELS = [Map, Player, LocalRecord, KarmaModel]
+
+
+async def execute(query):
+	if isinstance(query, SelectQuery):
+		return list(query)
+	return query.execute()
+
+
+def create(model, **values):
+	instance = model(**values)
+	Model.save(instance)
+	return instance
+
+
+def create_app(app_class, module):
+	return app_class(module, importlib.import_module(module), asynctest.Mock())
+
+
+class TestMapStats(asynctest.TestCase):
+	def setUp(self):
+		self.database = SqliteDatabase(':memory:')
+		self.proxies = [model._meta.database for model in MODELS]
+		for model in MODELS:
+			model._meta.database = self.database
+			model.create_table()
+		self.patches = [
+			asynctest.patch.object(model, 'execute', side_effect=execute) for model in (LocalRecord, KarmaModel)
+		]
+		for patch in self.patches:
+			patch.start()
+
+		self.maps = [
+			create(Map, uid=uid, name='Map {}'.format(uid), file='Maps/{}.Map.Gbx'.format(uid), author_login='author')
+			for uid in 'abc'
+		]
+		self.players = [
+			create(Player, login=login, nickname=login, level=Player.LEVEL_PLAYER) for login in ('one', 'two', 'three')
+		]
+
+	def tearDown(self):
+		for patch in self.patches:
+			patch.stop()
+		for model, proxy in zip(MODELS, self.proxies):
+			model._meta.database = proxy
+		self.database.close()
+
+	async def test_local_records(self):
+		app = create_app(LocalRecords, 'pyplanet.apps.contrib.local_records')
+		one, two, three = self.players
+		a, b, c = self.maps
+
+		# Two records share the best score on map a, the oldest one is the first record.
+		create(LocalRecord, map=a, player=two, score=30000)
+		first = create(LocalRecord, map=a, player=one, score=25000)
+		create(LocalRecord, map=a, player=three, score=25000)
+		# The best score of map a is a slower record on map b.
+		create(LocalRecord, map=b, player=one, score=25000)
+		best = create(LocalRecord, map=b, player=two, score=20000)
+
+		for chunk_size in (1, 500):
+			stats = await app.get_map_stats(self.maps, chunk_size=chunk_size)
+			assert {map_id: record['record_count'] for map_id, record in stats.items()} == {a.id: 3, b.id: 2, c.id: 0}
+			assert stats[a.id]['first_record'].id == first.id
+			assert stats[a.id]['first_record'].player.login == 'one'
+			assert stats[b.id]['first_record'].id == best.id
+			assert stats[c.id]['first_record'] is None
+
+		assert await app.get_map_stats([]) == dict()
+
+	async def test_karma(self):
+		app = create_app(Karma, 'pyplanet.apps.contrib.karma')
+		one, two, three = self.players
+		a, b, c = self.maps
+
+		# The expanded score is used when there is one.
+		create(KarmaModel, map=a, player=one, score=1, expanded_score=0.5)
+		create(KarmaModel, map=a, player=two, score=-1)
+		create(KarmaModel, map=a, player=three, score=1, expanded_score=1)
+		create(KarmaModel, map=b, player=one, score=-1, expanded_score=-0.5)
+
+		for chunk_size in (1, 500):
+			stats = await app.get_map_stats(self.maps, chunk_size=chunk_size)
+			assert stats == {
+				a.id: dict(vote_count=3, map_karma=0.5), b.id: dict(vote_count=1, map_karma=-0.5),
+				c.id: dict(vote_count=0, map_karma=0.0),
+			}
+
+		# Same karma as the calculation of the votes in memory.
+		for map_instance in self.maps:
+			app.current_votes = list(KarmaModel.select().where(KarmaModel.map == map_instance))
+			await app.calculate_karma()
+			assert stats[map_instance.id]['map_karma'] == app.current_karma
+			assert stats[map_instance.id]['vote_count'] == len(app.current_votes)
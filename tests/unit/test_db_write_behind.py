@@ -0,0 +1,134 @@
+import asynctest
+import datetime
+
+from peewee import CharField, DateTimeField, IntegerField, Model, SelectQuery, SqliteDatabase
+
+from pyplanet.core.db.persister import WriteBehind
+
+database = SqliteDatabase(':memory:')
+
+
+class Score(Model):
+	login = CharField()
+	score = IntegerField()
+	checkpoints = CharField(null=True)
+	updated_at = DateTimeField(default=datetime.datetime.now)
+
+	queries = list()
+	failures = 0
+	hook = None
+
+	@classmethod
+	async def execute(cls, query):
+		if cls.hook:
+			cls.hook()
+		if cls.failures:
+			cls.failures -= 1
+			raise Exception('Database is gone')
+		cls.queries.append(type(query).__name__)
+		if isinstance(query, SelectQuery):
+			return list(query)
+		return query.execute()
+
+	async def save(self, *args, **kwargs):
+		type(self).queries.append('save')
+		return super().save(*args, **kwargs)
+
+	class Meta:
+		database = database
+
+
+def create(**values):
+	instance = Score(**values)
+	Model.save(instance)
+	return instance
+
+
+class TestWriteBehind(asynctest.TestCase):
+	def setUp(self):
+		Score.create_table()
+		Score.queries = list()
+		Score.failures = 0
+		Score.hook = None
+
+	def tearDown(self):
+		Score.drop_table()
+
+	async def test_batches(self):
+		queue = WriteBehind(loop=self.loop, batch_size=100, max_retries=1)
+
+		# Rows with different columns are inserted with a query per set of columns.
+		for score in (1000, 2000, 3000):
+			queue.insert(Score(login='insert', score=score))
+		queue.insert(Score(login='insert', score=4000, checkpoints='1,2,3'))
+
+		existing = create(login='existing', score=5000)
+		other = create(login='other', score=6000)
+		existing.score = 4500
+		other.score = 5500
+		other.checkpoints = '1,2'
+		new = Score(login='new', score=7000)
+		queue.save(existing)
+		queue.save(other)
+		queue.save(new)
+		queue.save(new)
+		assert queue.depth == 7
+
+		await queue.flush()
+		assert queue.depth == 0
+		assert Score.queries == ['InsertQuery', 'InsertQuery', 'save', 'UpdateQuery', 'UpdateQuery']
+		assert queue.stats()['written'] == 7 and queue.stats()['batches'] == 4
+
+		rows = {(row.login, row.score): row for row in Score.select()}
+		assert sorted(score for login, score in rows if login == 'insert') == [1000, 2000, 3000, 4000]
+		assert rows[('insert', 4000)].checkpoints == '1,2,3'
+		assert ('existing', 4500) in rows and ('new', 7000) in rows
+		assert rows[('other', 5500)].checkpoints == '1,2'
+		assert new.id and not existing._dirty and not other._dirty
+
+	async def test_retry(self):
+		queue = WriteBehind(loop=self.loop, batch_size=100, max_retries=1)
+		existing = create(login='existing', score=5000)
+
+		Score.failures = 1
+		queue.insert(Score(login='insert', score=1000))
+		existing.score = 4000
+		queue.save(existing)
+		await queue.flush()
+		assert queue.depth == 2 and queue.failures == 1
+		assert existing._dirty
+
+		await queue.stop()
+		assert queue.depth == 0
+		assert queue.stats()['dropped'] == 0
+		assert sorted(row.score for row in Score.select()) == [1000, 4000]
+
+		# Writes are dropped after the last retry.
+		Score.failures = 2
+		queue.insert(Score(login='insert', score=2000))
+		await queue.flush()
+		await queue.flush()
+		assert queue.depth == 0 and queue.stats()['dropped'] == 1
+		assert Score.select().count() == 2
+
+	async def test_ordering(self):
+		queue = WriteBehind(loop=self.loop, batch_size=100, max_retries=1)
+		existing = create(login='existing', score=5000)
+		queue.insert(Score(login='first', score=1000))
+		queue.insert(Score(login='second', score=2000, checkpoints='1'))
+		existing.score = 4000
+		queue.save(existing)
+
+		# The first batch fails, the later writes of the model wait. The row queued while flushing goes after them.
+		Score.hook = lambda: queue.insert(Score(login='third', score=3000))
+		Score.failures = 1
+		await queue.flush()
+		Score.hook = None
+		assert Score.queries == [] and existing._dirty
+		assert [(item[0].login, item[1]) for item in queue.inserts] == [('first', 1), ('second', 0), ('third', 0)]
+		assert queue.depth == 4 and queue.failures == 1
+
+		await queue.flush()
+		assert queue.depth == 0 and not existing._dirty
+		assert [row.login for row in Score.select().order_by(Score.id)] == ['existing', 'first', 'second', 'third']
+		assert Score.get(Score.login == 'existing').score == 4000
@@ -0,0 +1,54 @@
+import asyncio
+import asynctest
+
+from xmlrpc.client import Fault
+
+from pyplanet.core.gbx.batcher import CallBatcher
+
+
+class FakeRemote:
+	MAX_REQUEST_SIZE = 2000000
+
+	def __init__(self, loop):
+		self.event_loop = loop
+		self.frames = list()
+
+	async def execute(self, method, *args, timeout=45.0):
+		self.frames.append((method, args))
+		results = list()
+		for call in args[0]:
+			if call['methodName'] == 'Fail':
+				results.append(dict(faultCode=-1000, faultString='Login unknown.'))
+			else:
+				results.append([call['params'][0] * 2])
+		return results
+
+
+class TestCallBatcher(asynctest.TestCase):
+	async def test_same_tick(self):
+		remote = FakeRemote(self.loop)
+		batcher = CallBatcher(remote)
+
+		results = await asyncio.gather(
+			batcher.submit('Double', (1,)),
+			batcher.submit('Double', (2,)),
+			batcher.submit('Fail', ('login',)),
+			return_exceptions=True,
+		)
+
+		assert len(remote.frames) == 1
+		assert results[0] == 2
+		assert results[1] == 4
+		assert isinstance(results[2], Fault)
+		assert batcher.stats()['saved_frames'] == 2
+
+	async def test_size_limit(self):
+		remote = FakeRemote(self.loop)
+		remote.MAX_REQUEST_SIZE = 1000
+		batcher = CallBatcher(remote)
+
+		results = await asyncio.gather(*[batcher.submit('Double', (nr,)) for nr in range(6)])
+
+		assert results == [nr * 2 for nr in range(6)]
+		assert len(remote.frames) > 1
+		assert sum(len(args[0]) for _, args in remote.frames) == 6
@@ -0,0 +1,45 @@
+import os
+import tempfile
+
+import asynctest
+
+from pyplanet.core.gbx.capture import FrameRecorder, FrameReplayer, read_capture, INBOUND, OUTBOUND
+
+
+class FakeRemote:
+	def __init__(self):
+		self.frames = list()
+
+	def handle_frame(self, handle, body):
+		self.frames.append((handle, body))
+		return None
+
+
+class TestCapture(asynctest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.path = os.path.join(self.directory, 'test.gbxcap')
+
+	def tearDown(self):
+		if os.path.exists(self.path):
+			os.remove(self.path)
+		os.rmdir(self.directory)
+
+	async def test_record_replay(self):
+		recorder = FrameRecorder(self.path)
+		recorder.record(OUTBOUND, 0x80000000, b'<methodCall/>')
+		recorder.record(INBOUND, 0x80000000, b'<methodResponse/>')
+		recorder.record(INBOUND, 1, b'<methodCall>first</methodCall>')
+		recorder.record(INBOUND, 2, b'<methodCall>second</methodCall>')
+		recorder.close()
+
+		frames = list(read_capture(self.path))
+		assert len(frames) == 4
+		assert frames[0].direction == OUTBOUND
+		assert frames[3].body == b'<methodCall>second</methodCall>'
+
+		remote = FakeRemote()
+		replayed = await FrameReplayer(remote, self.path, speed=0).run()
+
+		assert replayed == 2
+		assert remote.frames == [(1, b'<methodCall>first</methodCall>'), (2, b'<methodCall>second</methodCall>')]
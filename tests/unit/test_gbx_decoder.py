@@ -0,0 +1,61 @@
+import datetime
+import json
+
+from xmlrpc.client import dumps, loads, Fault
+
+from pyplanet.core.gbx import decoder
+
+
+def assert_same(body):
+	assert decoder.loads(body) == loads(body, use_builtin_types=True)
+
+
+def test_method_call():
+	assert_same(dumps(
+		(1, 'a<b&c', True, False, None, 2.5, [1, [2, dict(x='y', z=[])]], dict(k=dict(n=b'bytes')),
+		 datetime.datetime(2020, 1, 2, 3, 4, 5)),
+		methodname='ManiaPlanet.PlayerChat', allow_none=True
+	).encode())
+
+
+def test_method_response():
+	assert_same(dumps(([dict(UId='abc', NbLaps=0, LapRace=False)],), methodresponse=True).encode())
+	assert_same(
+		b'<?xml version="1.0"?><methodResponse><params><param><value>untyped</value></param>'
+		b'<param><value><i4>5</i4></value></param></params></methodResponse>'
+	)
+
+
+def test_fault():
+	try:
+		decoder.loads(dumps(Fault(-1000, 'Login unknown.'), methodresponse=True).encode())
+	except Fault as e:
+		assert e.faultCode == -1000
+		assert e.faultString == 'Login unknown.'
+	else:
+		assert False, 'Fault should have been raised!'
+
+
+def test_script_callback():
+	payload = json.dumps(dict(login='<player>&"\'', time=123))
+	body = dumps(
+		('Trackmania.Event.WayPoint', [payload, '{}']), methodname='ManiaPlanet.ModeScriptCallbackArray'
+	).encode()
+	assert decoder.decode_script_callback(body) is not None
+	assert_same(body)
+
+	# Dedicated server formatting with numeric references.
+	body = (
+		b'<?xml version="1.0" encoding="UTF-8"?>\n<methodCall>\n'
+		b'<methodName>ManiaPlanet.ModeScriptCallbackArray</methodName>\n<params>\n'
+		b'<param><value><string>Trackmania.Event.WayPoint</string></value></param>\n'
+		b'<param><value><array><data><value><string>{&quot;a&quot;: &#123;}</string></value></data></array></value></param>\n'
+		b'</params>\n</methodCall>'
+	)
+	assert decoder.decode_script_callback(body) is not None
+	assert_same(body)
+
+	# Other shapes fall back to the full parser.
+	body = dumps(('Trackmania.Event.WayPoint', [1]), methodname='ManiaPlanet.ModeScriptCallbackArray').encode()
+	assert decoder.decode_script_callback(body) is None
+	assert_same(body)
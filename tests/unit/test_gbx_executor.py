@@ -0,0 +1,81 @@
+import asyncio
+import asynctest
+
+from pyplanet.core.gbx.executor import CallbackExecutor
+
+
+class TestCallbackExecutor(asynctest.TestCase):
+	async def test_keys(self):
+		assert CallbackExecutor.key_for('ManiaPlanet.PlayerChat', [0, 'login', 'hi', False]) == \
+			(('login', 'login'), 'ManiaPlanet.PlayerChat')
+		assert CallbackExecutor.key_for('ManiaPlanet.ModeScriptCallbackArray', [
+			'Trackmania.Event.WayPoint', ['{"login": "login", "racetime": 1000}']
+		]) == (('login', 'login'), 'Trackmania.Event.WayPoint')
+		assert CallbackExecutor.key_for('ManiaPlanet.ModeScriptCallbackArray', [
+			'Trackmania.Scores', ['{"responseid": "12", "players": []}']
+		]) == (None, 'Trackmania.Scores')
+		assert CallbackExecutor.key_for('ManiaPlanet.BeginMap', [{}]) == ('ManiaPlanet.BeginMap', 'ManiaPlanet.BeginMap')
+
+	async def test_ordering(self):
+		executor = CallbackExecutor(self.loop, concurrency=2)
+		handled = list()
+
+		async def handle(name, delay):
+			await asyncio.sleep(delay)
+			handled.append(name)
+
+		futures = [
+			executor.submit('one', 'a', lambda: handle('one-1', .02)),
+			executor.submit('one', 'a', lambda: handle('one-2', 0)),
+			executor.submit('two', 'a', lambda: handle('two-1', 0)),
+			executor.submit('three', 'a', lambda: handle('three-1', 0)),
+		]
+		assert executor.active == 2
+		await asyncio.gather(*futures)
+
+		assert handled.index('one-1') < handled.index('one-2')
+		assert executor.stats()['handled'] == 4
+		assert executor.stats()['queued'] == 0
+
+	async def test_overload(self):
+		handled = list()
+
+		async def handle(name):
+			handled.append(name)
+
+		for policy, expected in [('drop', ['busy', 'low-1']), ('merge', ['busy', 'low-2'])]:
+			handled.clear()
+			executor = CallbackExecutor(self.loop, concurrency=1, queue_limit=1, policy=policy, low_priority={'low'})
+			futures = [
+				executor.submit('player', 'busy', lambda: handle('busy')),
+				executor.submit('player', 'low', lambda: handle('low-1')),
+			]
+			assert executor.submit('player', 'low', lambda: handle('low-2')) in (None, futures[1])
+			await asyncio.gather(*futures)
+
+			assert handled == expected
+
+	async def test_player_info(self):
+		handled = list()
+
+		async def handle(name):
+			handled.append(name)
+
+		for policy in CallbackExecutor.POLICIES:
+			handled.clear()
+			executor = CallbackExecutor(self.loop, concurrency=1, queue_limit=1, policy=policy)
+			name = 'ManiaPlanet.PlayerInfoChanged'
+			assert name not in executor.low_priority
+
+			# Nothing to merge into, the change is queued anyway. The next change of the player replaces it.
+			futures = [
+				executor.submit('busy', 'busy', lambda: handle('busy')),
+				executor.submit('other', 'other', lambda: handle('other')),
+				executor.submit(('login', 'player'), name, lambda: handle('info-1')),
+			]
+			assert futures[2] is not None
+			assert executor.submit(('login', 'player'), name, lambda: handle('info-2')) is futures[2]
+			await asyncio.gather(*futures)
+
+			assert handled == ['busy', 'other', 'info-2']
+			assert executor.stats()['dropped'] == 0 and executor.stats()['merged'] == 1
@@ -0,0 +1,38 @@
+import asynctest
+
+from xmlrpc.client import Fault
+
+from pyplanet.core.gbx.fake_server import FakeDedicatedServer
+from pyplanet.core.gbx.remote import GbxRemote
+
+
+class TestFakeDedicatedServer(asynctest.TestCase):
+	async def setUp(self):
+		self.server = FakeDedicatedServer(port=0, players=5, maps=3)
+		await self.server.start()
+		self.remote = GbxRemote('127.0.0.1', self.server.port, user='SuperAdmin', password='SuperAdmin')
+		await self.remote.connect()
+
+	async def tearDown(self):
+		await self.remote.disconnect()
+		await self.server.stop()
+
+	async def test_startup(self):
+		assert 'GetPlayerList' in self.remote.gbx_methods
+		assert self.remote.dedicated_version == '3.3.0'
+
+		players = await self.remote.execute('GetPlayerList', -1, 0)
+		assert len(players) == 5
+		maps = await self.remote.execute('GetMapList', 2, 1)
+		assert [m['UId'] for m in maps] == [self.server.maps[1]['UId'], self.server.maps[2]['UId']]
+
+	async def test_multicall(self):
+		results = await self.remote.execute('system.multicall', [
+			dict(methodName='GetDetailedPlayerInfo', params=['virtual_1']),
+			dict(methodName='GetDetailedPlayerInfo', params=['unknown']),
+		])
+		assert results[0][0]['Login'] == 'virtual_1'
+		assert results[1]['faultCode'] == -1000
+
+		with self.assertRaises(Fault):
+			await self.remote.execute('GetDetailedPlayerInfo', 'unknown')
@@ -0,0 +1,62 @@
+import asynctest
+
+from xmlrpc.client import Fault
+
+from pyplanet.core.gbx.multicall import MulticallPlanner
+from pyplanet.core.gbx.query import Query
+
+
+class FakeClient:
+	MAX_REQUEST_SIZE = 2000000
+
+	def __init__(self):
+		self.frames = list()
+
+	async def execute(self, method, *args, timeout=45.0):
+		self.frames.append(args[0])
+		return [
+			dict(faultCode=-1000, faultString='Login unknown.') if call['methodName'] == 'Fail' else [call['params'][0]]
+			for call in args[0]
+		]
+
+
+class TestMulticallPlanner(asynctest.TestCase):
+	async def test_results_order(self):
+		client = FakeClient()
+		planner = MulticallPlanner(client)
+
+		results = await planner.execute([
+			Query(client, 'Echo', 'first'), Query(client, 'Fail', 'login'), None, Query(client, 'Echo', 'last'),
+		])
+
+		assert len(client.frames) == 1
+		assert results[0] == 'first'
+		assert isinstance(results[1], Fault)
+		assert results[2] is None
+		assert results[3] == 'last'
+
+	async def test_overflow(self):
+		client = FakeClient()
+		client.MAX_REQUEST_SIZE = 2000
+		planner = MulticallPlanner(client)
+		queries = [Query(client, 'Echo', 'x' * (nr * 40)) for nr in range(20)]
+
+		# Every query must be in exactly one frame.
+		for preserve_order in (True, False):
+			frames = planner.plan(queries, preserve_order=preserve_order)
+			assert sorted(index for frame in frames for index in frame) == list(range(20))
+
+		results = await planner.execute(queries)
+		assert results == ['x' * (nr * 40) for nr in range(20)]
+		assert len(client.frames) > 1
+
+	async def test_stream(self):
+		client = FakeClient()
+		client.MAX_REQUEST_SIZE = 2000
+		planner = MulticallPlanner(client)
+		queries = [Query(client, 'Echo', nr) for nr in range(10)]
+
+		results = dict()
+		async for index, result in planner.stream(queries):
+			results[index] = result
+		assert results == {nr: nr for nr in range(10)}
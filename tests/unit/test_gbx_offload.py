@@ -0,0 +1,58 @@
+import asyncio
+import asynctest
+
+from concurrent.futures import ThreadPoolExecutor
+from xmlrpc.client import dumps
+
+from pyplanet.core.gbx.remote import GbxRemote
+
+
+class FakeOutbound:
+	def lane_for(self, method, args=None):
+		return 1
+
+	def send(self, frame, lane=1):
+		pass
+
+
+class TestOffloadedDecoding(asynctest.TestCase):
+	def setUp(self):
+		self.remote = GbxRemote('localhost', 5000, event_pool=self.loop)
+		self.remote.outbound = FakeOutbound()
+		self.remote.offload_pool = ThreadPoolExecutor(max_workers=1)
+
+		self.maps = [
+			dict(UId='uid-{}'.format(nr), Name='Map {}'.format(nr), FileName='Maps/{}.Map.Gbx'.format(nr))
+			for nr in range(3000)
+		]
+		self.body = dumps((self.maps,), methodresponse=True, allow_none=True).encode()
+		assert len(self.body) >= self.remote.offload_threshold
+
+	def tearDown(self):
+		self.remote.offload_pool.shutdown()
+
+	async def test_offloaded_response(self):
+		call = self.loop.create_task(self.remote.execute('GetMapList', -1, 0))
+		await asyncio.sleep(0)
+		handle, = self.remote.handlers
+
+		await self.remote.handle_offloaded_frame(handle, self.body)
+		assert await call == self.maps
+		assert self.remote.stats.offload['frames'] == 1 and self.remote.stats.offload['bytes'] == len(self.body)
+		assert self.remote.stats.get('GetMapList').responses == 1
+
+	async def test_reaped_response(self):
+		call = self.loop.create_task(self.remote.execute('GetMapList', -1, 0))
+		await asyncio.sleep(0)
+		handle, = self.remote.handlers
+
+		# The call is cancelled while the response is decoded, the result is dropped.
+		decoding = self.loop.create_task(self.remote.handle_offloaded_frame(handle, self.body))
+		await asyncio.sleep(0)
+		call.cancel()
+		with asynctest.patch.object(self.remote, 'handle_payload') as handle_payload:
+			with asynctest.patch('builtins.print') as print_mock:
+				await decoding
+		assert not handle_payload.called and not print_mock.called
+		assert self.remote.stats.offload['frames'] == 1
+		assert self.remote.stats.get('GetMapList').responses == 0
@@ -0,0 +1,112 @@
+import asyncio
+import asynctest
+
+from pyplanet.core.exceptions import TransportException
+from pyplanet.core.gbx.outbound import OutboundScheduler
+from pyplanet.core.gbx.remote import GbxRemote
+
+
+def frame(handle, body=b'<methodCall/>'):
+	return len(body).to_bytes(4, byteorder='little') + handle.to_bytes(4, byteorder='little') + body
+
+
+def handle_of(written):
+	return int.from_bytes(written[4:8], byteorder='little')
+
+
+class FakeWriter:
+	def __init__(self, fail_at=None):
+		self.frames = list()
+		self.drains = 0
+		self.fail_at = fail_at
+
+	def write(self, data):
+		if self.fail_at is not None and len(self.frames) == self.fail_at:
+			self.fail_at = None
+			raise ConnectionError('Broken pipe')
+		self.frames.append(data)
+
+	async def drain(self):
+		self.drains += 1
+		await asyncio.sleep(0)
+
+
+class TestOutboundScheduler(asynctest.TestCase):
+	async def test_lanes(self):
+		assert OutboundScheduler.lane_for('system.listMethods') == OutboundScheduler.LANE_CONTROL
+		assert OutboundScheduler.lane_for('GetPlayerList') == OutboundScheduler.LANE_GAMEPLAY
+		assert OutboundScheduler.lane_for('SendDisplayManialinkPage') == OutboundScheduler.LANE_UI
+		assert OutboundScheduler.lane_for('ChatSendServerMessage') == OutboundScheduler.LANE_CHAT
+		assert OutboundScheduler.lane_for('system.multicall', ([
+			dict(methodName='ChatSendServerMessage', params=['gg']), dict(methodName='GetPlayerList', params=[]),
+		],)) == OutboundScheduler.LANE_GAMEPLAY
+
+		# Highest lane first, in order per lane.
+		scheduler = OutboundScheduler(FakeWriter(), loop=self.loop)
+		scheduler.send(frame(1), OutboundScheduler.LANE_CHAT)
+		scheduler.send(frame(2), OutboundScheduler.LANE_UI)
+		scheduler.send(frame(3), OutboundScheduler.LANE_GAMEPLAY)
+		scheduler.send(frame(4), OutboundScheduler.LANE_GAMEPLAY)
+		scheduler.send(frame(5), OutboundScheduler.LANE_CONTROL)
+		assert scheduler.stats()['lanes'] == dict(control=1, gameplay=2, ui=1, chat=1)
+		assert scheduler.queued_bytes == 5 * len(frame(1))
+		assert [handle_of(scheduler.next_frame()) for _ in range(5)] == [5, 3, 4, 2, 1]
+		assert scheduler.next_frame() is None
+		assert scheduler.queued_bytes == 0
+
+	async def test_aging(self):
+		scheduler = OutboundScheduler(FakeWriter(), loop=self.loop, max_wait=60)
+		scheduler.send(frame(1), OutboundScheduler.LANE_CHAT)
+		for handle in range(2, 5):
+			scheduler.send(frame(handle), OutboundScheduler.LANE_GAMEPLAY)
+		assert handle_of(scheduler.next_frame()) == 2
+
+		# The chat frame waited too long, it goes before the gameplay frames.
+		scheduler.max_wait = 0
+		assert [handle_of(scheduler.next_frame()) for _ in range(3)] == [1, 3, 4]
+		assert scheduler.stats()['frames_aged'] == 1
+
+	async def test_drain(self):
+		writer = FakeWriter()
+		scheduler = OutboundScheduler(writer, loop=self.loop)
+		scheduler.start()
+
+		for handle in range(10):
+			scheduler.send(frame(handle), OutboundScheduler.LANE_GAMEPLAY)
+		await asyncio.sleep(.05)
+		assert [handle_of(written) for written in writer.frames] == list(range(10))
+		assert writer.drains == 10
+		assert scheduler.stats()['frames_written'] == 10 and scheduler.queued_bytes == 0
+
+		# The writer wakes up for new frames.
+		scheduler.send(frame(10), OutboundScheduler.LANE_CHAT)
+		await asyncio.sleep(.05)
+		assert handle_of(writer.frames[-1]) == 10
+		scheduler.stop()
+
+	async def test_write_failure(self):
+		remote = GbxRemote('localhost', 5000, event_pool=self.loop)
+		writer = FakeWriter(fail_at=1)
+		remote.outbound = OutboundScheduler(writer, loop=self.loop, on_error=remote.fail_handlers)
+
+		# The second frame fails, the queued third frame is dropped. The first call is still waiting on its response.
+		calls = [self.loop.create_task(remote.execute('GetPlayerList', -1, 0, timeout=5)) for _ in range(3)]
+		await asyncio.sleep(0)
+		remote.outbound.start()
+		await asyncio.sleep(.05)
+		assert calls[1].done() and calls[2].done() and not calls[0].done()
+		with self.assertRaises(TransportException):
+			calls[1].result()
+		with self.assertRaises(TransportException):
+			calls[2].result()
+		stats = remote.outbound.stats()
+		assert stats['write_errors'] == 1 and stats['frames_dropped'] == 1
+
+		# The scheduler keeps writing after a failure.
+		call = self.loop.create_task(remote.execute('GetVersion', timeout=5))
+		await asyncio.sleep(.05)
+		assert len(writer.frames) == 2 and not call.done()
+
+		for task in calls + [call]:
+			task.cancel()
+		remote.outbound.stop()
@@ -0,0 +1,52 @@
+import json
+
+from collections.abc import Mapping
+
+from pyplanet.core.gbx.payload import (
+	LazyScriptPayload, is_lazy_compatible, mentions_response_id, parse_script_payload,
+)
+from pyplanet.core.journal.journal import serialize
+
+
+def test_parse_script_payload():
+	assert parse_script_payload(['{"login": "test"}', '{"time": 1}']) == dict(login='test', time=1)
+	assert parse_script_payload(['{"login": "test"}', 'plain']) == dict(login='test', raw_1='plain')
+	assert parse_script_payload('plain') == 'plain'
+
+
+def test_response_id():
+	assert mentions_response_id(['{"responseid": "abc"}'])
+	assert not mentions_response_id('{"login": "test"}')
+
+
+def test_lazy_payload():
+	loaded = list()
+	raw = ['{"login": "test", "racetime": 1234}']
+	assert is_lazy_compatible(raw)
+
+	payload = LazyScriptPayload(raw, on_load=lambda: loaded.append(True))
+	assert not payload.is_loaded
+	assert isinstance(payload, Mapping) and not isinstance(payload, dict)
+
+	assert payload['login'] == 'test'
+	assert payload.is_loaded
+	assert 'racetime' in payload
+	assert payload == dict(login='test', racetime=1234)
+	payload['racetime'] = 1
+	assert dict(payload) == dict(login='test', racetime=1)
+	assert loaded == [True]
+
+
+def test_lazy_payload_copies():
+	raw = ['{"login": "test"}', '{"time": 1}']
+	expected = dict(login='test', time=1)
+
+	# Copying or serialising an unloaded payload gives the decoded data.
+	assert dict(LazyScriptPayload(raw)) == expected
+	assert {**LazyScriptPayload(raw)} == expected
+	assert dict(**LazyScriptPayload(raw), signal=None) == dict(expected, signal=None)
+	assert json.loads(json.dumps(LazyScriptPayload(raw).copy())) == expected
+	assert serialize(LazyScriptPayload(raw)) == expected
+
+	payload = LazyScriptPayload('{"login": "test"')
+	assert payload == dict(raw_0='{"login": "test"')
@@ -0,0 +1,95 @@
+import asynctest
+
+from pyplanet.core.gbx.client import GbxClient
+from pyplanet.core.gbx.remote import GbxRemote
+from pyplanet.core.gbx.state import StateMirror
+
+
+def test_cache():
+	state = StateMirror()
+	settings = dict(S_TimeLimit=300)
+	state.store('GetModeScriptSettings', (), settings)
+
+	# The cached result is handed out without copying.
+	assert state.lookup('GetModeScriptSettings', ()) == (True, settings)
+	assert state.get('GetModeScriptSettings') is settings
+
+	# Setter invalidates the getter.
+	state.on_call('SetModeScriptSettings', (settings,))
+	assert state.get('GetModeScriptSettings') is None
+
+
+def test_outdated_store():
+	state = StateMirror()
+	generation = state.generation('GetCurrentMapInfo')
+	state.on_callback('ManiaPlanet.BeginMap', None)
+	state.store('GetCurrentMapInfo', (), dict(UId='old'), generation=generation)
+	assert state.get('GetCurrentMapInfo') is None
+
+
+def test_player_callbacks():
+	state = StateMirror()
+	state.on_multicall_result(
+		[dict(methodName='GetPlayerList', params=(-1, 0)), dict(methodName='GetDetailedPlayerInfo', params=('one',))],
+		[[[dict(Login='one', TeamId=-1), dict(Login='two', TeamId=-1)]], [dict(Login='one')]],
+	)
+	assert state.get('GetDetailedPlayerInfo', 'one') == dict(Login='one')
+
+	players = state.get('GetPlayerList', -1, 0)
+	state.on_callback('ManiaPlanet.PlayerInfoChanged', dict(Login='one', TeamId=1, SpectatorStatus=0))
+	assert state.get('GetPlayerList', -1, 0) == [dict(Login='one', TeamId=1), dict(Login='two', TeamId=-1)]
+	assert state.get('GetPlayerList', -1, 0)[1] is players[1]
+
+	# The list handed out before the change isn't modified.
+	assert players == [dict(Login='one', TeamId=-1), dict(Login='two', TeamId=-1)]
+	assert state.get('GetDetailedPlayerInfo', 'one') is None
+
+	state.on_callback('ManiaPlanet.PlayerConnect', ('three', False))
+	assert state.get('GetPlayerList', -1, 0) is None
+
+
+def test_map_change_limits():
+	state = StateMirror()
+	for callback in ('ManiaPlanet.BeginMap', 'Script.Maniaplanet.LoadingMap_Start'):
+		state.store('GetMaxPlayers', (), dict(CurrentValue=32, NextValue=64))
+		state.store('GetMaxSpectators', (), dict(CurrentValue=32, NextValue=16))
+		state.on_callback(callback, None)
+		assert state.get('GetMaxPlayers') is None
+		assert state.get('GetMaxSpectators') is None
+
+
+def test_outdated_multicall():
+	state = StateMirror()
+	calls = [dict(methodName='GetPlayerList', params=(-1, 0)), dict(methodName='GetMaxPlayers', params=())]
+	generations = state.generations_of(calls)
+
+	# The player list changed while the multicall was in flight.
+	state.on_callback('ManiaPlanet.PlayerConnect', ('three', False))
+	state.on_multicall_result(calls, [[[dict(Login='one')]], [dict(CurrentValue=32)]], generations=generations)
+	assert state.get('GetPlayerList', -1, 0) is None
+	assert state.get('GetMaxPlayers') == dict(CurrentValue=32)
+
+
+class TestClientMirror(asynctest.TestCase):
+	async def test_outdated_results(self):
+		client = GbxClient('localhost', 5000, event_pool=self.loop, instance=asynctest.Mock())
+		client.state = StateMirror()
+
+		async def execute(method, *args, timeout=45.0):
+			# The map changes while the calls are in flight.
+			client.state.on_callback('ManiaPlanet.BeginMap', None)
+			if method == 'system.multicall':
+				return [[dict(UId='old')], [dict(CurrentValue=32)], [[]]]
+			return dict(CurrentValue=32)
+
+		with asynctest.patch.object(GbxRemote, 'execute', side_effect=execute):
+			await client.execute('GetMaxPlayers')
+			assert client.state.get('GetMaxPlayers') is None
+
+			await client.execute('system.multicall', [
+				dict(methodName='GetCurrentMapInfo', params=[]), dict(methodName='GetMaxSpectators', params=[]),
+				dict(methodName='GetPlayerList', params=[-1, 0]),
+			])
+		assert client.state.get('GetCurrentMapInfo') is None
+		assert client.state.get('GetMaxSpectators') is None
+		assert client.state.get('GetPlayerList', -1, 0) == []
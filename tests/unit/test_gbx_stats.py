@@ -0,0 +1,111 @@
+import asyncio
+import asynctest
+import json
+import os
+import tempfile
+
+from pyplanet.core.gbx.remote import GbxRemote
+from pyplanet.core.gbx.stats import GbxStats, MethodStats
+
+
+class FakeOutbound:
+	def __init__(self):
+		self.frames = list()
+
+	def lane_for(self, method, args=None):
+		return 1
+
+	def send(self, frame, lane=1):
+		self.frames.append(frame)
+
+
+class TestGbxStats(asynctest.TestCase):
+	async def test_percentiles(self):
+		stats = MethodStats('GetPlayerList')
+		assert stats.percentile(50) is None
+
+		for duration in [0.5] * 50 + [7] * 45 + [40] * 4 + [45000]:
+			stats.record(duration, 100)
+		assert stats.responses == 100 and stats.response_bytes == 10000
+		assert stats.percentile(50) == 1
+		assert stats.percentile(95) == 10
+		assert stats.percentile(99) == 50
+		assert stats.percentile(100) == 45000
+		assert stats.max_time == 45000
+
+		data = stats.as_dict()
+		assert data['histogram']['1'] == 50 and data['histogram']['10'] == 45 and data['histogram']['inf'] == 1
+		assert data['p95_ms'] == 10 and data['max_ms'] == 45000
+
+	async def test_in_flight(self):
+		stats = GbxStats()
+		stats.request(1, 'GetVersion', 100)
+		stats.request(2, 'GetVersion', 100)
+		stats.request(3, 'GetPlayerList', 50)
+		stats.request(4, 'GetPlayerList', 50)
+		assert len(stats.in_flight) == 4
+
+		stats.response(1, 500)
+		stats.response(3, 200, fault=True)
+		stats.timeout(2)
+		stats.discard(4)
+		assert stats.in_flight == dict()
+
+		# Late responses of reaped requests are ignored.
+		stats.response(2, 500)
+		stats.timeout(4)
+
+		version, players = stats.get('GetVersion'), stats.get('GetPlayerList')
+		assert version.calls == 2 and version.responses == 1 and version.timeouts == 1
+		assert version.request_bytes == 200 and version.response_bytes == 500
+		assert players.calls == 2 and players.responses == 1 and players.faults == 1 and players.timeouts == 0
+
+	async def test_reaping(self):
+		remote = GbxRemote('localhost', 5000, event_pool=self.loop)
+		remote.outbound = FakeOutbound()
+
+		with self.assertRaises(asyncio.TimeoutError):
+			await remote.execute('GetVersion', timeout=.01)
+		assert remote.handlers == dict() and remote.stats.in_flight == dict()
+		assert remote.stats.get('GetVersion').timeouts == 1
+
+		call = self.loop.create_task(remote.execute('GetPlayerList', -1, 0))
+		await asyncio.sleep(0)
+		assert len(remote.handlers) == 1 and len(remote.stats.in_flight) == 1
+		call.cancel()
+		with self.assertRaises(asyncio.CancelledError):
+			await call
+		assert remote.handlers == dict() and remote.stats.in_flight == dict()
+		assert remote.stats.get('GetPlayerList').timeouts == 0
+		assert len(remote.outbound.frames) == 2
+
+	async def test_dump(self):
+		stats = GbxStats()
+		stats.request(1, 'GetVersion', 100)
+		stats.response(1, 500)
+		stats.request(2, 'GetPlayerList', 50)
+		stats.script_callback('Trackmania.Event.WayPoint')
+		stats.script_callback('Trackmania.Event.WayPoint', skipped=True)
+		stats.offloaded(300000, 12.5)
+
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, 'gbx.json')
+			stats.dump(path)
+			with open(path) as file:
+				data = json.load(file)
+			assert data['in_flight'] == 1
+			assert data['methods']['GetVersion']['responses'] == 1
+			assert data['methods']['GetPlayerList']['calls'] == 1
+			assert data['script_callbacks']['Trackmania.Event.WayPoint'] == dict(received=2, skipped=1, parsed=0)
+			assert data['offload']['frames'] == 1 and data['dispatch'] is None
+
+			path = os.path.join(directory, 'gbx.txt')
+			stats.start_dump(path, interval=.01, loop=self.loop)
+			await asyncio.sleep(.1)
+			stats.stop_dump()
+			with open(path) as file:
+				text = file.read()
+			assert text.startswith('GBX statistics, in flight: 1')
+			assert 'GetVersion' in text and 'GetPlayerList' in text
+			assert 'Offloaded decoding: 1 frames' in text
+			assert 'Trackmania.Event.WayPoint' in text
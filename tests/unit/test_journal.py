@@ -0,0 +1,65 @@
+import asynctest
+import tempfile
+
+from pyplanet.core.events import Signal
+from pyplanet.core.journal import EventJournal, read_journal
+from pyplanet.core.journal.journal import serialize
+
+
+class FakePlayer:
+	login = 'login'
+	nickname = '$fffNick'
+
+
+class TestEventJournal(asynctest.TestCase):
+	async def test_serialize(self):
+		assert serialize(dict(player=FakePlayer(), race_time=1000, flow=object(), cps=(1, 2))) == \
+			dict(player='login', race_time=1000, cps=[1, 2])
+
+	async def test_mirror_and_read(self):
+		with tempfile.TemporaryDirectory() as directory:
+			journal = EventJournal(directory, max_size=100, loop=self.loop)
+			signal = Signal(code='finish', namespace='tests')
+			journal.mirror(signal, fields=['player', 'race_time'])
+
+			for race_time in (1000, 2000, 3000):
+				await signal.send(dict(player=FakePlayer(), race_time=race_time, flow=object()), raw=True)
+			await journal.flush()
+			journal.record('tests:chat', dict(text='gg'))
+			await journal.stop()
+
+			events = list(read_journal(directory))
+			assert [event.signal for event in events] == ['tests:finish'] * 3 + ['tests:chat']
+			assert events[0].payload == dict(player='login', race_time=1000)
+			assert journal.files == 2
+
+			finishes = list(read_journal(directory, signals={'tests:finish'}))
+			assert [event.payload['race_time'] for event in finishes] == [1000, 2000, 3000]
+
+	async def test_mirror_twice(self):
+		with tempfile.TemporaryDirectory() as directory:
+			journal = EventJournal(directory, loop=self.loop)
+			signal = Signal(code='finish', namespace='tests')
+			journal.mirror(signal)
+			journal.mirror(signal, fields=['race_time'])
+			assert len(signal.receivers) == 1
+
+			await signal.send(dict(race_time=1000), raw=True)
+			await journal.stop()
+			assert [event.payload for event in read_journal(directory)] == [dict(race_time=1000)]
+
+	async def test_write_failure(self):
+		with tempfile.TemporaryDirectory() as directory:
+			journal = EventJournal(directory, loop=self.loop)
+			journal.record('tests:chat', dict(text='gg'))
+			journal.record('tests:chat', dict(text='wp'))
+			with asynctest.patch.object(journal, 'write', side_effect=OSError('No space left on device')):
+				with asynctest.patch('pyplanet.core.journal.journal.logger') as logger:
+					await journal.flush()
+			assert logger.error.called
+			assert journal.stats()['lost'] == 2 and journal.stats()['pending'] == 0
+
+			journal.record('tests:chat', dict(text='gl'))
+			await journal.stop()
+			assert [event.payload['text'] for event in read_journal(directory)] == ['gl']
+			assert journal.stats()['lost'] == 2 and journal.stats()['events'] == 1
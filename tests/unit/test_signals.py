@@ -1,8 +1,11 @@
+import asyncio
+
 import asynctest
 
 from pyplanet.apps import AppConfig
 from pyplanet.core import Controller
-from pyplanet.core.events import Signal
+from pyplanet.core.events import Signal, KeyPrefix, Coalesce
+from pyplanet.core.events.profiler import SignalProfiler
 
 
 class TestSignals(asynctest.TestCase):
@@ -92,6 +95,86 @@ class TestSignals(asynctest.TestCase):
 		assert self.got_sync == 1
 		assert self.got_async == 1
 
+	async def test_conditions(self):
+		test1 = Signal(code='test1', namespace='tests')
+		calls = list()
+
+		def login_listener(**kwargs):
+			calls.append('login')
+
+		def view_listener(**kwargs):
+			calls.append('view')
+
+		def predicate_listener(**kwargs):
+			calls.append('predicate')
+
+		test1.register(login_listener, weak=False, conditions={'player.login': 'one'})
+		test1.register(view_listener, weak=False, conditions={'action': KeyPrefix('view_id'), 'player.login': 'two'})
+		test1.register(predicate_listener, weak=False, conditions=lambda payload: payload['action'] == 'other')
+
+		await test1.send(dict(player=dict(login='one'), action='view_id__click'), raw=True)
+		assert calls == ['login']
+
+		await test1.send(dict(player=dict(login='two'), action='view_id__click'), raw=True)
+		await test1.send(dict(player=dict(login='two'), action='view_id_other__click'), raw=True)
+		assert calls == ['login', 'view']
+
+		await test1.send(dict(player=dict(login='one'), action='other'), raw=True)
+		assert calls == ['login', 'view', 'login', 'predicate']
+
+	async def test_profiling(self):
+		test1 = Signal(code='test1', namespace='tests')
+
+		def sync_listener(**kwargs):
+			pass
+
+		async def failing_listener(**kwargs):
+			raise Exception('Failing listener')
+
+		test1.register(sync_listener, weak=False)
+		test1.register(failing_listener, weak=False)
+
+		Signal.profiler = SignalProfiler(threshold=None)
+		try:
+			await test1.send_robust(dict(), raw=True)
+			await test1.send_robust(dict(), raw=True)
+		finally:
+			profiler, Signal.profiler = Signal.profiler, None
+
+		top = {entry['receiver'].split('.')[-1]: entry for entry in profiler.top(order_by='calls')}
+		assert top['sync_listener']['calls'] == 2
+		assert top['sync_listener']['exceptions'] == 0
+		assert top['failing_listener']['exceptions'] == 2
+		assert top['failing_listener']['signal'] == 'tests:test1'
+
+	async def test_coalescing(self):
+		test1 = Signal(code='test1', namespace='tests')
+		batches = list()
+		latest = list()
+
+		async def batch_listener(events, **kwargs):
+			batches.append([event['value'] for event in events])
+
+		def latest_listener(events, **kwargs):
+			latest.append([event['value'] for event in events])
+
+		test1.register(batch_listener, weak=False, coalesce=Coalesce(.01))
+		test1.register(latest_listener, weak=False, coalesce=Coalesce(.01, key='player.login'))
+
+		for login, value in [('one', 1), ('two', 2), ('one', 3)]:
+			await test1.send(dict(player=dict(login=login), value=value), raw=True)
+		assert batches == [] and latest == []
+
+		await asyncio.sleep(.05)
+		assert batches == [[1, 2, 3]]
+		assert latest == [[2, 3]]
+
+		await test1.send(dict(player=dict(login='one'), value=4), raw=True)
+		test1.unregister(latest_listener)
+		await asyncio.sleep(.05)
+		assert batches == [[1, 2, 3], [4]]
+		assert latest == [[2, 3]]
+
 	####################################################################################################################
 
 	def sync_listener(self, glue=None, source=None, **kwargs):
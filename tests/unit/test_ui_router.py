@@ -0,0 +1,95 @@
+import asynctest
+import gc
+
+from pyplanet.core.events import Signal, SignalManager
+from pyplanet.core.ui.components.manialink import StaticManiaLink
+from pyplanet.core.ui.router import ActionRouter
+
+
+class Player:
+	def __init__(self, login):
+		self.login = login
+
+
+class FakeManialink:
+	def __init__(self, id):
+		self.id = id
+		self.actions = list()
+		self.shown = set()
+
+	def is_shown_to(self, login):
+		return login in self.shown
+
+	async def handle(self, player, action, values, **kwargs):
+		self.actions.append(action)
+
+
+class TestActionRouter(asynctest.TestCase):
+	async def test_routing(self):
+		router = ActionRouter()
+		parent = FakeManialink('pyplanet__list')
+		child = FakeManialink('pyplanet__list__players')
+		router.add(parent)
+		router.add(child)
+
+		await router.handle(None, 'pyplanet__list__button_close', dict())
+		await router.handle(None, 'pyplanet__list__players__button_close', dict())
+		await router.handle(None, 'unknown__button', dict())
+
+		assert parent.actions == ['pyplanet__list__button_close']
+		assert child.actions == ['pyplanet__list__players__button_close']
+		assert router.stats() == dict(routes=2, routed=2, unrouted=1)
+
+		router.remove(child)
+		await router.handle(None, 'pyplanet__list__players__button_close', dict())
+		assert parent.actions[-1] == 'pyplanet__list__players__button_close'
+
+	async def test_shared_id(self):
+		router = ActionRouter()
+		first = FakeManialink('pyplanet.views.generics.list.ListView')
+		second = FakeManialink('pyplanet.views.generics.list.ListView')
+		first.shown.add('first')
+		second.shown.add('second')
+		router.add(first)
+		router.add(second)
+		router.add(first)
+
+		await router.handle(Player('first'), 'pyplanet.views.generics.list.ListView__button_next', dict())
+		await router.handle(Player('second'), 'pyplanet.views.generics.list.ListView__button_close', dict())
+		assert first.actions == ['pyplanet.views.generics.list.ListView__button_next']
+		assert second.actions == ['pyplanet.views.generics.list.ListView__button_close']
+		assert router.stats()['routes'] == 1
+
+		# The other view keeps working after a view is destroyed.
+		router.remove(second)
+		await router.handle(Player('first'), 'pyplanet.views.generics.list.ListView__button_close', dict())
+		assert first.actions[-1] == 'pyplanet.views.generics.list.ListView__button_close'
+
+		router.add(second)
+		del first
+		gc.collect()
+		await router.handle(Player('second'), 'pyplanet.views.generics.list.ListView__button_prev', dict())
+		assert second.actions[-1] == 'pyplanet.views.generics.list.ListView__button_prev'
+		assert len(router.routes['pyplanet.views.generics.list.ListView']) == 1
+
+		router.remove(second)
+		assert router.routes == dict()
+
+	async def test_fallback_listener(self):
+		# The manialink subscribed before the router existed, it has to stop listening even if the router exists now.
+		signal = Signal(code='manialink_answer', namespace='maniaplanet')
+		manager = asynctest.Mock(instance=object())
+		manialink = StaticManiaLink(manager=manager, id='pyplanet__tests')
+		with asynctest.patch.dict(SignalManager.signals, {'maniaplanet:manialink_answer': signal}):
+			manialink.register_route()
+			assert len(signal.receivers) == 1
+
+			router = ActionRouter()
+			manager.instance = asynctest.Mock(ui_manager=asynctest.Mock(router=router))
+			manialink.unregister_route()
+			assert signal.receivers == [] and router.routes == dict()
+
+			manialink.register_route()
+			assert len(signal.receivers) == 0 and len(router.routes) == 1
+			manialink.unregister_route()
+			assert router.routes == dict()
@@ -0,0 +1,39 @@
+from pyplanet.utils.cache import IdentityMap
+
+
+def test_identity_map_eviction():
+	cache = IdentityMap(max_size=2)
+	cache['a'] = a = object()
+	cache['b'] = object()
+	cache.pin('a')
+	cache['c'] = object()
+	cache['d'] = object()
+
+	# Pinned entries don't count for the maximum size.
+	assert cache.get('a') is a
+	assert 'b' not in cache
+	assert 'c' in cache and 'd' in cache
+	assert cache.evictions == 1
+
+	# Unpinned entries are evicted least recently used first.
+	cache.get('c')
+	cache.unpin('a')
+	assert 'd' not in cache
+	assert 'a' in cache and 'c' in cache
+
+	assert cache.get('unknown') is None
+	stats = cache.stats()
+	assert stats['hits'] == 2 and stats['misses'] == 1 and stats['evictions'] == 2
+
+
+def test_identity_map_expiration():
+	cache = IdentityMap(ttl=60)
+	cache['a'] = object()
+	cache['b'] = object()
+	cache.pin_only(['b'])
+	cache._entries['a'][1] -= 120
+
+	assert 'a' not in cache
+	assert 'b' in cache
+	assert cache.expirations == 1
+	assert len(cache) == 1
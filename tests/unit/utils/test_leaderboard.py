@@ -0,0 +1,33 @@
+from pyplanet.utils.leaderboard import Leaderboard
+
+
+class Record:
+	def __init__(self, login, score):
+		self.login = login
+		self.score = score
+
+
+def test_leaderboard_ranks():
+	first, second, third = Record('a', 1000), Record('b', 2000), Record('c', 2000)
+	board = Leaderboard([third, first, second])
+
+	# Records with the same score keep the given order.
+	assert list(board) == [first, third, second]
+	assert board.rank('a') == 1 and board.rank('b') == 3
+	assert board.rank('unknown') is None
+	assert board.get('c') is third
+	assert board.index(second) == 2
+
+	# Improve a record in place, equal scores are ranked after the existing ones.
+	second.score = 1000
+	assert board.submit(second) == 2
+	assert [r.login for r in board] == ['a', 'b', 'c']
+
+	fourth = Record('d', 500)
+	assert board.submit(fourth) == 1
+	assert len(board) == 4
+	assert board[1:3] == [first, second]
+
+	assert board.remove('a') is first
+	assert board.rank('b') == 2
+	assert first not in board and second in board